@@ -0,0 +1,359 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import numpy as np
+from game_engine import GameEngine
+
+# Percentiles reported for every stage
+PERCENTILES = (50, 95, 99)
+
+
+class LatencyRecorder:
+    """Collects per-stage latencies (in seconds) and summarises them as percentiles"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def add(self, stage, seconds):
+        self.samples.setdefault(stage, []).append(seconds)
+
+    def summary(self):
+        summary = {}
+        for stage, values in self.samples.items():
+            values_us = np.asarray(values) * 1e6
+            stage_summary = {f"p{p}_us": float(np.percentile(values_us, p)) for p in PERCENTILES}
+            stage_summary["mean_us"] = float(values_us.mean())
+            stage_summary["count"] = len(values)
+            summary[stage] = stage_summary
+        return summary
+
+
+def load_landmarks(path):
+    """
+    Load a recorded landmark sequence.
+    Accepts .npy (N, 21, 2|3) arrays or .npz files with a 'landmarks' array and
+    optional 'handedness' codes, in pixel units as produced by
+    HandDetector.find_landmarks(img, space="pixel").
+    Returns (landmarks, handedness); handedness is None if it was not recorded.
+    """
+    data = np.load(path)
+    handedness = None
+    if isinstance(data, np.lib.npyio.NpzFile):
+        if "handedness" in data:
+            handedness = np.asarray(data["handedness"], dtype=np.int8)
+        data = data["landmarks"]
+    # float32, like the detector's landmark buffers
+    data = np.asarray(data, dtype=np.float32)
+    if data.ndim != 3 or data.shape[1] != 21:
+        raise ValueError(f"{path}: expected landmarks of shape (N, 21, 2|3), got {data.shape}")
+    if handedness is not None and handedness.shape != (len(data),):
+        raise ValueError(f"{path}: expected {len(data)} handedness codes, got shape {handedness.shape}")
+    return data, handedness
+
+
+def synthetic_landmarks(num_frames, seed=0):
+    """
+    Plausible open-hand (N, 21, 3) float32 landmark frames in pixel units with
+    per-frame jitter, for benchmarking when no recording is available.
+    """
+    rng = np.random.default_rng(seed)
+    # Wrist, then 4 joints along each of 5 fanned-out fingers
+    template = [[0.0, 0.0, 0.0]]
+    for finger, angle in enumerate(np.linspace(-0.9, 0.6, 5)):
+        length = 0.8 if finger == 0 else 1.0
+        for joint in range(1, 5):
+            r = length * (0.35 + 0.22 * joint)
+            # Fingertips sit slightly closer to the camera than the wrist
+            template.append([r * np.sin(angle), -r * np.cos(angle), -0.05 * joint])
+    template = np.asarray(template) * 150 + [640, 500, 0]
+
+    frames = template + rng.normal(0, 6, size=(num_frames, 21, 3))
+    return frames.astype(np.float32)
+
+
+def load_classifier(model_path, landmarks, handedness=None):
+    """
+    Load the trained classifier, or fit a throwaway KNN on the replayed frames
+    (labels cycling through the game's signs) so the classify stage is still exercised.
+    """
+    from classifier import SignClassifier
+
+    classifier = SignClassifier(model_path)
+    if classifier.model is None:
+        from sklearn.neighbors import KNeighborsClassifier
+
+        print("Using a throwaway model fitted on the replayed frames.")
+        features = classifier.feature_extractor().extract_features_batch(landmarks, handedness)
+        signs = GameEngine().signs
+        labels = np.array([signs[i % len(signs)] for i in range(len(features))])
+        classifier.model = KNeighborsClassifier(n_neighbors=5).fit(features, labels)
+        classifier.build_engine()
+    return classifier
+
+
+def replay(landmarks, handedness, extractor, classifier, game, recorder):
+    """
+    Run every frame through featurize -> classify -> game update, timing each stage.
+    Frames are featurized one at a time from the float landmark array, as
+    RecognitionPipeline.process_frame does with the detector's output.
+    """
+    clock = time.perf_counter
+    for i in range(len(landmarks)):
+        frame_handedness = handedness[i:i + 1] if handedness is not None else None
+        t0 = clock()
+        features = extractor.extract_features_batch(landmarks[i:i + 1], frame_handedness)[0]
+        t1 = clock()
+        predicted_sign, confidence = classifier.predict(features)
+        t2 = clock()
+        game.update(predicted_sign, confidence)
+        t3 = clock()
+
+        recorder.add("featurize", t1 - t0)
+        recorder.add("classify", t2 - t1)
+        recorder.add("game_update", t3 - t2)
+        recorder.add("total", t3 - t0)
+
+
+def run_landmark_benchmark(landmarks, classifier, repeats=1, handedness=None):
+    """
+    Benchmark the recognition path on a landmark sequence (with optional handedness codes).
+    Returns a result dict with per-stage percentiles, FPS and peak memory.
+    """
+    extractor = classifier.feature_extractor()
+
+    def new_game():
+        game = GameEngine()
+        game.start_game()
+        # Keep the game in PLAYING for the whole replay
+        game.round_time_limit = float("inf")
+        return game
+
+    # Warm-up pass so one-off costs (imports, caches) are not measured
+    replay(landmarks[:50], handedness, extractor, classifier, new_game(), LatencyRecorder())
+
+    recorder = LatencyRecorder()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        replay(landmarks, handedness, extractor, classifier, new_game(), recorder)
+    elapsed = time.perf_counter() - start
+
+    # Batched path over the whole sequence
+    t0 = time.perf_counter()
+    features = extractor.extract_features_batch(landmarks, handedness)
+    t1 = time.perf_counter()
+    classifier.predict_batch(features)
+    t2 = time.perf_counter()
+
+    # Memory is measured in a separate pass so tracing does not skew the timings
+    tracemalloc.start()
+    replay(landmarks, handedness, extractor, classifier, new_game(), LatencyRecorder())
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    frames = len(landmarks) * repeats
+    return {
+        "frames": frames,
+        "fps": frames / elapsed if elapsed > 0 else 0.0,
+        "stages": recorder.summary(),
+        "batch": {
+            "featurize_fps": len(landmarks) / (t1 - t0) if t1 > t0 else 0.0,
+            "classify_fps": len(landmarks) / (t2 - t1) if t2 > t1 else 0.0,
+        },
+        "peak_memory_mb": peak / 2 ** 20,
+    }
+
+
+def video_landmarks(path, detector, recorder=None):
+    """
+    Decode a video and run HandDetector on every frame, timing decode and detect stages.
+    Yields (landmarks, handedness) of the first hand, float (21, 3) pixel landmarks,
+    or None for frames without a hand.
+    """
+    import cv2
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"Could not open video {path}")
+    clock = time.perf_counter
+    try:
+        while True:
+            t0 = clock()
+            success, img = cap.read()
+            if not success:
+                break
+            t1 = clock()
+            detector.find_hands(img, draw=False)
+            landmarks, handedness, _ = detector.find_landmarks(img, space="pixel")
+            t2 = clock()
+            if recorder is not None:
+                recorder.add("decode", t1 - t0)
+                recorder.add("detect", t2 - t1)
+            # The detector reuses its buffers, so keep a copy
+            yield (landmarks[0].copy(), handedness[0]) if len(landmarks) else None
+    finally:
+        cap.release()
+
+
+def run_video_benchmark(path, classifier_path, record_path=None, roi_tracking=False):
+    """
+    Benchmark decode -> detect -> featurize -> classify -> game update on a video file.
+    If record_path is given, the detected landmarks and handedness are saved there
+    as .npz for later replays.
+    """
+    from hand_detector import HandDetector
+
+    detector = HandDetector(detection_con=0.8, roi_tracking=roi_tracking)
+    recorder = LatencyRecorder()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    frames = list(video_landmarks(path, detector, recorder))
+    detected = [frame for frame in frames if frame is not None]
+    landmarks = np.array([lm for lm, _ in detected], dtype=np.float32).reshape(-1, 21, 3)
+    handedness = np.array([code for _, code in detected], dtype=np.int8)
+    if record_path:
+        np.savez(record_path, landmarks=landmarks, handedness=handedness)
+    classifier = load_classifier(classifier_path, landmarks, handedness) if len(detected) else None
+
+    game = GameEngine()
+    game.start_game()
+    game.round_time_limit = float("inf")
+    if classifier is not None:
+        replay(landmarks, handedness, classifier.feature_extractor(), classifier, game, recorder)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "frames": len(frames),
+        "frames_with_hand": len(detected),
+        "fps": len(frames) / elapsed if elapsed > 0 else 0.0,
+        "stages": recorder.summary(),
+        "peak_memory_mb": peak / 2 ** 20,
+    }
+
+
+def measure_startup(model_path, runs=3):
+    """
+    Cold-start profile from fresh interpreters (see startup_profiler.probe).
+    Returns the run with the median time to first frame.
+    """
+    import subprocess
+
+    src_dir = os.path.dirname(os.path.abspath(__file__))
+    summaries = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, os.path.join(src_dir, "startup_profiler.py"), "--model", model_path],
+                                cwd=os.getcwd(), capture_output=True, text=True, check=True).stdout
+        summaries.append(json.loads(output.strip().splitlines()[-1]))
+    summaries.sort(key=lambda s: s["time_to_first_frame_ms"])
+    return summaries[len(summaries) // 2]
+
+
+def compare_to_baseline(result, baseline, tolerance=0.2):
+    """
+    Compare a result against a stored baseline.
+    Returns a list of human-readable regressions: stage p95/p99 latencies or
+    overall FPS that got worse by more than `tolerance` (fraction).
+    """
+    regressions = []
+    for stage, current in result.get("stages", {}).items():
+        previous = baseline.get("stages", {}).get(stage)
+        if previous is None:
+            continue
+        for key in ("p95_us", "p99_us"):
+            if previous[key] > 0 and current[key] > previous[key] * (1 + tolerance):
+                regressions.append(f"{stage} {key}: {previous[key]:.1f} -> {current[key]:.1f}")
+
+    if baseline.get("fps") and result.get("fps", 0) < baseline["fps"] * (1 - tolerance):
+        regressions.append(f"fps: {baseline['fps']:.1f} -> {result['fps']:.1f}")
+
+    previous = (baseline.get("startup") or {}).get("time_to_first_frame_ms")
+    current = (result.get("startup") or {}).get("time_to_first_frame_ms")
+    if previous and current and current > previous * (1 + tolerance):
+        regressions.append(f"time_to_first_frame_ms: {previous:.1f} -> {current:.1f}")
+    return regressions
+
+
+def print_result(result):
+    print(f"Frames: {result['frames']}  FPS: {result['fps']:.1f}  Peak memory: {result['peak_memory_mb']:.2f} MB")
+    print(f"{'stage':<12}" + "".join(f"{'p' + str(p) + ' (us)':>12}" for p in PERCENTILES))
+    for stage, summary in result["stages"].items():
+        print(f"{stage:<12}" + "".join(f"{summary[f'p{p}_us']:>12.1f}" for p in PERCENTILES))
+    for key, value in result.get("batch", {}).items():
+        print(f"batch {key}: {value:.0f}")
+    if result.get("startup"):
+        print(f"Time to first frame: {result['startup']['time_to_first_frame_ms']:.1f} ms  ("
+              + ", ".join(f"{name} {ms:.0f}" for name, ms in result["startup"]["stages_ms"].items()) + ")")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline benchmark of the sign recognition path")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--landmarks", help="Recorded landmark sequence (.npy / .npz)")
+    source.add_argument("--video", help="Video file to decode and run through HandDetector")
+    source.add_argument("--synthetic", type=int, default=2000,
+                        help="Number of synthetic landmark frames (default when no source is given)")
+    parser.add_argument("--record-landmarks", help="With --video, save the detected landmarks and handedness to this .npz file")
+    parser.add_argument("--roi-tracking", action="store_true", help="With --video, use HandDetector ROI tracking")
+    parser.add_argument("--model", default="../data/model.pkl", help="Trained model to benchmark")
+    parser.add_argument("--repeats", type=int, default=1, help="Replay the landmark sequence this many times")
+    parser.add_argument("--no-startup", action="store_true", help="Skip the cold-start (time to first frame) probe")
+    parser.add_argument("--output", help="Write the JSON result to this file")
+    parser.add_argument("--baseline", help="Baseline JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2,
+                        help="Allowed relative slowdown before flagging a regression")
+    args = parser.parse_args(argv)
+
+    if args.video:
+        result = run_video_benchmark(args.video, args.model, args.record_landmarks, args.roi_tracking)
+        source_name = args.video
+    else:
+        if args.landmarks:
+            landmarks, handedness = load_landmarks(args.landmarks)
+            source_name = args.landmarks
+        else:
+            landmarks, handedness = synthetic_landmarks(args.synthetic), None
+            source_name = f"synthetic:{args.synthetic}"
+        classifier = load_classifier(args.model, landmarks, handedness)
+        result = run_landmark_benchmark(landmarks, classifier, repeats=args.repeats, handedness=handedness)
+
+    if not args.no_startup:
+        result["startup"] = measure_startup(args.model)
+
+    result["meta"] = {
+        "source": source_name,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+    }
+    print_result(result)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Result written to {args.output}")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            print(f"Baseline {args.baseline} not found.")
+            return 1
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare_to_baseline(result, baseline, args.tolerance)
+        if regressions:
+            print("REGRESSIONS vs baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print("No regressions vs baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
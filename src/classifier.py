@@ -1,27 +1,66 @@
-import pandas as pd
 import numpy as np
 import pickle
 import os
-from sklearn.neighbors import KNeighborsClassifier
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+from knn_engine import KNNEngine
+from dataset_store import DatasetStore, DEFAULT_STORE_PATH
+from feature_extractor import FeatureExtractor
+from model_artifact import ModelArtifact
+
+# sklearn and pandas are only imported for training or when a pickled
+# sklearn model has to be loaded; inference from a ModelArtifact needs neither.
+
+# Each user's personal samples live in their own dataset store under here
+USER_STORE_ROOT = "../data/users"
 
 class SignClassifier:
-    def __init__(self, model_path="../data/model.pkl"):
+    def __init__(self, model_path="../data/model.pkl", max_per_class=None):
+        """
+        model_path: pickled sklearn model. A model artifact directory next to it
+        (same name without extension) is preferred when present.
+        max_per_class: cap on reference samples per sign kept by learn()
+        (oldest dropped first); None for no cap.
+        """
         self.model_path = model_path
+        self.artifact_path = os.path.splitext(model_path)[0] if model_path else None
+        self.max_per_class = max_per_class
         self.model = None
+        self.engine = None
+        self.user = None
+        self.user_layers = {} # user -> KNNEngine with that user's samples
+        self.cache = None # optional PredictionCache, see enable_cache()
+        # FeatureExtractor version the model expects; set from the model on load
+        self.feature_version = FeatureExtractor.FEATURE_VERSION
         self.load_model()
 
-    def train_model(self, data_path="../data/dataset.csv"):
+    def train_model(self, data_path=None, condense_method=None, prototypes_per_class=None, max_accuracy_loss=None,
+                    feature_version=None):
+        """
+        Train on a dataset store directory or a legacy CSV file.
+        By default the store at ../data/dataset is used, falling back to ../data/dataset.csv.
+        condense_method: "kmeans" or "cnn" to shrink the reference set (see condense.py),
+        sized by prototypes_per_class and/or max_accuracy_loss (fraction, e.g. 0.01).
+        feature_version: FeatureExtractor version to train on (default: the current
+        one if every sample supports it, see dataset_feature_version).
+        """
+        if data_path is None:
+            data_path = "../data/dataset" if DatasetStore.exists("../data/dataset") else "../data/dataset.csv"
+
         if not os.path.exists(data_path):
             print("Dataset not found. Please run data_collector.py first.")
             return
 
-        print("Loading dataset...")
-        df = pd.read_csv(data_path)
-        
-        X = df.drop('label', axis=1)
-        y = df['label']
+        feature_version = self.dataset_feature_version(data_path, feature_version)
+
+        from sklearn.neighbors import KNeighborsClassifier
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score
+
+        print(f"Loading dataset (features v{feature_version})...")
+        X, y = self.load_dataset(data_path, feature_version)
+        if len(X) < 2:
+            print(f"Not enough samples with v{feature_version} features in {data_path} to train.")
+            return
+        self.feature_version = feature_version
         
         X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
         
@@ -33,31 +72,306 @@ class SignClassifier:
         y_pred = self.model.predict(X_test)
         accuracy = accuracy_score(y_test, y_pred)
         print(f"Model Accuracy: {accuracy * 100:.2f}%")
+        metrics = {"accuracy": float(accuracy), "num_train": len(X_train), "num_test": len(X_test)}
+
+        if condense_method is not None:
+            from condense import condense_model, print_report
+
+            print("Condensing reference set...")
+            self.model, report = condense_model(self.model, X_train, y_train, X_test, y_test, method=condense_method,
+                                                per_class=prototypes_per_class, max_accuracy_loss=max_accuracy_loss)
+            print_report(report)
+            metrics["accuracy"] = report["condensed"]["accuracy"]
+            metrics["condensation"] = report
+        self.build_engine()
         
+        self.save_model(metrics)
+
+    def save_model(self, metrics=None):
+        """
+        Pickle the sklearn model and, for KNN models, also write the
+        sklearn-free model artifact with its feature version and metrics.
+        """
         with open(self.model_path, 'wb') as f:
             pickle.dump(self.model, f)
         print(f"Model saved to {self.model_path}")
 
+        if self.engine is not None:
+            ModelArtifact.save(self.engine, self.artifact_path,
+                               feature_version=self.feature_version, metrics=metrics)
+            print(f"Model artifact saved to {self.artifact_path}")
+        else:
+            # A stale artifact would otherwise shadow the new model
+            ModelArtifact.remove(self.artifact_path)
+
+    @staticmethod
+    def dataset_feature_version(data_path, feature_version=None):
+        """
+        The FeatureExtractor version to train on from a dataset.
+        By default the current version, unless some samples lack the raw
+        landmarks to compute it (imported CSVs, old recordings): then the
+        newest version every sample has, so none are dropped silently.
+        An explicit feature_version is kept (samples it cannot use are
+        skipped); ValueError if no sample supports it.
+        """
+        if not os.path.isdir(data_path):
+            # Legacy CSV files hold v1 features only
+            if feature_version not in (None, 1):
+                raise ValueError(f"{data_path} only holds v1 features; pass feature_version=1 (--features 1)")
+            return 1
+
+        store = DatasetStore(data_path)
+        available = {version: store.rows_with_features(version)
+                     for version in FeatureExtractor.NUM_FEATURES_BY_VERSION}
+        if feature_version is not None:
+            if store.num_rows and not available[feature_version]:
+                usable = [version for version, rows in available.items() if rows]
+                raise ValueError(f"No samples in {data_path} can produce v{feature_version} features "
+                                 f"(no raw landmarks); pass feature_version={max(usable)} "
+                                 f"(--features {max(usable)})")
+            return feature_version
+
+        current = FeatureExtractor.FEATURE_VERSION
+        if available[current] == store.num_rows:
+            return current
+        complete = [version for version, rows in available.items() if rows == store.num_rows]
+        if not complete:
+            return current # no version covers everything; load() skips what it cannot use
+        version = max(complete)
+        print(f"{store.num_rows - available[current]} of {store.num_rows} samples in {data_path} have no raw "
+              f"landmarks for v{current} features; training v{version} on all samples. "
+              f"Pass --features {current} to train v{current} on the other {available[current]}.")
+        return version
+
+    @staticmethod
+    def load_dataset(data_path, feature_version=None):
+        """
+        Return (X, y) from a dataset store directory (memory-mapped) or a CSV file.
+        feature_version: FeatureExtractor version of the store's features (default: current)
+        """
+        if os.path.isdir(data_path):
+            # Bring cached features to the requested FeatureExtractor version first
+            extractor = FeatureExtractor(feature_version)
+            store = DatasetStore(data_path)
+            store.materialize_features(extractor)
+            X, y = store.load(mmap=True, feature_version=extractor.version)
+            return np.asarray(X, dtype=np.float64), y.astype(str)
+
+        import pandas as pd
+
+        df = pd.read_csv(data_path)
+        return df.drop('label', axis=1).to_numpy(dtype=np.float64), df['label'].to_numpy(dtype=str)
+
     def load_model(self):
-        if os.path.exists(self.model_path):
+        """
+        Load the model artifact if present (memory-mapped, no sklearn import),
+        else the pickled model. Raises ModelVersionError if the artifact was
+        trained on a FeatureExtractor version that no longer exists.
+        """
+        if ModelArtifact.exists(self.artifact_path):
+            version = ModelArtifact.read_manifest(self.artifact_path).get("feature_version")
+            if version not in FeatureExtractor.NUM_FEATURES_BY_VERSION:
+                version = FeatureExtractor.FEATURE_VERSION # let load() report the mismatch
+            self.engine = ModelArtifact.load(self.artifact_path, feature_version=version,
+                                             num_features=FeatureExtractor.NUM_FEATURES_BY_VERSION[version])
+            self.model = self.engine
+            self.feature_version = version
+        elif os.path.exists(self.model_path):
             with open(self.model_path, 'rb') as f:
                 self.model = pickle.load(f)
+            self.build_engine()
+            self._infer_feature_version()
         else:
             print("Model not found. Please train first.")
 
+    @classmethod
+    def from_model(cls, model):
+        """Wrap an already fitted model without touching the model file"""
+        classifier = cls.__new__(cls)
+        classifier.model_path = None
+        classifier.artifact_path = None
+        classifier.max_per_class = None
+        classifier.user = None
+        classifier.user_layers = {}
+        classifier.cache = None
+        classifier.model = model
+        classifier.build_engine()
+        classifier.feature_version = FeatureExtractor.FEATURE_VERSION
+        classifier._infer_feature_version()
+        return classifier
+
+    def _infer_feature_version(self):
+        # Pickled models do not record their feature version; their input width tells
+        # (learn() turns the model into a KNNEngine, which is pickled as it is)
+        if isinstance(self.model, KNNEngine):
+            num_features = self.model.num_features
+        else:
+            num_features = getattr(self.model, "n_features_in_", None)
+        version = FeatureExtractor.version_for(num_features)
+        if version is not None:
+            self.feature_version = version
+
+    def feature_extractor(self):
+        """A FeatureExtractor producing the features this model expects"""
+        return FeatureExtractor(self.feature_version)
+
+    def build_engine(self):
+        """Compile the fitted model into a KNNEngine for fast per-frame inference"""
+        if isinstance(self.model, KNNEngine):
+            self.engine = self.model
+            return
+
+        from sklearn.neighbors import KNeighborsClassifier
+
+        if isinstance(self.model, KNeighborsClassifier):
+            self.engine = KNNEngine.from_sklearn(self.model)
+        else:
+            self.engine = None
+
+    @staticmethod
+    def user_store_path(user):
+        return os.path.join(USER_STORE_ROOT, user)
+
+    def learn(self, features, labels, user=None, landmarks=None, handedness=None, persist=True):
+        """
+        Add labelled samples to the live model without retraining.
+
+        features: (N, F) feature vectors; labels: N sign names (new signs are added).
+        user: add to that user's personal layer instead of the shared model.
+        persist: also append the samples (and optional raw landmarks/handedness
+        codes) to the dataset store - the shared store, or the user's store.
+        The shared model's artifact is only rewritten by save_model().
+        Returns the number of samples added.
+        """
+        features = np.asarray(features, dtype=np.float64).reshape(len(labels), -1)
+        if self.model is None:
+            classes = np.unique(np.asarray(labels, dtype=str))
+            self.model = self.engine = KNNEngine(np.empty((0, features.shape[1])), [], classes)
+            self._infer_feature_version()
+        elif self.engine is None:
+            print("Incremental learning needs a KNN model. Retrain with classifier.py instead.")
+            return 0
+        # The engine is now the model; a refit sklearn model would lose these samples
+        self.model = self.engine
+
+        if user is None:
+            engine = self.engine
+        else:
+            engine = self.user_layers.get(user)
+            if engine is None:
+                engine = self._new_layer()
+                self.user_layers[user] = engine
+            # Predictions are reported in the shared model's classes
+            for label in np.unique(np.asarray(labels, dtype=str)):
+                self.engine.class_index(label)
+        engine.max_per_class = self.max_per_class
+        engine.add(features, labels)
+        if self.cache is not None:
+            self.cache.clear()
+
+        if persist:
+            store = DatasetStore(DEFAULT_STORE_PATH if user is None else self.user_store_path(user))
+            store.append_chunk(list(labels), features=features, landmarks=landmarks, handedness=handedness,
+                               feature_version=self.feature_version)
+        return len(labels)
+
+    def load_user(self, user):
+        """
+        Make `user` the active user: their personal samples (from their dataset
+        store, if any) are searched together with the shared model on predict.
+        """
+        self.user = user
+        if user is None or user in self.user_layers or self.engine is None:
+            return
+        path = self.user_store_path(user)
+        if not DatasetStore.exists(path):
+            return
+
+        store = DatasetStore(path)
+        store.materialize_features(self.feature_extractor(), verbose=False)
+        X, y = store.load(mmap=False, feature_version=self.feature_version)
+        layer = self._new_layer()
+        layer.max_per_class = self.max_per_class
+        for label in np.unique(y.astype(str)):
+            self.engine.class_index(label)
+        layer.add(X, y.astype(str))
+        self.user_layers[user] = layer
+        print(f"Loaded {len(layer.reference)} personal samples for {user}")
+
+    def _new_layer(self):
+        # Empty engine sharing the shared model's KNN settings
+        return KNNEngine(np.empty((0, self.engine.num_features)), [], np.asarray([], dtype=str),
+                         n_neighbors=self.engine.k, weights=self.engine.weights,
+                         metric=self.engine.metric, p=self.engine.p)
+
+    def enable_cache(self, granularity=0.5, max_entries=4096, min_agreement=0.98, variance=0.9):
+        """
+        Memoize predict() on quantized feature vectors (see prediction_cache.py).
+        For KNN models the key is the principal components explaining `variance`
+        of the reference set, each quantized at granularity times its standard
+        deviation (an absolute step on the raw features for other models).
+        min_agreement: label agreement with the uncached path below which the
+        step is refined while running.
+        """
+        from prediction_cache import PredictionCache
+
+        if self.engine is not None and len(self.engine.reference):
+            self.cache = PredictionCache.from_reference(self.engine.reference, granularity, variance,
+                                                        max_entries=max_entries, min_agreement=min_agreement)
+        else:
+            self.cache = PredictionCache(granularity, max_entries, min_agreement)
+
     def predict(self, features):
         if self.model is None:
             return None, 0.0
-        
+        if self.cache is not None:
+            # The active user's samples change the answer, so each user has their own entries
+            return self.cache.predict(features, self._predict, self.user)
+        return self._predict(features)
+
+    def _predict(self, features):
+        if self.engine is not None:
+            return self.engine.predict(features, self.user_layers.get(self.user))
+
         # Reshape features to 2D array
         features = np.array(features).reshape(1, -1)
-        
-        prediction = self.model.predict(features)[0]
-        probabilities = self.model.predict_proba(features)
-        confidence = np.max(probabilities)
-        
-        return prediction, confidence
+
+        # The label is the argmax of the probabilities, so one call answers both
+        probabilities = self.model.predict_proba(features)[0]
+        best = np.argmax(probabilities)
+        return self.model.classes_[best], probabilities[best]
+
+    def predict_batch(self, rows):
+        """
+        Classify an (N, F) batch of feature vectors in one call.
+        Returns (labels, confidences) arrays.
+        """
+        if self.model is None:
+            return np.full(len(rows), None, dtype=object), np.zeros(len(rows))
+
+        if self.engine is not None:
+            return self.engine.predict_batch(rows, self.user_layers.get(self.user))
+
+        probabilities = self.model.predict_proba(np.asarray(rows, dtype=np.float64))
+        best = np.argmax(probabilities, axis=1)
+        return self.model.classes_[best], probabilities[np.arange(len(best)), best]
 
 if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the sign classifier")
+    parser.add_argument("--data", default=None, help="Dataset store directory or CSV (default: ../data/dataset)")
+    parser.add_argument("--condense", choices=("kmeans", "cnn"), default=None,
+                        help="Shrink the KNN reference set: per-class k-means prototypes or condensed nearest neighbor")
+    parser.add_argument("--prototypes-per-class", type=int, default=None,
+                        help="Prototypes kept per sign with --condense kmeans")
+    parser.add_argument("--max-accuracy-loss", type=float, default=None,
+                        help="Largest held-out accuracy drop (e.g. 0.01) accepted from condensing")
+    parser.add_argument("--features", type=int, choices=sorted(FeatureExtractor.NUM_FEATURES_BY_VERSION),
+                        default=None, help="Feature set version to train on (default: the current one)")
+    args = parser.parse_args()
+    if args.condense == "kmeans" and args.prototypes_per_class is None and args.max_accuracy_loss is None:
+        parser.error("--condense kmeans needs --prototypes-per-class and/or --max-accuracy-loss")
+
     classifier = SignClassifier()
-    classifier.train_model()
+    classifier.train_model(args.data, args.condense, args.prototypes_per_class, args.max_accuracy_loss, args.features)
@@ -1,4 +1,5 @@
 import os
+import shutil
 
 def clear_dataset():
     """
@@ -6,7 +7,10 @@ def clear_dataset():
     """
     data_dir = "../data"
     dataset_path = os.path.join(data_dir, "dataset.csv")
+    store_path = os.path.join(data_dir, "dataset")
     model_path = os.path.join(data_dir, "model.pkl")
+    artifact_path = os.path.join(data_dir, "model")
+    users_path = os.path.join(data_dir, "users")
     
     files_deleted = []
     
@@ -18,6 +22,14 @@ def clear_dataset():
     else:
         print(f"⚠ {dataset_path} not found (already clean)")
     
+    # Delete binary dataset store
+    if os.path.exists(store_path):
+        shutil.rmtree(store_path)
+        files_deleted.append("dataset/")
+        print(f"✓ Deleted {store_path}")
+    else:
+        print(f"⚠ {store_path} not found (already clean)")
+    
     # Delete model.pkl
     if os.path.exists(model_path):
         os.remove(model_path)
@@ -26,6 +38,18 @@ def clear_dataset():
     else:
         print(f"⚠ {model_path} not found (already clean)")
     
+    # Delete model artifact directory
+    if os.path.exists(artifact_path):
+        shutil.rmtree(artifact_path)
+        files_deleted.append("model/")
+        print(f"✓ Deleted {artifact_path}")
+    
+    # Delete personal sample stores
+    if os.path.exists(users_path):
+        shutil.rmtree(users_path)
+        files_deleted.append("users/")
+        print(f"✓ Deleted {users_path}")
+    
     if files_deleted:
         print(f"\n✅ Cleared {len(files_deleted)} file(s). You can now run data_collector.py to collect fresh data.")
     else:
@@ -37,7 +61,9 @@ if __name__ == "__main__":
     print("=" * 50)
     print("This will delete:")
     print("  - data/dataset.csv (training data)")
-    print("  - data/model.pkl (trained model)")
+    print("  - data/dataset/ (training data store)")
+    print("  - data/model.pkl, data/model/ (trained model)")
+    print("  - data/users/ (personal samples)")
     print()
     
     confirm = input("Are you sure? (yes/no): ").strip().lower()
@@ -0,0 +1,173 @@
+import numpy as np
+from knn_engine import KNNEngine
+
+# Shrinks the KNN reference set before it is saved: collected sessions hold
+# many near-duplicate frames per sign, and predict cost and model size grow
+# with every stored row.
+
+
+def kmeans_prototypes(X, y, per_class, seed=42):
+    """
+    Replace each class's samples by `per_class` k-means centroids.
+    Classes with no more than `per_class` samples are kept as they are.
+    Returns (prototypes, prototype_labels).
+    """
+    from sklearn.cluster import KMeans
+
+    prototypes = []
+    labels = []
+    for label in np.unique(y):
+        members = X[y == label]
+        if len(members) > per_class:
+            members = KMeans(n_clusters=per_class, n_init=1, random_state=seed).fit(members).cluster_centers_
+        prototypes.append(members)
+        labels.append(np.full(len(members), label))
+    return np.concatenate(prototypes), np.concatenate(labels)
+
+
+def condensed_nearest_neighbor(X, y, n_neighbors=1, seed=42, chunk_size=256):
+    """
+    Hart's condensed nearest neighbor, generalised to k neighbors: keep only
+    the samples that the kept set misclassifies, until a full pass adds
+    nothing. Samples are checked in chunks against the growing set
+    (KNNEngine.add) rather than one at a time.
+    Returns (prototypes, prototype_labels).
+    """
+    order = np.random.default_rng(seed).permutation(len(X))
+    # Seed with n_neighbors samples per class so no class starts outvoted
+    kept = np.zeros(len(X), dtype=bool)
+    for label in np.unique(y):
+        kept[order[y[order] == label][:n_neighbors]] = True
+    engine = KNNEngine(np.empty((0, X.shape[1])), [], np.asarray([], dtype=y.dtype), n_neighbors=n_neighbors)
+    engine.add(X[kept], y[kept])
+
+    changed = True
+    while changed:
+        changed = False
+        for start in range(0, len(order), chunk_size):
+            chunk = order[start:start + chunk_size]
+            chunk = chunk[~kept[chunk]]
+            if not len(chunk):
+                continue
+            wrong = chunk[engine.predict_batch(X[chunk])[0] != y[chunk]]
+            if len(wrong):
+                kept[wrong] = True
+                engine.add(X[wrong], y[wrong])
+                changed = True
+    return X[kept], y[kept]
+
+
+def condense(X, y, method="kmeans", per_class=None, n_neighbors=1, seed=42):
+    """Condensed (prototypes, labels) for the reference set X, y"""
+    if method == "kmeans":
+        if per_class is None:
+            raise ValueError("kmeans condensation needs per_class")
+        return kmeans_prototypes(X, y, per_class, seed)
+    if method == "cnn":
+        return condensed_nearest_neighbor(X, y, n_neighbors, seed)
+    raise ValueError(f"Unknown condensation method: {method}")
+
+
+def _fit(model, X, y):
+    from sklearn.base import clone
+
+    return clone(model).fit(X, y)
+
+
+def evaluate(model, X_test, y_test):
+    """Held-out accuracy, reference memory and per-sample latency of a fitted KNN model"""
+    from model_search import measure_latency
+
+    return {
+        "references": int(len(model._fit_X)),
+        "memory_bytes": int(model._fit_X.nbytes),
+        "accuracy": float(np.mean(model.predict(X_test) == y_test)),
+        "latency_us": measure_latency(model, X_test),
+    }
+
+
+def select_condensation(model, X, y, method="kmeans", per_class=None, max_accuracy_loss=0.0,
+                        validation_size=0.2, seed=42):
+    """
+    Choose the condensation on a validation split of the training data X, y:
+    with per_class None, kmeans tries doubling prototype counts from
+    n_neighbors upwards and takes the smallest whose validation accuracy is
+    within max_accuracy_loss of the full model's; otherwise the given
+    setting is checked against the tolerance.
+    Returns (per_class, accepted, validation report); accepted is False when
+    no setting is within the tolerance and the full model should be kept.
+    """
+    from sklearn.model_selection import train_test_split
+
+    counts = np.unique(y, return_counts=True)[1]
+    stratify = y if counts.min() >= 2 and len(y) * validation_size >= len(counts) else None
+    X_fit, X_val, y_fit, y_val = train_test_split(X, y, test_size=validation_size, random_state=seed,
+                                                  stratify=stratify)
+    full = _fit(model, X_fit, y_fit)
+    baseline = float(np.mean(full.predict(X_val) == y_val))
+    report = {"samples": len(X_val), "full_accuracy": baseline, "condensed_accuracy": None}
+
+    def accepts(per_class):
+        candidate = _fit(model, *condense(X_fit, y_fit, method, per_class, full.n_neighbors, seed))
+        report["condensed_accuracy"] = float(np.mean(candidate.predict(X_val) == y_val))
+        return baseline - report["condensed_accuracy"] <= max_accuracy_loss
+
+    if method == "kmeans" and per_class is None:
+        largest = np.unique(y_fit, return_counts=True)[1].max()
+        per_class = full.n_neighbors
+        while per_class < largest:
+            if accepts(per_class):
+                return per_class, True, report
+            per_class *= 2
+        return None, False, report
+    return per_class, accepts(per_class), report
+
+
+def condense_model(model, X_train, y_train, X_test, y_test, method="kmeans", per_class=None,
+                   max_accuracy_loss=None, seed=42):
+    """
+    Refit the (unfitted or fitted) sklearn KNN `model` on a condensed reference set.
+
+    With per_class, kmeans keeps that many prototypes per class. With
+    max_accuracy_loss, the setting is chosen on a validation split of the
+    training data (see select_condensation), and the full model is kept if
+    none is within the tolerance. The chosen setting is then refit on all of
+    X_train; X_test is only used for the final comparison.
+    Returns (model, report) where report compares "full" and "condensed".
+    """
+    if method == "kmeans" and per_class is None and max_accuracy_loss is None:
+        raise ValueError("Give per_class and/or max_accuracy_loss")
+    full = _fit(model, X_train, y_train)
+    report = {"method": method, "full": evaluate(full, X_test, y_test)}
+
+    accepted = True
+    if max_accuracy_loss is not None:
+        per_class, accepted, report["validation"] = select_condensation(
+            model, X_train, y_train, method, per_class, max_accuracy_loss, seed=seed)
+    if accepted:
+        candidate = _fit(model, *condense(X_train, y_train, method, per_class, full.n_neighbors, seed))
+        result = evaluate(candidate, X_test, y_test)
+    else:
+        candidate, result = full, report["full"]
+
+    report["per_class"] = per_class if method == "kmeans" and accepted else None
+    report["condensed"] = result
+    report["accuracy_delta"] = result["accuracy"] - report["full"]["accuracy"]
+    return candidate, report
+
+
+def print_report(report):
+    full, condensed = report["full"], report["condensed"]
+    print(f"Condensation ({report['method']}"
+          + (f", {report['per_class']} per class" if report.get("per_class") else "") + "):")
+    print(f"  {'':<12}{'full':>12}{'condensed':>12}")
+    print(f"  {'references':<12}{full['references']:>12}{condensed['references']:>12}")
+    print(f"  {'memory (KB)':<12}{full['memory_bytes'] / 1024:>12.1f}{condensed['memory_bytes'] / 1024:>12.1f}")
+    print(f"  {'latency (us)':<12}{full['latency_us']:>12.1f}{condensed['latency_us']:>12.1f}")
+    print(f"  {'accuracy':<12}{full['accuracy'] * 100:>11.2f}%{condensed['accuracy'] * 100:>11.2f}%")
+    print(f"  accuracy delta: {report['accuracy_delta'] * 100:+.2f} points, "
+          f"{full['memory_bytes'] / max(condensed['memory_bytes'], 1):.1f}x smaller")
+    validation = report.get("validation")
+    if validation and validation["condensed_accuracy"] is not None:
+        print(f"  chosen on {validation['samples']} validation samples: {validation['full_accuracy'] * 100:.2f}% full, "
+              f"{validation['condensed_accuracy'] * 100:.2f}% condensed")
@@ -1,29 +1,64 @@
-import cv2
-import csv
+import argparse
 import os
 import time
-from hand_detector import HandDetector
-from feature_extractor import FeatureExtractor
+import numpy as np
+from startup_profiler import StartupProfiler
 
-def collect_data():
-    detector = HandDetector(detection_con=0.8)
-    extractor = FeatureExtractor()
+# Started before the heavy imports so --profile-startup covers them
+startup = StartupProfiler()
+
+with startup.stage("import cv2"):
+    import cv2
+with startup.stage("import app modules"):
+    from feature_extractor import FeatureExtractor
+    from dataset_store import DatasetStore, HANDEDNESS_CODES, HANDEDNESS_UNKNOWN
+    from pipeline import open_source
+
+def collect_data(source=0, profile_startup=False, user=None, learn=False, target_fps=None):
+    """
+    user: record into that user's personal store (used by main.py --user)
+    learn: add each recorded sign to the shared model right away and save it,
+    instead of retraining with classifier.py
+    target_fps: let a Governor lower detection quality to keep up with this frame rate
+    """
+    with startup.stage("import mediapipe"):
+        import mediapipe
+        from hand_detector import HandDetector
+    with startup.stage("build MediaPipe graph"):
+        detector = HandDetector(detection_con=0.8)
+    governor = None
+    if target_fps:
+        from governor import Governor
+
+        governor = Governor(detector, target_fps)
+    frame_id = 0
     
     # Define signs to record - reduced set for easier learning
     signs = ['A', 'B', 'C', 'D', 'L']
+    samples_per_sign = 50
     
     data_dir = "../data"
     if not os.path.exists(data_dir):
         os.makedirs(data_dir)
         
-    dataset_path = os.path.join(data_dir, "dataset.csv")
+    classifier = None
+    learned = 0 # samples added to the live model; it is only saved if this is nonzero
+    if learn and user is None:
+        with startup.stage("load model"):
+            from classifier import SignClassifier
+            classifier = SignClassifier()
+    # Samples learned into the model must use its feature set
+    extractor = classifier.feature_extractor() if classifier is not None else FeatureExtractor()
     
-    # Check if header needs to be written
-    write_header = not os.path.exists(dataset_path)
+    # Samples are buffered and written to the store in chunks
+    if user is None:
+        store = DatasetStore(os.path.join(data_dir, "dataset"))
+    else:
+        store = DatasetStore(os.path.join(data_dir, "users", user))
+    writer = store.writer(chunk_size=samples_per_sign, feature_version=extractor.version)
     
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    with startup.stage("open camera"):
+        cap = open_source(source)
     
     print("Sign Language Data Collector")
     print("----------------------------")
@@ -33,7 +68,6 @@ def collect_data():
     print("Press 'q' to quit.")
     
     current_sign_idx = 0
-    samples_per_sign = 50
     
     while current_sign_idx < len(signs):
         target_sign = signs[current_sign_idx]
@@ -41,14 +75,20 @@ def collect_data():
         
         recording = False
         sample_count = 0
+        sign_features = []
         
         while True:
             success, img = cap.read()
             if not success:
                 break
+            frame_time = time.perf_counter()
                 
-            img = detector.find_hands(img)
-            lm_list = detector.find_position(img, draw=False)
+            lm_list = []
+            # Skipped frames record no sample rather than repeating the last one
+            if governor is None or governor.should_process(frame_id):
+                img = detector.find_hands(img)
+                lm_list = detector.find_position(img, draw=False)
+            frame_id += 1
             
             # UI Overlay
             cv2.putText(img, f"Target: {target_sign}", (10, 50), 
@@ -59,22 +99,22 @@ def collect_data():
                             cv2.FONT_HERSHEY_PLAIN, 2, (0, 0, 255), 2)
                 
                 if len(lm_list) != 0:
-                    features = extractor.extract_features(lm_list)
-                    if features:
-                        # Append label and features to CSV
-                        with open(dataset_path, 'a', newline='') as f:
-                            writer = csv.writer(f)
-                            if write_header:
-                                # Create header: label, f0, f1, ...
-                                header = ['label'] + [f'f{i}' for i in range(len(features))]
-                                writer.writerow(header)
-                                write_header = False
-                            
-                            writer.writerow([target_sign] + features)
-                            
+                    # Keep the raw landmarks too, so features can be recomputed later
+                    landmarks, handedness = detector.find_raw_landmarks(img)
+                    if landmarks is not None:
+                        code = HANDEDNESS_CODES.get(handedness, HANDEDNESS_UNKNOWN)
+                        features = extractor.extract_features_batch(landmarks[np.newaxis], [code])[0].tolist()
+                        writer.append(target_sign, features, landmarks, handedness)
+                        sign_features.append(features)
+                        
                         sample_count += 1
                         if sample_count >= samples_per_sign:
                             recording = False
+                            writer.flush()
+                            if classifier is not None:
+                                # Already in the store, so only the live model is updated
+                                learned += classifier.learn(sign_features, [target_sign] * len(sign_features),
+                                                            persist=False)
                             print(f"Finished recording {target_sign}")
                             current_sign_idx += 1
                             break # Break inner loop to move to next sign
@@ -88,21 +128,41 @@ def collect_data():
 
             cv2.imshow("Data Collector", img)
             key = cv2.waitKey(1)
+            if governor is not None:
+                governor.update(time.perf_counter() - frame_time)
+            if startup.first_frame is None:
+                startup.mark_first_frame()
+                if profile_startup:
+                    startup.report()
             
             if key == ord('q'):
-                cap.release()
-                cv2.destroyAllWindows()
-                return
+                # Leave both loops, so signs learned so far are still saved below
+                current_sign_idx = len(signs)
+                break
             elif key == ord('r'):
                 recording = True
                 sample_count = 0
+                sign_features = []
             elif key == ord('n'):
                 current_sign_idx += 1
                 break
 
+    writer.close()
     cap.release()
     cv2.destroyAllWindows()
-    print("Data collection complete!")
+    print(f"Data collection complete! {store.num_rows} samples in {store.path}")
+    if learned:
+        classifier.save_model()
 
 if __name__ == "__main__":
-    collect_data()
+    parser = argparse.ArgumentParser(description="Sign Language Data Collector")
+    parser.add_argument("--source", default="0", help="Camera index or path to a video file")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import/initialization timing breakdown and time to first frame")
+    parser.add_argument("--user", help="Record personal samples for this user instead of the shared dataset")
+    parser.add_argument("--learn", action="store_true",
+                        help="Add recorded signs to the shared model without retraining")
+    parser.add_argument("--target-fps", type=float, default=None,
+                        help="Reduce detection resolution/model/rate as needed to keep up with this frame rate")
+    args = parser.parse_args()
+    collect_data(args.source, args.profile_startup, args.user, args.learn, args.target_fps)
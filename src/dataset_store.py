@@ -0,0 +1,401 @@
+import argparse
+import csv
+import json
+import os
+import numpy as np
+
+DEFAULT_STORE_PATH = "../data/dataset"
+
+# Handedness as reported by MediaPipe, stored as int8
+HANDEDNESS_CODES = {"Right": 0, "Left": 1}
+HANDEDNESS_UNKNOWN = -1
+
+
+class DatasetStore:
+    """
+    Appendable columnar dataset on disk.
+
+    Rows are stored in chunks; each chunk is a set of .npy files that can be
+    memory-mapped:
+    - labels: int16 label codes
+    - landmarks: float32 (N, 21, 3) raw hand landmarks in pixel units (x, y, z),
+      plus int8 handedness codes (optional, absent for imported CSVs)
+    - features: float32 (N, F) derived features, a cache tagged with the
+      FeatureExtractor version that produced it
+    manifest.json lists the chunks and maps label codes to label names.
+    """
+
+    MANIFEST = "manifest.json"
+    FORMAT_VERSION = 2
+
+    def __init__(self, path=DEFAULT_STORE_PATH):
+        self.path = path
+        self.manifest = {
+            "format_version": self.FORMAT_VERSION,
+            "label_names": [],
+            "chunks": [],
+            "next_chunk": 0,
+        }
+        if os.path.exists(self._manifest_path()):
+            with open(self._manifest_path()) as f:
+                self.manifest = json.load(f)
+            if self.manifest.get("format_version", 1) < 2:
+                self._upgrade_v1()
+            if "next_chunk" not in self.manifest:
+                # Stores written before the counter was recorded continue after their highest chunk
+                self.manifest["next_chunk"] = max(
+                    (int(chunk["name"].rsplit("_", 1)[1]) + 1 for chunk in self.chunks), default=0)
+
+    def _upgrade_v1(self):
+        # Version 1 stores had features only, produced by FeatureExtractor version 1
+        for chunk in self.manifest["chunks"]:
+            chunk.setdefault("feature_version", 1)
+            chunk.setdefault("num_features", self.manifest.get("num_features"))
+            chunk.setdefault("has_landmarks", False)
+        self.manifest.pop("num_features", None)
+        self.manifest["format_version"] = self.FORMAT_VERSION
+
+    @staticmethod
+    def exists(path=DEFAULT_STORE_PATH):
+        return os.path.exists(os.path.join(path, DatasetStore.MANIFEST))
+
+    def _manifest_path(self):
+        return os.path.join(self.path, self.MANIFEST)
+
+    def _chunk_path(self, name, column):
+        return os.path.join(self.path, f"{name}_{column}.npy")
+
+    def _save_manifest(self):
+        os.makedirs(self.path, exist_ok=True)
+        # Write-then-rename so a crash never leaves a half-written manifest
+        tmp_path = self._manifest_path() + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.manifest, f, indent=2)
+        os.replace(tmp_path, self._manifest_path())
+
+    @property
+    def chunks(self):
+        return self.manifest["chunks"]
+
+    @property
+    def num_rows(self):
+        return sum(chunk["rows"] for chunk in self.chunks)
+
+    @property
+    def num_features(self):
+        """Feature width of the first chunk (all chunks share it once materialized)"""
+        return self.chunks[0]["num_features"] if self.chunks else None
+
+    @property
+    def label_names(self):
+        return list(self.manifest["label_names"])
+
+    def label_code(self, label):
+        """Integer code for a label, registering it if new"""
+        names = self.manifest["label_names"]
+        if label not in names:
+            names.append(label)
+        return names.index(label)
+
+    def append_chunk(self, labels, features=None, landmarks=None, handedness=None, feature_version=None):
+        """
+        Write one chunk of rows.
+        labels: sequence of N label names
+        features: (N, F) features produced by FeatureExtractor `feature_version`
+        landmarks: (N, 21, 3) raw landmarks; handedness: N codes (HANDEDNESS_CODES)
+        At least one of features / landmarks is required.
+        """
+        if features is None and landmarks is None:
+            raise ValueError("A chunk needs features, landmarks or both")
+
+        name = self._new_chunk_name()
+        entry = {"name": name, "rows": len(labels), "has_landmarks": landmarks is not None,
+                 "feature_version": None, "num_features": None}
+
+        if features is not None:
+            features = np.ascontiguousarray(features, dtype=np.float32)
+            if features.ndim != 2 or len(features) != len(labels):
+                raise ValueError("features must be (N, F) with one label per row")
+            entry["feature_version"] = feature_version
+            entry["num_features"] = features.shape[1]
+        if landmarks is not None:
+            landmarks = np.ascontiguousarray(landmarks, dtype=np.float32)
+            if landmarks.shape != (len(labels), 21, 3):
+                raise ValueError(f"landmarks must be (N, 21, 3), got {landmarks.shape}")
+            if handedness is None:
+                handedness = np.full(len(labels), HANDEDNESS_UNKNOWN)
+            handedness = np.asarray(handedness, dtype=np.int8)
+
+        codes = np.array([self.label_code(label) for label in labels], dtype=np.int16)
+        os.makedirs(self.path, exist_ok=True)
+        np.save(self._chunk_path(name, "labels"), codes)
+        if features is not None:
+            np.save(self._chunk_path(name, "features"), features)
+        if landmarks is not None:
+            np.save(self._chunk_path(name, "landmarks"), landmarks)
+            np.save(self._chunk_path(name, "handedness"), handedness)
+
+        self.chunks.append(entry)
+        self._save_manifest()
+
+    def _new_chunk_name(self):
+        # Never reused: compact() removes chunks, so the chunk count is not a free index
+        index = self.manifest["next_chunk"]
+        self.manifest["next_chunk"] = index + 1
+        return f"chunk_{index:05d}"
+
+    def read_column(self, chunk, column, mmap=True):
+        return np.load(self._chunk_path(chunk["name"], column), mmap_mode="r" if mmap else None)
+
+    def iter_chunks(self, mmap=True, feature_version=None):
+        """
+        Yield (features, label_codes) per chunk, memory-mapped by default.
+        With feature_version, chunks whose cached features are from another version are skipped.
+        """
+        for chunk in self.chunks:
+            if chunk["feature_version"] is None:
+                continue
+            if feature_version is not None and chunk["feature_version"] != feature_version:
+                continue
+            yield self.read_column(chunk, "features", mmap), self.read_column(chunk, "labels", mmap)
+
+    def iter_landmarks(self, mmap=True):
+        """Yield (landmarks, handedness, label_codes) for every chunk that has raw landmarks"""
+        for chunk in self.chunks:
+            if chunk["has_landmarks"]:
+                yield (self.read_column(chunk, "landmarks", mmap),
+                       self.read_column(chunk, "handedness", mmap),
+                       self.read_column(chunk, "labels", mmap))
+
+    def load(self, mmap=True, feature_version=None):
+        """
+        Return (features, labels) for the whole store.
+        With feature_version, only rows whose cached features match it are returned
+        (see materialize_features). A single-chunk store is returned memory-mapped
+        without copying; run compact() to get there after many appends.
+        """
+        chunks = list(self.iter_chunks(mmap=mmap, feature_version=feature_version))
+        if not chunks:
+            return np.empty((0, self.num_features or 0), dtype=np.float32), np.empty(0, dtype=object)
+        if len(chunks) == 1:
+            features, codes = chunks[0]
+        else:
+            features = np.concatenate([c[0] for c in chunks])
+            codes = np.concatenate([c[1] for c in chunks])
+        return features, np.asarray(self.manifest["label_names"], dtype=object)[codes]
+
+    def load_landmarks(self, mmap=True):
+        """Return (landmarks, handedness, labels) for all rows that have raw landmarks"""
+        chunks = list(self.iter_landmarks(mmap=mmap))
+        if not chunks:
+            return (np.empty((0, 21, 3), dtype=np.float32), np.empty(0, dtype=np.int8),
+                    np.empty(0, dtype=object))
+        landmarks, handedness, codes = (np.concatenate(column) if len(chunks) > 1 else column[0]
+                                        for column in zip(*chunks))
+        return landmarks, handedness, np.asarray(self.manifest["label_names"], dtype=object)[codes]
+
+    def rows_with_features(self, feature_version):
+        """Rows that have, or can compute (from raw landmarks), features of feature_version"""
+        return sum(chunk["rows"] for chunk in self.chunks
+                   if chunk["has_landmarks"] or chunk["feature_version"] == feature_version)
+
+    def stale_chunks(self, feature_version):
+        """Chunks whose cached features were not produced by feature_version"""
+        return [chunk for chunk in self.chunks if chunk["feature_version"] != feature_version]
+
+    def materialize_features(self, extractor, verbose=True):
+        """
+        Recompute cached features from raw landmarks with `extractor`,
+        only for chunks whose feature version is stale. Chunks without raw
+        landmarks cannot be recomputed and are left out of load(feature_version=...).
+        Returns (rows_recomputed, rows_unavailable).
+        """
+        version = extractor.version
+        recomputed = unavailable = 0
+        for chunk in self.stale_chunks(version):
+            if not chunk["has_landmarks"]:
+                unavailable += chunk["rows"]
+                continue
+            landmarks = self.read_column(chunk, "landmarks")
+            handedness = self.read_column(chunk, "handedness")
+            features = extractor.extract_features_batch(landmarks, handedness).astype(np.float32)
+            np.save(self._chunk_path(chunk["name"], "features"), features)
+            chunk["feature_version"] = version
+            chunk["num_features"] = features.shape[1]
+            recomputed += chunk["rows"]
+
+        if recomputed:
+            self._save_manifest()
+        if verbose and (recomputed or unavailable):
+            print(f"Features v{version}: recomputed {recomputed} rows"
+                  + (f", {unavailable} rows have no raw landmarks and were skipped" if unavailable else ""))
+        return recomputed, unavailable
+
+    def compact(self):
+        """
+        Merge chunks so the store can be memory-mapped from as few files as possible.
+        Chunks are grouped by feature version and whether they carry raw landmarks.
+        """
+        groups = {}
+        for chunk in self.chunks:
+            groups.setdefault((chunk["feature_version"], chunk["has_landmarks"]), []).append(chunk)
+        if all(len(group) == 1 for group in groups.values()):
+            return
+
+        old_chunks = self.chunks
+        self.manifest["chunks"] = []
+        for (version, has_landmarks), group in groups.items():
+            columns = ["labels"]
+            if version is not None:
+                columns.append("features")
+            if has_landmarks:
+                columns += ["landmarks", "handedness"]
+            merged = {column: np.concatenate([self.read_column(c, column, mmap=False) for c in group])
+                      for column in columns}
+
+            name = self._new_chunk_name()
+            for column, values in merged.items():
+                np.save(self._chunk_path(name, column), values)
+            self.chunks.append({"name": name, "rows": len(merged["labels"]),
+                                "has_landmarks": has_landmarks, "feature_version": version,
+                                "num_features": group[0]["num_features"]})
+        self._save_manifest()
+
+        for chunk in old_chunks:
+            for column in ("labels", "features", "landmarks", "handedness"):
+                path = self._chunk_path(chunk["name"], column)
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def writer(self, chunk_size=1024, feature_version=None):
+        return DatasetWriter(self, chunk_size, feature_version)
+
+
+class DatasetWriter:
+    """
+    Buffers rows in memory and writes them to a DatasetStore in chunks.
+    Call flush() (or use as a context manager) to persist a partial chunk.
+    Within a chunk, rows must consistently provide features and/or landmarks.
+    """
+
+    def __init__(self, store, chunk_size=1024, feature_version=None):
+        self.store = store
+        self.chunk_size = chunk_size
+        self.feature_version = feature_version
+        self.labels = []
+        self.features = []
+        self.landmarks = []
+        self.handedness = []
+
+    def append(self, label, features=None, landmarks=None, handedness=None):
+        """
+        Buffer one row. landmarks: (21, 3) raw landmarks, handedness: "Left"/"Right"
+        """
+        if self.labels and ((features is None) != (not self.features)
+                            or (landmarks is None) != (not self.landmarks)):
+            raise ValueError("Rows in a chunk must all provide the same columns")
+        self.labels.append(label)
+        if features is not None:
+            self.features.append(features)
+        if landmarks is not None:
+            self.landmarks.append(landmarks)
+            self.handedness.append(HANDEDNESS_CODES.get(handedness, HANDEDNESS_UNKNOWN))
+        if len(self.labels) >= self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if self.labels:
+            self.store.append_chunk(
+                self.labels,
+                features=np.asarray(self.features, dtype=np.float32) if self.features else None,
+                landmarks=np.asarray(self.landmarks, dtype=np.float32) if self.landmarks else None,
+                handedness=self.handedness if self.landmarks else None,
+                feature_version=self.feature_version)
+            self.labels = []
+            self.features = []
+            self.landmarks = []
+            self.handedness = []
+
+    def close(self):
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+
+def import_csv(csv_path, store_path=DEFAULT_STORE_PATH, chunk_size=65536, feature_version=1):
+    """
+    Append the rows of a data_collector CSV (label, f0, f1, ...) to a store.
+    CSVs only hold derived features (FeatureExtractor version 1 by default), no raw landmarks.
+    """
+    store = DatasetStore(store_path)
+    with open(csv_path, newline="") as f, store.writer(chunk_size, feature_version) as writer:
+        reader = csv.reader(f)
+        next(reader)  # header
+        for row in reader:
+            if row:
+                writer.append(row[0], features=[float(v) for v in row[1:]])
+    return store
+
+
+def export_csv(store_path=DEFAULT_STORE_PATH, csv_path="dataset.csv", feature_version=None):
+    """Write a store's features back out in the data_collector CSV format"""
+    store = DatasetStore(store_path)
+    versions = {chunk["feature_version"] for chunk in store.chunks if chunk["feature_version"] is not None}
+    if feature_version is None:
+        if len(versions) > 1:
+            raise ValueError(f"Store mixes feature versions {sorted(versions)}; "
+                             "pass feature_version or materialize features first")
+        feature_version = versions.pop() if versions else None
+
+    names = store.label_names
+    num_features = next((c["num_features"] for c in store.chunks
+                         if c["feature_version"] == feature_version), 0)
+    with open(csv_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["label"] + [f"f{i}" for i in range(num_features)])
+        for features, codes in store.iter_chunks(feature_version=feature_version):
+            for code, row in zip(codes, features):
+                writer.writerow([names[code]] + row.tolist())
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the binary dataset store")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Dataset store directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("info", help="Show row/label counts")
+    p = sub.add_parser("import", help="Append rows from a CSV file")
+    p.add_argument("csv_path", nargs="?", default="../data/dataset.csv")
+    p = sub.add_parser("export", help="Write the store to a CSV file")
+    p.add_argument("csv_path")
+    sub.add_parser("compact", help="Merge chunks")
+    p = sub.add_parser("materialize", help="Recompute stale cached features from raw landmarks")
+    p.add_argument("--features", type=int, default=None, help="Feature set version (default: the current one)")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = import_csv(args.csv_path, args.store)
+        print(f"Imported {args.csv_path} -> {args.store} ({store.num_rows} rows)")
+    elif args.command == "export":
+        export_csv(args.store, args.csv_path)
+        print(f"Exported {args.store} -> {args.csv_path}")
+    elif args.command == "compact":
+        DatasetStore(args.store).compact()
+        print(f"Compacted {args.store}")
+    elif args.command == "materialize":
+        from feature_extractor import FeatureExtractor
+
+        DatasetStore(args.store).materialize_features(FeatureExtractor(args.features))
+    else:
+        store = DatasetStore(args.store)
+        labels = np.asarray(store.label_names, dtype=object)[
+            np.concatenate([store.read_column(c, "labels") for c in store.chunks])] if store.chunks else []
+        with_landmarks = sum(c["rows"] for c in store.chunks if c["has_landmarks"])
+        versions = sorted({str(c["feature_version"]) for c in store.chunks})
+        print(f"{args.store}: {store.num_rows} rows in {len(store.chunks)} chunk(s), "
+              f"{with_landmarks} with raw landmarks, feature versions: {', '.join(versions) or '-'}")
+        for name in store.label_names:
+            print(f"  {name}: {int(np.sum(labels == name))}")
@@ -0,0 +1,132 @@
+import argparse
+import random
+
+
+class DecisionEngine:
+    """
+    Streaming, frame-rate independent acceptance of a recognized sign.
+
+    Every label keeps an exponential moving average of its prediction
+    confidence, decaying with a half-life in seconds rather than frames, so
+    the same hand motion is judged the same at 15 and 60 FPS. Frames without
+    a prediction count as zero evidence. A label is accepted once its score
+    has stayed at or above accept_threshold for min_hold seconds, and stays
+    accepted until its score falls below release_threshold (hysteresis).
+    A steady score only approaches its confidence, so accept_threshold sits
+    below 0.6, the smallest majority vote of a k=5 classifier.
+
+    Each update is O(1): all scores decay together through one shared scale
+    factor and only the predicted label's score changes, so the leading
+    label can be tracked without scanning the others.
+    """
+
+    def __init__(self, half_life=0.1, accept_threshold=0.5, release_threshold=0.4, min_hold=0.1):
+        self.half_life = half_life # seconds for a score to halve without new evidence
+        self.accept_threshold = accept_threshold
+        self.release_threshold = release_threshold
+        self.min_hold = min_hold # seconds the leader must stay above accept_threshold
+        self.reset()
+
+    def reset(self):
+        self._raw = {} # label -> score / _scale
+        self._scale = 1.0
+        self.last_time = None
+        self.leader = None # label with the highest score
+        self.leader_since = None # when the leader's score reached accept_threshold
+        self.accepted = None
+
+    def score(self, label):
+        """Current smoothed confidence of `label`, in [0, 1]"""
+        return self._raw.get(label, 0.0) * self._scale
+
+    def update(self, label, confidence, now):
+        """
+        Feed one frame's prediction (label None if nothing was recognized)
+        observed at time `now` in seconds. Returns the accepted label or None.
+        """
+        # The first frame only starts the clock: it has no duration to weigh it by
+        if self.last_time is None:
+            decay = 1.0
+        else:
+            decay = 0.5 ** (max(0.0, now - self.last_time) / self.half_life)
+        self.last_time = now
+
+        self._scale *= decay
+        if self._scale < 1e-12:
+            self._rescale()
+
+        if label is not None and confidence > 0:
+            self._raw[label] = self._raw.get(label, 0.0) + (1.0 - decay) * confidence / self._scale
+            # Uniform decay keeps the others' order, so only this label can overtake the leader
+            if label != self.leader and self.score(label) > self.score(self.leader):
+                self.leader = label
+                self.leader_since = None
+
+        if self.accepted is not None and self.score(self.accepted) < self.release_threshold:
+            self.accepted = None
+
+        if self.leader is not None and self.score(self.leader) >= self.accept_threshold:
+            if self.leader_since is None:
+                self.leader_since = now
+            if now - self.leader_since >= self.min_hold:
+                self.accepted = self.leader
+        else:
+            self.leader_since = None
+        return self.accepted
+
+    def _rescale(self):
+        # Fold the shared scale back into the scores (amortized: the scale
+        # only underflows after several seconds) and drop labels that faded out
+        self._raw = {label: raw * self._scale for label, raw in self._raw.items()
+                     if raw * self._scale > 1e-9}
+        self._scale = 1.0
+        if self.leader not in self._raw:
+            self.leader = max(self._raw, key=self._raw.get) if self._raw else None
+            self.leader_since = None
+
+
+def synthetic_stream(fps, duration, segments, noise=0.0, seed=0):
+    """
+    Yield (time, label, confidence) frames at `fps` for `duration` seconds.
+    segments: list of (start_time, label, confidence); label None means no hand.
+    noise: probability that a frame is mispredicted as a random other label.
+    """
+    rng = random.Random(seed)
+    frames = int(duration * fps)
+    for i in range(frames):
+        now = i / fps
+        label, confidence = None, 0.0
+        for start, seg_label, seg_confidence in segments:
+            if now >= start:
+                label, confidence = seg_label, seg_confidence
+        if label is not None and rng.random() < noise:
+            label = rng.choice([c for c in "ABCDL" if c != label])
+        yield now, label, confidence
+
+
+def acceptance_time(stream, target, **params):
+    """Time at which `target` is first accepted in a synthetic stream, or None"""
+    engine = DecisionEngine(**params)
+    for now, label, confidence in stream:
+        if engine.update(label, confidence, now) == target:
+            return now
+    return None
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay synthetic prediction streams through DecisionEngine")
+    parser.add_argument("--noise", type=float, default=0.2, help="Fraction of mispredicted frames")
+    args = parser.parse_args()
+
+    # No hand for 0.5s, then "B" signed with 0.8 confidence from t=0.5s
+    segments = [(0.0, None, 0.0), (0.5, "B", 0.8)]
+    print(f"'B' from t=0.50s, {args.noise:.0%} mispredicted frames")
+    for fps in (15, 30, 60):
+        accepted = acceptance_time(synthetic_stream(fps, 3.0, segments, args.noise), "B")
+        print(f"  {fps:>2} FPS: accepted at " + (f"t={accepted:.2f}s" if accepted is not None else "never"))
+
+    # A brief flicker of the wrong sign must not be accepted
+    flicker = [(0.0, "A", 0.9), (0.08, None, 0.0)]
+    for fps in (15, 30, 60):
+        accepted = acceptance_time(synthetic_stream(fps, 1.0, flicker), "A")
+        print(f"  {fps:>2} FPS: 80ms flicker of 'A' " + ("accepted" if accepted is not None else "ignored"))
@@ -0,0 +1,134 @@
+import argparse
+import json
+import time
+import numpy as np
+from benchmark import LatencyRecorder
+from dataset_store import DatasetStore, HANDEDNESS_CODES
+from feature_extractor import FeatureExtractor
+
+
+def synthetic_hands(num_signs=12, samples_per_sign=200, max_tilt=50.0, seed=0):
+    """
+    (landmarks, handedness, labels) of 3D hands for comparing feature sets
+    without recordings. Every sign is a right-hand pose with its own finger
+    curls and spread; each sample jitters it, rotates it in the image plane
+    (up to 45 degrees) and out of it (up to max_tilt degrees), scales and moves
+    it, and half the samples are left hands (mirror images). Landmarks are in
+    pixels with MediaPipe's z convention (depth relative to the wrist).
+    """
+    rng = np.random.default_rng(seed)
+    signs = [(rng.random(5), rng.normal(0, 0.08, 5)) for _ in range(num_signs)]
+    landmarks = np.empty((num_signs * samples_per_sign, 21, 3))
+    handedness = np.full(len(landmarks), HANDEDNESS_CODES["Right"], dtype=np.int8)
+    labels = np.repeat([f"sign{i}" for i in range(num_signs)], samples_per_sign)
+    tilt = np.radians(max_tilt)
+
+    for n in range(len(landmarks)):
+        curls, spreads = signs[n // samples_per_sign]
+        curls = np.clip(curls + rng.normal(0, 0.04, 5), 0, 1)
+        hand = np.zeros((21, 3))
+        for finger, direction in enumerate(np.linspace(-0.9, 0.6, 5) + spreads):
+            # Base joint in the palm plane, then each bone curls towards the palm (-z)
+            heading = np.array([np.sin(direction), -np.cos(direction), 0.0])
+            point = heading * (0.25 if finger == 0 else 0.35)
+            hand[1 + 4 * finger] = point
+            bend = 0.0
+            for joint in range(2, 5):
+                bend += curls[finger] * 1.2
+                bone = heading * np.cos(bend) + np.array([0.0, 0.0, -np.sin(bend)])
+                point = point + bone * (0.2 if finger == 0 else 0.25)
+                hand[joint + 4 * finger] = point
+        hand += rng.normal(0, 0.01, hand.shape)
+
+        rotation = _rotation(rng.uniform(-np.pi / 4, np.pi / 4), rng.uniform(-tilt, tilt), rng.uniform(-tilt, tilt))
+        hand = hand @ rotation.T * rng.uniform(100, 250)
+        if rng.random() < 0.5:
+            hand[:, 0] *= -1
+            handedness[n] = HANDEDNESS_CODES["Left"]
+        hand[:, 2] -= hand[0, 2]
+        landmarks[n] = hand + [rng.uniform(300, 980), rng.uniform(250, 470), 0.0]
+    return landmarks, handedness, labels
+
+
+def _rotation(roll, pitch, yaw):
+    """Rotation about the camera axis (roll), then the image x (pitch) and y (yaw) axes"""
+    c, s = np.cos(roll), np.sin(roll)
+    about_z = np.array([[c, -s, 0], [s, c, 0], [0, 0, 1]])
+    c, s = np.cos(pitch), np.sin(pitch)
+    about_x = np.array([[1, 0, 0], [0, c, -s], [0, s, c]])
+    c, s = np.cos(yaw), np.sin(yaw)
+    about_y = np.array([[c, 0, s], [0, 1, 0], [-s, 0, c]])
+    return about_y @ about_x @ about_z
+
+
+def held_out_accuracy(features, labels, seed=42):
+    """Accuracy of the game's KNN on a held-out 20% (the same split as classifier.py)"""
+    from sklearn.model_selection import train_test_split
+    from sklearn.neighbors import KNeighborsClassifier
+
+    X_train, X_test, y_train, y_test = train_test_split(features, labels, test_size=0.2, random_state=seed)
+    model = KNeighborsClassifier(n_neighbors=5).fit(X_train, y_train)
+    return float(np.mean(model.predict(X_test) == y_test))
+
+
+def extraction_cost(extractor, landmarks, handedness, frames=2000):
+    """
+    Microseconds per frame featurizing one hand per call (the live pipeline)
+    and the whole sequence in one call (server, multiplayer, training).
+    """
+    recorder = LatencyRecorder()
+    frames = min(frames, len(landmarks))
+    extractor.extract_features_batch(landmarks[:50], handedness[:50]) # warm-up
+    for i in range(frames):
+        start = time.perf_counter()
+        extractor.extract_features_batch(landmarks[i:i + 1], handedness[i:i + 1])
+        recorder.add("single", time.perf_counter() - start)
+    start = time.perf_counter()
+    extractor.extract_features_batch(landmarks, handedness)
+    batch_us = (time.perf_counter() - start) / len(landmarks) * 1e6
+    single = recorder.summary()["single"]
+    return {"single_p50_us": single["p50_us"], "single_p99_us": single["p99_us"], "batch_us_per_frame": batch_us}
+
+
+def compare(landmarks, handedness, labels, versions=None):
+    """Held-out accuracy and extraction cost of each feature version on the same rows"""
+    report = {"rows": len(landmarks), "signs": len(set(labels)), "versions": {}}
+    for version in versions or sorted(FeatureExtractor.NUM_FEATURES_BY_VERSION):
+        extractor = FeatureExtractor(version)
+        features = extractor.extract_features_batch(landmarks, handedness)
+        result = {"num_features": extractor.num_features, "accuracy": held_out_accuracy(features, labels)}
+        result.update(extraction_cost(extractor, landmarks, handedness))
+        report["versions"][version] = result
+    return report
+
+
+def print_report(report):
+    print(f"{report['rows']} samples of {report['signs']} signs")
+    print(f"{'version':>8} {'features':>9} {'accuracy':>9} {'single p50':>11} {'single p99':>11} {'batch':>10}")
+    for version, result in report["versions"].items():
+        print(f"{'v' + str(version):>8} {result['num_features']:>9} {result['accuracy'] * 100:>8.1f}% "
+              f"{result['single_p50_us']:>8.1f} us {result['single_p99_us']:>8.1f} us "
+              f"{result['batch_us_per_frame']:>7.2f} us")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare feature set versions: KNN accuracy and extraction cost")
+    parser.add_argument("--data", help="Dataset store with raw landmarks (default: synthetic 3D hands)")
+    parser.add_argument("--max-tilt", type=float, default=50.0,
+                        help="Synthetic hands: largest out-of-plane rotation in degrees")
+    parser.add_argument("--samples-per-sign", type=int, default=200)
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    if args.data:
+        landmarks, handedness, labels = DatasetStore(args.data).load_landmarks(mmap=False)
+        if not len(landmarks):
+            parser.error(f"{args.data} has no raw landmarks to compare on")
+    else:
+        landmarks, handedness, labels = synthetic_hands(samples_per_sign=args.samples_per_sign,
+                                                        max_tilt=args.max_tilt)
+    report = compare(landmarks, handedness, labels)
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
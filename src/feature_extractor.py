@@ -1,78 +1,191 @@
 import numpy as np
-import math
+
+# Handedness code of left hands (dataset_store.HANDEDNESS_CODES), mirrored by v2
+LEFT = 1
+# Cyclic coordinate permutations (y, z, x) and (z, x, y) for cross products
+NEXT = np.array([1, 2, 0])
+PREV = np.array([2, 0, 1])
 
 class FeatureExtractor:
-    def __init__(self):
-        pass
+    # Version used for new datasets and models. Bump whenever a new feature set
+    # is added; cached dataset features are recomputed from raw landmarks
+    FEATURE_VERSION = 2
+
+    # v1: angles and one tip distance from 2D points
+    # Joint triples (a, b, c) whose angle at b is a feature, in feature order
+    ANGLE_TRIPLES = np.array([
+        [2, 3, 4],     # Thumb bend
+        [0, 2, 4],     # Thumb openness
+        [0, 5, 8],     # Index openness
+        [5, 6, 7],     # Index joint bend
+        [0, 9, 12],    # Middle openness
+        [9, 10, 11],   # Middle joint bend
+        [0, 13, 16],   # Ring openness
+        [13, 14, 15],  # Ring joint bend
+        [0, 17, 20],   # Pinky openness
+        [17, 18, 19],  # Pinky joint bend
+    ])
+    # Landmark pairs whose (normalized) distance is a feature
+    DISTANCE_PAIRS = np.array([
+        [4, 8],        # Thumb tip to Index tip
+    ])
+
+    # v2: 3D, invariant to hand rotation, left hands mirrored onto right hands
+    # Joint chains wrist -> fingertip; every interior joint's bend is a feature
+    FINGER_CHAINS = np.array([[0, 1, 2, 3, 4], [0, 5, 6, 7, 8], [0, 9, 10, 11, 12],
+                              [0, 13, 14, 15, 16], [0, 17, 18, 19, 20]])
+    JOINT_TRIPLES = np.concatenate([np.stack([chain[:-2], chain[1:-1], chain[2:]], axis=1)
+                                    for chain in FINGER_CHAINS])
+    # Spread between neighbouring fingers (angle between their first bones)
+    SPREAD_BONES = np.array([[1, 2, 5, 6], [5, 6, 9, 10], [9, 10, 13, 14], [13, 14, 17, 18]])
+    FINGERTIPS = np.array([4, 8, 12, 16, 20])
+    TIP_PAIRS = FINGERTIPS[np.stack(np.triu_indices(len(FINGERTIPS), k=1), axis=1)]
+
+    NUM_FEATURES_BY_VERSION = {
+        1: len(ANGLE_TRIPLES) + len(DISTANCE_PAIRS),
+        2: len(JOINT_TRIPLES) + len(SPREAD_BONES) + 3 * len(FINGERTIPS) + len(TIP_PAIRS),
+    }
+
+    def __init__(self, version=None):
+        """version: feature set to compute (default FEATURE_VERSION); match the model's"""
+        self.version = self.FEATURE_VERSION if version is None else version
+        if self.version not in self.NUM_FEATURES_BY_VERSION:
+            raise ValueError(f"Unknown feature version: {self.version}")
+        self.num_features = self.NUM_FEATURES_BY_VERSION[self.version]
+
+    @classmethod
+    def version_for(cls, num_features):
+        """Newest feature version producing num_features features, or None"""
+        versions = [v for v, n in cls.NUM_FEATURES_BY_VERSION.items() if n == num_features]
+        return max(versions) if versions else None
 
     def extract_features(self, landmarks):
         """
-        Convert 21 landmarks into a feature vector.
-        Features:
-        - Angles of 5 fingers (0-180 degrees)
-        - Distances between tips (optional, normalized)
+        Convert one hand's find_position landmarks ([[id, x, y], ...], 21 of
+        them) into a list of self.num_features features, or [] if incomplete.
+        v1: 10 finger angles in degrees and the thumb-index tip distance.
+        v2: see _features_v2 (radians and palm lengths). The list holds no z
+        or handedness, so v2 treats z as 0 and the hand as a right hand; pass
+        3D landmarks and handedness to extract_features_batch for the full set.
         """
         if not landmarks or len(landmarks) != 21:
             return []
 
-        # Convert to numpy array for easier math
         # landmarks is list of [id, x, y]
-        # We only need x, y
-        points = np.array([[lm[1], lm[2]] for lm in landmarks])
+        points = np.array([[lm[1], lm[2]] for lm in landmarks], dtype=np.float64)
+
+        return self.extract_features_batch(points[np.newaxis])[0].tolist()
+
+    def extract_features_batch(self, landmarks, handedness=None, out=None):
+        """
+        Vectorized version of extract_features for many frames at once.
+        landmarks: array of shape (N, 21, 2) or (N, 21, 3) in pixel units
+        (x * width, y * height, z * width); v1 only uses x, y.
+        handedness: optional N codes (HANDEDNESS_CODES); v2 mirrors left hands.
+        Returns an (N, num_features) array: float64 for v1, float32 for v2
+        (written into `out` when given).
+        """
+        landmarks = np.asarray(landmarks)
+        if landmarks.ndim != 3 or landmarks.shape[1] != 21 or landmarks.shape[2] < 2:
+            raise ValueError(f"Expected landmarks of shape (N, 21, 2|3), got {landmarks.shape}")
+        if self.version == 2:
+            return self._features_v2(landmarks, handedness, out)
+
+        points = landmarks[:, :, :2].astype(np.float64)
 
         # 1. Normalize coordinates
         # Shift so wrist (0) is at (0,0)
-        wrist = points[0]
-        points = points - wrist
+        points = points - points[:, 0:1]
 
         # Scale by hand size (distance between wrist and middle finger MCP (9))
         # This makes it invariant to camera distance
-        hand_size = np.linalg.norm(points[9])
-        if hand_size > 0:
-            points = points / hand_size
-
-        features = []
-
-        # 2. Calculate Angles
-        # Thumb: 2-3-4
-        features.append(self.get_angle(points[2], points[3], points[4]))
-        # Index: 5-6-7-8 (Use 5-6-8 for general bend?) 
-        # Better: Angle at joint 6 (5-6-7) and joint 7 (6-7-8)
-        # For simplicity, let's use the angle of the finger relative to the palm or just the bend angle.
-        
-        # Let's use 3 angles per finger for detailed shape, or just one "bend" angle.
-        # For sign language, we need to know if a finger is straight or curled.
-        
-        # Thumb
-        features.append(self.get_angle(points[0], points[2], points[4]))
-
-        # Fingers (Index, Middle, Ring, Pinky)
-        # Tips: 8, 12, 16, 20
-        # PIP joints: 6, 10, 14, 18
-        # MCP joints: 5, 9, 13, 17
-        
-        # Index
-        features.append(self.get_angle(points[0], points[5], points[8])) # Openness
-        features.append(self.get_angle(points[5], points[6], points[7])) # Joint bend
+        hand_size = np.sqrt(np.sum(points[:, 9] * points[:, 9], axis=1))
+        scale = np.where(hand_size > 0, hand_size, 1.0)
+        points = points / scale[:, np.newaxis, np.newaxis]
 
-        # Middle
-        features.append(self.get_angle(points[0], points[9], points[12]))
-        features.append(self.get_angle(points[9], points[10], points[11]))
+        features = np.empty((len(points), self.num_features), dtype=np.float64)
 
-        # Ring
-        features.append(self.get_angle(points[0], points[13], points[16]))
-        features.append(self.get_angle(points[13], points[14], points[15]))
-
-        # Pinky
-        features.append(self.get_angle(points[0], points[17], points[20]))
-        features.append(self.get_angle(points[17], points[18], points[19]))
+        # 2. Angles at the middle joint of every triple, all in one pass
+        a = points[:, self.ANGLE_TRIPLES[:, 0]]
+        b = points[:, self.ANGLE_TRIPLES[:, 1]]
+        c = points[:, self.ANGLE_TRIPLES[:, 2]]
+        features[:, :len(self.ANGLE_TRIPLES)] = self._angles(a - b, c - b)
 
         # 3. Distances between tips (useful for 'O' vs 'C' etc)
-        # Thumb tip to Index tip
-        features.append(np.linalg.norm(points[4] - points[8]))
-        
+        diff = points[:, self.DISTANCE_PAIRS[:, 0]] - points[:, self.DISTANCE_PAIRS[:, 1]]
+        features[:, len(self.ANGLE_TRIPLES):] = np.sqrt(np.sum(diff * diff, axis=2))
+
         return features
 
+    def _features_v2(self, landmarks, handedness, out):
+        """
+        v2 features, all in float32 and computed for the whole batch at once:
+        - bend at every finger joint (15) and spread between neighbouring
+          fingers (4), as 3D angles in radians
+        - the 5 fingertips in a palm frame (15): origin at the wrist, y towards
+          the middle finger's base, z along the palm normal; in palm lengths,
+          so rotating the hand in or out of the image plane changes nothing
+        - the 10 fingertip-to-fingertip distances, in palm lengths
+        Left hands are mirrored first, so both hands give the same features
+        for the same sign. Radians and palm lengths keep all features on a
+        similar scale for distance-based classifiers.
+        """
+        n = len(landmarks)
+        points = np.zeros((n, 21, 3), dtype=np.float32)
+        points[:, :, :landmarks.shape[2]] = landmarks[:, :, :3]
+        if handedness is not None:
+            points[np.asarray(handedness) == LEFT, :, 0] *= -1
+
+        points -= points[:, :1]
+        palm = np.sqrt(np.einsum("ij,ij->i", points[:, 9], points[:, 9]))
+        points /= np.where(palm > 0, palm, 1.0)[:, np.newaxis, np.newaxis]
+
+        if out is None:
+            out = np.empty((n, self.num_features), dtype=np.float32)
+        joints = len(self.JOINT_TRIPLES)
+        spreads = joints + len(self.SPREAD_BONES)
+        tips = spreads + 3 * len(self.FINGERTIPS)
+
+        triples = self.JOINT_TRIPLES
+        b = points[:, triples[:, 1]]
+        # Bend: 0 for a straight joint
+        out[:, :joints] = np.pi - self._radians(points[:, triples[:, 0]] - b, points[:, triples[:, 2]] - b)
+        bones = self.SPREAD_BONES
+        out[:, joints:spreads] = self._radians(points[:, bones[:, 1]] - points[:, bones[:, 0]],
+                                               points[:, bones[:, 3]] - points[:, bones[:, 2]])
+
+        # Palm frame from the wrist, index base (5) and pinky base (17)
+        y_axis = points[:, 9]
+        normal = self._cross(points[:, 5], points[:, 17])
+        normal /= np.maximum(np.sqrt(np.einsum("ij,ij->i", normal, normal)), 1e-6)[:, np.newaxis]
+        x_axis = self._cross(y_axis, normal)
+        frame = np.stack([x_axis, y_axis, normal], axis=1) # rows are the axes
+        out[:, spreads:tips] = np.matmul(points[:, self.FINGERTIPS], frame.transpose(0, 2, 1)).reshape(n, -1)
+
+        diff = points[:, self.TIP_PAIRS[:, 0]] - points[:, self.TIP_PAIRS[:, 1]]
+        out[:, tips:] = np.sqrt(np.einsum("ijk,ijk->ij", diff, diff))
+        return out
+
+    @staticmethod
+    def _cross(u, v):
+        """Cross products along the last axis (np.cross costs more than the math for a few vectors)"""
+        return u[..., NEXT] * v[..., PREV] - u[..., PREV] * v[..., NEXT]
+
+    @staticmethod
+    def _radians(u, v):
+        """Angles in radians between vector pairs along the last axis"""
+        dot = np.einsum("...k,...k->...", u, v)
+        norms = np.sqrt(np.einsum("...k,...k->...", u, u) * np.einsum("...k,...k->...", v, v))
+        return np.arccos(np.clip(dot / (norms + 1e-6), -1.0, 1.0))
+
+    @staticmethod
+    def _angles(ba, bc):
+        """Angles in degrees between vector pairs along the last axis"""
+        dot = np.sum(ba * bc, axis=-1)
+        norms = np.sqrt(np.sum(ba * ba, axis=-1)) * np.sqrt(np.sum(bc * bc, axis=-1))
+        cosine_angle = dot / (norms + 1e-6)
+        return np.degrees(np.arccos(np.clip(cosine_angle, -1.0, 1.0)))
+
     def get_angle(self, a, b, c):
         """Calculate angle at b given points a, b, c"""
         ba = a - b
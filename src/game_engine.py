@@ -1,6 +1,6 @@
 import random
 import time
-from collections import deque
+from decision_engine import DecisionEngine
 
 class GameEngine:
     STATE_MENU = "MENU"
@@ -14,8 +14,8 @@ class GameEngine:
         self.target_sign = ""
         self.signs = ['A', 'B', 'C', 'D', 'L']
         
-        self.prediction_history = deque(maxlen=10) # For smoothing
-        self.required_consecutive_frames = 5
+        # Time-based smoothing of (sign, confidence) predictions
+        self.decision = DecisionEngine()
         self.feedback_message = ""
         self.feedback_timer = 0
         self.round_start_time = 0
@@ -29,38 +29,35 @@ class GameEngine:
 
     def next_round(self):
         self.target_sign = random.choice(self.signs)
-        self.prediction_history.clear()
+        self.decision.reset()
         self.feedback_message = ""
         self.round_start_time = time.time()
 
-    def update(self, predicted_sign, confidence):
+    def update(self, predicted_sign, confidence, now=None):
+        """now: timestamp of the frame (seconds, time.time() clock); defaults to the current time"""
+        if now is None:
+            now = time.time()
         if self.state == self.STATE_PLAYING:
             # Check time limit for current round
-            elapsed = time.time() - self.round_start_time
+            elapsed = now - self.round_start_time
             if elapsed > self.round_time_limit:
                 # Time's up for this round
                 self.feedback_message = "Time's Up!"
                 self.state = self.STATE_FEEDBACK
-                self.feedback_timer = time.time()
+                self.feedback_timer = now
                 return
 
-            if predicted_sign:
-                self.prediction_history.append(predicted_sign)
-            
-            # Check if we have enough consistent predictions
-            if len(self.prediction_history) >= self.required_consecutive_frames:
-                # Check if all recent predictions match the target
-                recent = list(self.prediction_history)[-self.required_consecutive_frames:]
-                if all(p == self.target_sign for p in recent):
-                    # Correct!
-                    self.score += 10
-                    self.feedback_message = "Correct! +10"
-                    self.state = self.STATE_FEEDBACK
-                    self.feedback_timer = time.time()
+            # Accepted once the target has been held with enough confidence for long enough
+            if self.decision.update(predicted_sign, confidence, now) == self.target_sign:
+                # Correct!
+                self.score += 10
+                self.feedback_message = "Correct! +10"
+                self.state = self.STATE_FEEDBACK
+                self.feedback_timer = now
         
         elif self.state == self.STATE_FEEDBACK:
             # Show feedback with delay before next round
-            if time.time() - self.feedback_timer > self.feedback_delay:
+            if now - self.feedback_timer > self.feedback_delay:
                 self.state = self.STATE_PLAYING
                 self.next_round()
 
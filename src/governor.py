@@ -0,0 +1,190 @@
+import argparse
+import time
+import numpy as np
+
+# (process_scale, model_complexity, frame_skip) from best quality to cheapest:
+# MediaPipe input resolution goes first, then the lite landmark model, then
+# running detection only on every n-th frame
+DEFAULT_LEVELS = (
+    (1.0, 1, 1),
+    (0.75, 1, 1),
+    (0.5, 1, 1),
+    (0.5, 0, 1),
+    (0.5, 0, 2),
+    (0.35, 0, 3),
+)
+
+
+class Governor:
+    """
+    Holds a target frame rate on slow machines by trading detection quality
+    for speed, one level of `levels` at a time.
+
+    Fed with each frame's end-to-end latency (capture to result). At the end
+    of every `window` seconds, a mean latency above the frame budget
+    (1 / target_fps) moves one level down; a mean below upgrade_ratio of the
+    budget moves one level back up. Frames in the `settle` seconds after a
+    change are ignored (MediaPipe graphs are rebuilt, queues drain). Moving
+    back up to a level that was just left for being too slow waits a backoff
+    that doubles every time, so the governor does not oscillate.
+    Every adjustment is printed and kept in `adjustments`.
+    """
+
+    def __init__(self, detector=None, target_fps=24, levels=DEFAULT_LEVELS, window=1.0, upgrade_ratio=0.6,
+                 settle=1.0, backoff=5.0, log=print):
+        self.detector = detector
+        self.target_fps = target_fps
+        self.levels = levels
+        self.window = window
+        self.upgrade_ratio = upgrade_ratio
+        self.settle = settle
+        self.backoff = backoff
+        self.log = log
+
+        self.level = 0
+        self.window_start = None
+        self.latency_sum = 0.0
+        self.frames = 0
+        self.retry_after = {} # level -> earliest time it may be tried again
+        self.backoffs = {} # level -> current backoff in seconds
+        self.adjustments = []
+        self.apply()
+
+    @property
+    def budget(self):
+        """Seconds per frame at the target frame rate"""
+        return 1.0 / self.target_fps
+
+    @property
+    def process_scale(self):
+        return self.levels[self.level][0]
+
+    @property
+    def model_complexity(self):
+        return self.levels[self.level][1]
+
+    @property
+    def frame_skip(self):
+        return self.levels[self.level][2]
+
+    def should_process(self, frame_id):
+        """Whether detection runs on this frame at the current level"""
+        return frame_id % self.frame_skip == 0
+
+    def apply(self):
+        if self.detector is not None:
+            self.detector.process_scale = self.process_scale
+            self.detector.set_model_complexity(self.model_complexity)
+
+    def update(self, latency, now=None):
+        """
+        Record one frame's end-to-end latency in seconds.
+        Returns True when the level was changed.
+        """
+        if now is None:
+            now = time.perf_counter()
+        if self.window_start is None:
+            self.window_start = now
+        if now < self.window_start:
+            return False # still settling after a change
+        self.latency_sum += latency
+        self.frames += 1
+        if now - self.window_start < self.window:
+            return False
+
+        mean = self.latency_sum / self.frames
+        self.window_start = now
+        self.latency_sum = 0.0
+        self.frames = 0
+
+        if mean > self.budget and self.level < len(self.levels) - 1:
+            # Retrying the level we are leaving gets a longer wait every time
+            delay = self.backoffs.get(self.level, self.backoff / 2) * 2
+            self.backoffs[self.level] = delay
+            self.retry_after[self.level] = now + delay
+            self._set_level(self.level + 1, now, mean, "too slow")
+            return True
+        if (mean < self.budget * self.upgrade_ratio and self.level > 0
+                and now >= self.retry_after.get(self.level - 1, 0.0)):
+            self._set_level(self.level - 1, now, mean, "headroom")
+            return True
+        return False
+
+    def _set_level(self, level, now, mean, reason):
+        previous = self.level
+        self.level = level
+        self.apply()
+        self.window_start = now + self.settle
+        adjustment = {"time": now, "from": previous, "to": level, "mean_latency_ms": mean * 1000,
+                      "reason": reason, "process_scale": self.process_scale,
+                      "model_complexity": self.model_complexity, "frame_skip": self.frame_skip}
+        self.adjustments.append(adjustment)
+        if self.log is not None:
+            self.log(f"[governor] {reason} ({mean * 1000:.1f} ms/frame, budget {self.budget * 1000:.1f} ms): "
+                     f"level {previous} -> {level}, scale {self.process_scale}, "
+                     f"model_complexity {self.model_complexity}, detecting every {self.frame_skip} frame(s)")
+
+
+class SimulatedDetector:
+    """
+    Stand-in for HandDetector with a configurable cost and no hands: each
+    find_hands sleeps for base_ms scaled by the input area and the model.
+    """
+
+    LITE_COST = 0.6 # model_complexity=0 relative to 1
+
+    def __init__(self, base_ms=60.0, fixed_ms=2.0):
+        self.base_ms = base_ms
+        self.fixed_ms = fixed_ms
+        self.process_scale = 1.0
+        self.model_complexity = 1
+        self.empty = (np.zeros((0, 21, 3), dtype=np.float32), np.zeros(0, dtype=np.int8), np.zeros(0, dtype=np.float32))
+
+    def set_model_complexity(self, model_complexity):
+        self.model_complexity = model_complexity
+
+    def cost_ms(self):
+        model = 1.0 if self.model_complexity else self.LITE_COST
+        return self.fixed_ms + self.base_ms * self.process_scale ** 2 * model
+
+    def find_hands(self, img, draw=True):
+        time.sleep(self.cost_ms() / 1000)
+        return img
+
+    def find_landmarks(self, img=None, space="normalized"):
+        return self.empty
+
+
+def simulate(base_ms=60.0, source_fps=30, target_fps=24, duration=12.0, **params):
+    """
+    Run the threaded pipeline on a synthetic source with a SimulatedDetector
+    and a Governor. Returns (governor, pipeline report).
+    """
+    from feature_extractor import FeatureExtractor
+    from game_engine import GameEngine
+    from pipeline import RecognitionPipeline, SyntheticSource
+
+    frame = np.zeros((720, 1280, 3), dtype=np.uint8)
+    source = SyntheticSource((frame for _ in range(int(duration * source_fps))), fps=source_fps)
+    detector = SimulatedDetector(base_ms)
+    governor = Governor(detector, target_fps, **params)
+    # No hands are ever detected, so the classifier is never consulted
+    pipeline = RecognitionPipeline(source, detector, FeatureExtractor(), None, GameEngine(), governor=governor)
+    return governor, pipeline.run()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the frame-rate governor against a simulated slow detector")
+    parser.add_argument("--detect-ms", type=float, default=60.0, help="Simulated full-quality detection cost")
+    parser.add_argument("--source-fps", type=float, default=30)
+    parser.add_argument("--target-fps", type=float, default=24)
+    parser.add_argument("--duration", type=float, default=12.0)
+    args = parser.parse_args()
+
+    print(f"Detection {args.detect_ms:.0f} ms/frame at full quality, camera {args.source_fps:g} FPS, "
+          f"target {args.target_fps:g} FPS")
+    governor, report = simulate(args.detect_ms, args.source_fps, args.target_fps, args.duration)
+    print(f"Final level {governor.level}: scale {governor.process_scale}, "
+          f"model_complexity {governor.model_complexity}, detecting every {governor.frame_skip} frame(s)")
+    print(f"Inference {report['inference']['fps']:.1f} FPS, {report['inference']['avg_ms']:.1f} ms/frame, "
+          f"{report['dropped']['capture->inference']} frames dropped")
@@ -1,24 +1,90 @@
 import cv2
-import mediapipe as mp
-import time
+import numpy as np
+from dataset_store import HANDEDNESS_CODES, HANDEDNESS_UNKNOWN
+from instrumentation import Instrumentation
 
 class HandDetector:
-    def __init__(self, mode=False, max_hands=1, model_complexity=1, detection_con=0.5, track_con=0.5):
+    def __init__(self, mode=False, max_hands=1, model_complexity=1, detection_con=0.5, track_con=0.5,
+                 roi_tracking=False, roi_size=256, roi_margin=0.35, detect_every_n=30, min_track_score=0.7,
+                 instrumentation=None, process_scale=1.0):
+        """
+        roi_tracking: after a full-frame detection, run landmarks only on a crop around
+        the previous frame's hands (downscaled to at most roi_size pixels), falling back
+        to full-frame detection when the hand is lost, its score drops below
+        min_track_score, it reaches the edge of the crop, or every detect_every_n
+        frames (0 disables the periodic refresh).
+        instrumentation: Instrumentation that times the "color convert" and "mediapipe" stages
+        process_scale: downscale full frames by this factor before MediaPipe. Landmarks
+        are normalized, so results still refer to the full frame.
+        """
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
         self.mode = mode
         self.max_hands = max_hands
         self.model_complexity = model_complexity
         self.detection_con = detection_con
         self.track_con = track_con
+        self.process_scale = process_scale
+
+        # Imported here so modules that only reference HandDetector stay light
+        import mediapipe as mp
 
         self.mp_hands = mp.solutions.hands
-        self.hands = self.mp_hands.Hands(self.mode, self.max_hands, self.model_complexity,
-                                         self.detection_con, self.track_con)
+        self.hands = self._create_graph()
         self.mp_draw = mp.solutions.drawing_utils
         self.results = None
 
+        # Reused output buffers for find_landmarks, so the per-frame path allocates no arrays
+        self.landmark_buffer = np.zeros((self.max_hands, 21, 3), dtype=np.float32)
+        self.pixel_buffer = np.zeros((self.max_hands, 21, 3), dtype=np.float32)
+        self.handedness_buffer = np.full(self.max_hands, HANDEDNESS_UNKNOWN, dtype=np.int8)
+        self.score_buffer = np.zeros(self.max_hands, dtype=np.float32)
+        self.pixel_scale = np.ones(3, dtype=np.float32)
+        self.num_hands = 0
+
+        self.roi_tracking = roi_tracking
+        self.roi_size = roi_size
+        self.roi_margin = roi_margin
+        self.detect_every_n = detect_every_n
+        self.min_track_score = min_track_score
+        self.roi = None # (x0, y0, x1, y1) in pixels, or None when not tracking
+        self.frames_since_detect = 0
+        self.full_detections = 0
+        self.roi_detections = 0
+        if self.roi_tracking:
+            # Separate graph for crops so its internal tracking state is not mixed with full frames
+            self.roi_hands = self._create_graph()
+
+    def _create_graph(self):
+        return self.mp_hands.Hands(self.mode, self.max_hands, self.model_complexity,
+                                   self.detection_con, self.track_con)
+
+    def set_model_complexity(self, model_complexity):
+        """Switch the landmark model (0 = lite, 1 = full); rebuilds the MediaPipe graphs"""
+        if model_complexity == self.model_complexity:
+            return
+        self.model_complexity = model_complexity
+        self.hands.close()
+        self.hands = self._create_graph()
+        if self.roi_tracking:
+            self.roi_hands.close()
+            self.roi_hands = self._create_graph()
+            self.roi = None
+
+    def _full_frame_rgb(self, img):
+        with self.instrumentation.time("color convert"):
+            if self.process_scale < 1.0:
+                h, w = img.shape[:2]
+                img = cv2.resize(img, (max(1, int(w * self.process_scale)), max(1, int(h * self.process_scale))),
+                                 interpolation=cv2.INTER_AREA)
+            return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
     def find_hands(self, img, draw=True):
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.results = self.hands.process(img_rgb)
+        if self.roi_tracking:
+            self.results = self._process_tracked(img)
+        else:
+            img_rgb = self._full_frame_rgb(img)
+            with self.instrumentation.time("mediapipe"):
+                self.results = self.hands.process(img_rgb)
 
         if self.results.multi_hand_landmarks:
             for hand_lms in self.results.multi_hand_landmarks:
@@ -26,25 +92,154 @@ class HandDetector:
                     self.mp_draw.draw_landmarks(img, hand_lms, self.mp_hands.HAND_CONNECTIONS)
         return img
 
+    def _process_tracked(self, img):
+        """Run landmarks on the tracked ROI when possible, else on the full frame"""
+        if self.roi is not None and (self.detect_every_n <= 0 or self.frames_since_detect < self.detect_every_n):
+            results = self._process_roi(img)
+            if results is not None:
+                self.roi_detections += 1
+                self.frames_since_detect += 1
+                return results
+
+        img_rgb = self._full_frame_rgb(img)
+        with self.instrumentation.time("mediapipe"):
+            results = self.hands.process(img_rgb)
+        self.full_detections += 1
+        self.frames_since_detect = 0
+        h, w, c = img.shape
+        self.roi = self._roi_from_landmarks(results, w, h) if results.multi_hand_landmarks else None
+        return results
+
+    def _process_roi(self, img):
+        """
+        Landmarks from the ROI crop, remapped to full-frame normalized coordinates.
+        Returns None when tracking is lost and a full-frame detection is needed.
+        """
+        h, w, c = img.shape
+        x0, y0, x1, y1 = self.roi
+        crop = img[y0:y1, x0:x1]
+        crop_w, crop_h = x1 - x0, y1 - y0
+        scale = self.roi_size / max(crop_w, crop_h)
+        with self.instrumentation.time("color convert"):
+            if scale < 1.0:
+                crop = cv2.resize(crop, (max(1, int(crop_w * scale)), max(1, int(crop_h * scale))),
+                                  interpolation=cv2.INTER_AREA)
+            crop_rgb = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        with self.instrumentation.time("mediapipe"):
+            results = self.roi_hands.process(crop_rgb)
+
+        if not results.multi_hand_landmarks:
+            return None
+        if results.multi_handedness and min(
+                hand.classification[0].score for hand in results.multi_handedness) < self.min_track_score:
+            return None
+
+        edge = 0.02
+        for hand_lms in results.multi_hand_landmarks:
+            for lm in hand_lms.landmark:
+                if not (edge < lm.x < 1 - edge and edge < lm.y < 1 - edge):
+                    # The hand is leaving the crop
+                    return None
+                lm.x = (x0 + lm.x * crop_w) / w
+                lm.y = (y0 + lm.y * crop_h) / h
+                lm.z = lm.z * crop_w / w
+
+        self.roi = self._roi_from_landmarks(results, w, h)
+        return results
+
+    def _roi_from_landmarks(self, results, w, h):
+        """Square crop around all detected hands, expanded by roi_margin and clipped to the frame"""
+        xs = [lm.x for hand in results.multi_hand_landmarks for lm in hand.landmark]
+        ys = [lm.y for hand in results.multi_hand_landmarks for lm in hand.landmark]
+        cx, cy = (min(xs) + max(xs)) / 2 * w, (min(ys) + max(ys)) / 2 * h
+        side = max((max(xs) - min(xs)) * w, (max(ys) - min(ys)) * h) * (1 + 2 * self.roi_margin)
+        half = max(side, 32) / 2
+        x0, y0 = max(0, int(cx - half)), max(0, int(cy - half))
+        x1, y1 = min(w, int(cx + half)), min(h, int(cy + half))
+        if x1 - x0 < 16 or y1 - y0 < 16:
+            return None
+        return x0, y0, x1, y1
+
+    def reset_tracking(self):
+        """Forget the tracked ROI so the next frame runs a full-frame detection"""
+        self.roi = None
+
+    def find_landmarks(self, img=None, space="normalized"):
+        """
+        Landmarks of all detected hands from the last find_hands call.
+
+        Returns (landmarks, handedness, scores):
+        - landmarks: float32 (num_hands, 21, 3); x, y, z normalized to [0, 1] as
+          MediaPipe reports them, or in pixel units (x * width, y * height,
+          z * width) with space="pixel" (needs img for its size)
+        - handedness: int8 (num_hands,) codes from HANDEDNESS_CODES
+        - scores: float32 (num_hands,) handedness confidence
+        The arrays are views into buffers reused on every call; copy them to keep them.
+        """
+        hands = self.results.multi_hand_landmarks if self.results is not None else None
+        n = min(len(hands), self.max_hands) if hands else 0
+        buf = self.landmark_buffer
+        for i in range(n):
+            hand = buf[i]
+            for j, lm in enumerate(hands[i].landmark):
+                hand[j, 0] = lm.x
+                hand[j, 1] = lm.y
+                hand[j, 2] = lm.z
+
+            self.handedness_buffer[i] = HANDEDNESS_UNKNOWN
+            self.score_buffer[i] = 0.0
+            if self.results.multi_handedness and i < len(self.results.multi_handedness):
+                classification = self.results.multi_handedness[i].classification[0]
+                self.handedness_buffer[i] = HANDEDNESS_CODES.get(classification.label, HANDEDNESS_UNKNOWN)
+                self.score_buffer[i] = classification.score
+        self.num_hands = n
+
+        landmarks = buf[:n]
+        if space == "pixel":
+            h, w = img.shape[:2]
+            if self.pixel_scale[0] != w or self.pixel_scale[1] != h:
+                self.pixel_scale[:] = (w, h, w)
+            landmarks = np.multiply(landmarks, self.pixel_scale, out=self.pixel_buffer[:n])
+        elif space != "normalized":
+            raise ValueError(f"Unknown landmark space: {space}")
+        return landmarks, self.handedness_buffer[:n], self.score_buffer[:n]
+
     def find_position(self, img, hand_no=0, draw=True):
+        """Landmarks of one hand as [[id, x, y], ...] in integer pixels (compatibility shim)"""
         lm_list = []
-        if self.results.multi_hand_landmarks:
-            if hand_no < len(self.results.multi_hand_landmarks):
-                my_hand = self.results.multi_hand_landmarks[hand_no]
-                for id, lm in enumerate(my_hand.landmark):
-                    h, w, c = img.shape
-                    cx, cy = int(lm.x * w), int(lm.y * h)
-                    lm_list.append([id, cx, cy])
-                    if draw:
-                        cv2.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
+        landmarks, _, _ = self.find_landmarks()
+        if hand_no < len(landmarks):
+            h, w, c = img.shape
+            for id, (x, y, z) in enumerate(landmarks[hand_no].tolist()):
+                cx, cy = int(x * w), int(y * h)
+                lm_list.append([id, cx, cy])
+                if draw:
+                    cv2.circle(img, (cx, cy), 5, (255, 0, 255), cv2.FILLED)
         return lm_list
 
-def main():
+    def find_raw_landmarks(self, img, hand_no=0):
+        """
+        Full-precision landmarks of one hand as a (21, 3) float32 array in pixel
+        units (x * width, y * height, z * width), plus MediaPipe's handedness
+        label ("Left"/"Right"). Returns (None, None) when the hand is not detected.
+        The array is a copy, safe to keep across frames.
+        """
+        landmarks, _, _ = self.find_landmarks(img, space="pixel")
+        if hand_no >= len(landmarks):
+            return None, None
+
+        handedness = None
+        if self.results.multi_handedness and hand_no < len(self.results.multi_handedness):
+            handedness = self.results.multi_handedness[hand_no].classification[0].label
+        return landmarks[hand_no].copy(), handedness
+
+def main(source=0):
     # Simple test script
-    cap = cv2.VideoCapture(0)
-    detector = HandDetector()
-    p_time = 0
-    c_time = 0
+    from pipeline import open_source
+
+    cap = open_source(source)
+    instrumentation = Instrumentation(enabled=True, window=30)
+    detector = HandDetector(instrumentation=instrumentation)
 
     print("Starting webcam... Press 'q' to exit.")
 
@@ -61,11 +256,9 @@ def main():
             # Print tip of index finger position (Landmark 8)
             print(f"Index Finger Tip: {lm_list[8]}")
 
-        c_time = time.time()
-        fps = 1 / (c_time - p_time)
-        p_time = c_time
-
-        cv2.putText(img, str(int(fps)), (10, 70), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
+        # Averaged over the last 30 frames; 0 until there are two
+        instrumentation.frame_done()
+        cv2.putText(img, str(int(instrumentation.fps())), (10, 70), cv2.FONT_HERSHEY_PLAIN, 3, (255, 0, 255), 3)
 
         cv2.imshow("Image", img)
         if cv2.waitKey(1) & 0xFF == ord('q'):
@@ -75,4 +268,9 @@ def main():
     cv2.destroyAllWindows()
 
 if __name__ == "__main__":
-    main()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="HandDetector test script")
+    parser.add_argument("--source", default="0", help="Camera index or path to a video file")
+    args = parser.parse_args()
+    main(args.source)
@@ -0,0 +1,207 @@
+import argparse
+import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+from dataset_store import DatasetStore, DEFAULT_STORE_PATH
+
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mov", ".mkv", ".webm")
+# Per-store record of ingested videos, keyed by content checksum
+INGEST_LOG = "ingested.json"
+
+# Populated in each worker process by _init_worker
+_worker = {}
+
+
+def find_videos(source):
+    """
+    (path, label) pairs from a directory laid out as <source>/<label>/<video>,
+    or from a CSV manifest with `path` and `label` columns (paths relative to the manifest).
+    """
+    if os.path.isdir(source):
+        videos = []
+        for label in sorted(os.listdir(source)):
+            label_dir = os.path.join(source, label)
+            if os.path.isdir(label_dir):
+                for name in sorted(os.listdir(label_dir)):
+                    if name.lower().endswith(VIDEO_EXTENSIONS):
+                        videos.append((os.path.join(label_dir, name), label))
+        return videos
+
+    base = os.path.dirname(os.path.abspath(source))
+    with open(source, newline="") as f:
+        return [(os.path.join(base, row["path"]), row["label"]) for row in csv.DictReader(f) if row.get("path")]
+
+
+def checksum(path, block_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_log(store_path):
+    path = os.path.join(store_path, INGEST_LOG)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def write_log(store_path, log):
+    path = os.path.join(store_path, INGEST_LOG)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(log, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def _init_worker(detector_args, done):
+    # One MediaPipe graph per worker process, reused for all of its videos
+    import cv2
+    from feature_extractor import FeatureExtractor
+    from hand_detector import HandDetector
+
+    cv2.setNumThreads(1) # the pool already uses every core
+    _worker["detector"] = HandDetector(**detector_args)
+    _worker["extractor"] = FeatureExtractor()
+    _worker["done"] = done
+
+
+def _process_video(path, every=1):
+    """
+    Decode one video and detect the first hand on every `every`-th frame
+    (runs in a worker process). Returns a result dict; "skipped" is set when
+    the video's checksum was already ingested, "error" when it failed.
+    """
+    # A corrupt or unreadable file must not take the rest of the run down with it
+    try:
+        return _decode_video(path, every)
+    except Exception as e:
+        return {"path": path, "error": f"{type(e).__name__}: {e}"}
+
+
+def _decode_video(path, every):
+    import cv2
+
+    digest = checksum(path)
+    if digest in _worker["done"]:
+        return {"path": path, "sha256": digest, "skipped": True}
+
+    detector = _worker["detector"]
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        return {"path": path, "sha256": digest, "error": "could not open video"}
+
+    landmarks = []
+    handedness = []
+    frames = 0
+    start = time.perf_counter()
+    try:
+        while True:
+            success, img = cap.read()
+            if not success:
+                break
+            frames += 1
+            if (frames - 1) % every:
+                continue
+            detector.find_hands(img, draw=False)
+            hands, codes, _ = detector.find_landmarks(img, space="pixel")
+            if len(hands):
+                landmarks.append(hands[0].copy())
+                handedness.append(codes[0])
+    finally:
+        cap.release()
+
+    landmarks = np.asarray(landmarks, dtype=np.float32).reshape(-1, 21, 3)
+    handedness = np.asarray(handedness, dtype=np.int8)
+    features = _worker["extractor"].extract_features_batch(landmarks, handedness) if len(landmarks) else None
+    return {"path": path, "sha256": digest, "frames": frames, "seconds": time.perf_counter() - start,
+            "landmarks": landmarks, "handedness": handedness, "features": features}
+
+
+def ingest(videos, store_path=DEFAULT_STORE_PATH, workers=None, every=1, detector_args=None):
+    """
+    Run HandDetector over (path, label) videos in a process pool and append
+    each video's landmarks, handedness and features to the store as one chunk,
+    as soon as it finishes. Videos whose checksum is in the store's ingest log
+    are skipped, so an interrupted run can simply be restarted. Videos that
+    fail are reported and skipped (and not logged, so a rerun retries them).
+    Returns (videos_ingested, rows_added, frames_decoded).
+    """
+    from feature_extractor import FeatureExtractor
+
+    store = DatasetStore(store_path)
+    os.makedirs(store_path, exist_ok=True)
+    log = read_log(store_path)
+    labels = dict(videos)
+    workers = workers or os.cpu_count()
+    print(f"{len(videos)} videos, {len(log)} already ingested, {workers} workers")
+
+    ingested = rows = frames = failed = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(detector_args or {"detection_con": 0.8}, set(log))) as pool:
+        futures = {pool.submit(_process_video, path, every): path for path, _ in videos}
+        for done, future in enumerate(as_completed(futures), 1):
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker itself died (e.g. a crash in native code); the pool is then broken
+                result = {"path": futures[future], "error": f"worker failed: {type(e).__name__}: {e}"}
+            path = result["path"]
+            if result.get("error"):
+                failed += 1
+                print(f"[{done}/{len(videos)}] {path}: {result['error']} - skipped")
+                continue
+            # Also catches identical files that were both queued in this run
+            if result.get("skipped") or result["sha256"] in log:
+                continue
+
+            count = len(result["landmarks"])
+            if count:
+                store.append_chunk([labels[path]] * count, features=result["features"],
+                                   landmarks=result["landmarks"], handedness=result["handedness"],
+                                   feature_version=FeatureExtractor.FEATURE_VERSION)
+            # Logged only after its rows are in the store
+            log[result["sha256"]] = {"path": path, "label": labels[path], "frames": result["frames"], "rows": count}
+            write_log(store_path, log)
+
+            ingested += 1
+            rows += count
+            frames += result["frames"]
+            elapsed = time.perf_counter() - start
+            print(f"[{done}/{len(videos)}] {labels[path]}: {os.path.basename(path)} - "
+                  f"{result['frames']} frames, {count} with a hand | {frames / elapsed:.1f} fps over all workers")
+
+    elapsed = time.perf_counter() - start
+    if frames:
+        print(f"Ingested {ingested} videos: {frames} frames in {elapsed:.1f}s "
+              f"({frames / elapsed:.1f} fps), {rows} rows added to {store_path}")
+    if failed:
+        print(f"{failed} videos failed and were skipped; rerun to retry them")
+    return ingested, rows, frames
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build a dataset from labeled sign videos, headless and in parallel")
+    parser.add_argument("source", help="Directory of <label>/<video> files, or a CSV manifest with path,label columns")
+    parser.add_argument("--store", default=DEFAULT_STORE_PATH, help="Dataset store to append to")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--every", type=int, default=1, help="Only use every N-th frame")
+    parser.add_argument("--detection-con", type=float, default=0.8)
+    parser.add_argument("--compact", action="store_true", help="Merge the per-video chunks afterwards")
+    args = parser.parse_args()
+
+    videos = find_videos(args.source)
+    if not videos:
+        print(f"No videos found in {args.source}")
+        raise SystemExit(1)
+    ingest(videos, args.store, args.workers, args.every, {"detection_con": args.detection_con})
+    if args.compact:
+        DatasetStore(args.store).compact()
+        print(f"Compacted {args.store}")
@@ -0,0 +1,208 @@
+import bisect
+import csv
+import json
+import time
+from collections import deque
+import numpy as np
+
+
+class _NullTimer:
+    """Shared do-nothing context manager handed out while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _Timer:
+    # One reusable timer per stage, so timing a stage allocates nothing
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.instrumentation.record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class RollingHistogram:
+    """
+    Durations of one stage: the last `window` samples (for live percentiles)
+    plus cumulative bucket counts since start (for Prometheus export).
+    """
+
+    BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 1000)
+
+    def __init__(self, window=300):
+        self.samples = np.zeros(window) # milliseconds, ring buffer
+        self.count = 0
+        self.total_ms = 0.0
+        self.buckets = np.zeros(len(self.BUCKETS_MS) + 1, dtype=np.int64) # last bucket is +Inf
+
+    def add(self, ms):
+        self.samples[self.count % len(self.samples)] = ms
+        self.count += 1
+        self.total_ms += ms
+        self.buckets[bisect.bisect_left(self.BUCKETS_MS, ms)] += 1
+
+    def recent(self):
+        return self.samples[:min(self.count, len(self.samples))]
+
+    def summary(self):
+        recent = self.recent()
+        if not len(recent):
+            return {"count": 0}
+        p50, p95, p99 = np.percentile(recent, [50, 95, 99])
+        return {"count": self.count, "mean_ms": float(recent.mean()), "p50_ms": float(p50),
+                "p95_ms": float(p95), "p99_ms": float(p99), "max_ms": float(recent.max())}
+
+
+class Instrumentation:
+    """
+    Per-stage timing of the frame hot path (capture, color convert, MediaPipe,
+    featurize, classify, game update, draw, imshow/waitKey).
+
+        with instrumentation.time("mediapipe"):
+            results = hands.process(img_rgb)
+
+    Disabled (the default), time() returns a shared no-op context manager and
+    record()/frame_done() return immediately, so instrumented code costs next
+    to nothing. Enabled, every stage keeps a RollingHistogram; the optional
+    trace keeps the last `trace_limit` (frame, stage, ms) rows for export.
+    Each stage should only be recorded from one thread; readers take a
+    snapshot of the stage table, so other threads may report at any time.
+    """
+
+    def __init__(self, enabled=False, window=300, trace_limit=None):
+        self.enabled = enabled
+        self.window = window
+        self.stages = {} # stage name -> RollingHistogram, in first-recorded order
+        self._timers = {}
+        self.frame_times = np.zeros(window) # end time of recent frames, ring buffer
+        self.frames = 0
+        self.trace = deque(maxlen=trace_limit) if trace_limit else None
+
+    def time(self, name):
+        """Context manager timing one stage"""
+        if not self.enabled:
+            return _NULL_TIMER
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _Timer(self, name)
+        return timer
+
+    def record(self, name, seconds):
+        if not self.enabled:
+            return
+        histogram = self.stages.get(name)
+        if histogram is None:
+            histogram = self.stages[name] = RollingHistogram(self.window)
+        histogram.add(seconds * 1000.0)
+        if self.trace is not None:
+            self.trace.append((self.frames, name, seconds * 1000.0))
+
+    def frame_done(self):
+        """Mark the end of a frame (for the rolling FPS)"""
+        if not self.enabled:
+            return
+        self.frame_times[self.frames % self.window] = time.perf_counter()
+        self.frames += 1
+
+    def fps(self):
+        """Frames per second over the last `window` frames (0 until two frames are done)"""
+        n = min(self.frames, self.window)
+        if n < 2:
+            return 0.0
+        newest = self.frame_times[(self.frames - 1) % self.window]
+        oldest = self.frame_times[(self.frames - n) % self.window]
+        return (n - 1) / (newest - oldest) if newest > oldest else 0.0
+
+    def summary(self):
+        return {"frames": self.frames, "fps": self.fps(),
+                "stages": {name: histogram.summary() for name, histogram in list(self.stages.items())}}
+
+    def draw_overlay(self, img, origin=(10, 110), frame_budget_ms=33.3):
+        """
+        Draw FPS and per-stage p50/p95 latency with bars (full width = frame_budget_ms)
+        onto a BGR image.
+        """
+        import cv2
+
+        stages = list(self.stages.items())
+        x, y = origin
+        line = 18
+        bar_width = 120
+        height = line * (len(stages) + 1) + 8
+        panel = img[y:y + height, x:x + 340]
+        panel[:] = panel // 3 # darken the background behind the text
+
+        cv2.putText(img, f"FPS {self.fps():5.1f}", (x + 4, y + 14), cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 1)
+        for i, (name, histogram) in enumerate(stages):
+            row = y + line * (i + 2)
+            stats = histogram.summary()
+            if not stats["count"]:
+                continue
+            cv2.putText(img, f"{name[:14]:<14}{stats['p50_ms']:6.1f}{stats['p95_ms']:6.1f}",
+                        (x + 4, row), cv2.FONT_HERSHEY_PLAIN, 1, (255, 255, 255), 1)
+            bar_x = x + 212
+            p50 = int(min(stats["p50_ms"] / frame_budget_ms, 1.0) * bar_width)
+            p95 = int(min(stats["p95_ms"] / frame_budget_ms, 1.0) * bar_width)
+            cv2.rectangle(img, (bar_x, row - 10), (bar_x + p50, row - 2), (0, 200, 0), cv2.FILLED)
+            cv2.line(img, (bar_x + p95, row - 12), (bar_x + p95, row), (0, 200, 255), 2)
+        return img
+
+    def export(self, path):
+        """
+        Write the metrics to `path`, by extension:
+        .json - summary (and trace rows, if kept); .csv - trace rows
+        (frame, stage, ms), or one summary row per stage without a trace;
+        anything else - Prometheus text exposition format.
+        """
+        if path.endswith(".json"):
+            data = self.summary()
+            if self.trace is not None:
+                data["trace"] = [{"frame": f, "stage": s, "ms": ms} for f, s, ms in self.trace]
+            with open(path, "w") as f:
+                json.dump(data, f, indent=2)
+        elif path.endswith(".csv"):
+            with open(path, "w", newline="") as f:
+                writer = csv.writer(f)
+                if self.trace is not None:
+                    writer.writerow(["frame", "stage", "ms"])
+                    writer.writerows((frame, stage, f"{ms:.4f}") for frame, stage, ms in self.trace)
+                else:
+                    columns = ["count", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]
+                    writer.writerow(["stage"] + columns)
+                    for name, histogram in list(self.stages.items()):
+                        stats = histogram.summary()
+                        writer.writerow([name] + [stats.get(c, "") for c in columns])
+        else:
+            with open(path, "w") as f:
+                f.write(self.prometheus())
+
+    def prometheus(self):
+        """Metrics in the Prometheus text exposition format"""
+        lines = ["# HELP signspell_stage_seconds Time spent in each per-frame stage",
+                 "# TYPE signspell_stage_seconds histogram"]
+        bounds = [f"{ms / 1000:g}" for ms in RollingHistogram.BUCKETS_MS] + ["+Inf"]
+        for name, histogram in list(self.stages.items()):
+            for bound, count in zip(bounds, np.cumsum(histogram.buckets)):
+                lines.append(f'signspell_stage_seconds_bucket{{stage="{name}",le="{bound}"}} {count}')
+            lines.append(f'signspell_stage_seconds_sum{{stage="{name}"}} {histogram.total_ms / 1000:.6f}')
+            lines.append(f'signspell_stage_seconds_count{{stage="{name}"}} {histogram.count}')
+        lines += ["# HELP signspell_fps Frames per second over the recent window",
+                  "# TYPE signspell_fps gauge",
+                  f"signspell_fps {self.fps():.3f}",
+                  "# TYPE signspell_frames_total counter",
+                  f"signspell_frames_total {self.frames}"]
+        return "\n".join(lines) + "\n"
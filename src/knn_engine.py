@@ -0,0 +1,360 @@
+import numpy as np
+
+class KNNEngine:
+    """
+    Low-latency k-nearest-neighbor inference.
+
+    Holds the reference vectors of a fitted KNN model in one contiguous
+    array and answers label + confidence with a single vectorized
+    brute-force distance pass, without going through sklearn's input
+    validation. Results match KNeighborsClassifier.predict/predict_proba
+    whenever the k nearest neighbors are unambiguous. When several references
+    tie at the k-th distance (e.g. duplicate or integer-valued vectors), which
+    of them count is implementation-defined, here as in sklearn, where it
+    depends on the tree or brute-force heap order, so labels can differ on
+    such queries. A tied vote goes to the first class in order, as in sklearn.
+    """
+
+    SUPPORTED_METRICS = ('euclidean', 'manhattan', 'chebyshev', 'minkowski')
+    # Extra candidates re-ranked exactly after the euclidean shortcut
+    CANDIDATE_SLACK = 8
+
+    def __init__(self, reference, labels, classes, n_neighbors=5, weights='uniform',
+                 metric='euclidean', p=2, batch_size=256, ref_sq_norms=None):
+        """
+        reference: (N, F) training vectors
+        labels: (N,) class indices into `classes`
+        classes: sorted class labels, as in KNeighborsClassifier.classes_
+        ref_sq_norms: optional precomputed squared norms of the reference vectors
+        """
+        if weights not in ('uniform', 'distance'):
+            raise ValueError(f"Unsupported weights: {weights}")
+        if metric not in self.SUPPORTED_METRICS:
+            raise ValueError(f"Unsupported metric: {metric}")
+        if metric == 'minkowski':
+            # Collapse to the specialised kernels where possible
+            if p == 1:
+                metric = 'manhattan'
+            elif p == 2:
+                metric = 'euclidean'
+            elif p == np.inf:
+                metric = 'chebyshev'
+
+        # float64 keeps distances (and therefore neighbor order) identical to sklearn
+        self.reference = np.ascontiguousarray(reference, dtype=np.float64)
+        self.labels = np.ascontiguousarray(labels, dtype=np.intp)
+        self.classes = np.asarray(classes)
+        self.k = n_neighbors
+        self.n_neighbors = min(n_neighbors, len(self.reference))
+        self.weights = weights
+        self.metric = metric
+        self.p = p
+        self.batch_size = batch_size
+
+        # Squared norms for the |r|^2 - 2 r.q + |q|^2 euclidean shortcut
+        if ref_sq_norms is None:
+            ref_sq_norms = np.einsum('ij,ij->i', self.reference, self.reference)
+        self._ref_sq_norms = ref_sq_norms
+        self._max_sq_norm = self._ref_sq_norms.max() if len(self.reference) else 0.0
+
+        # Incremental updates (see add): the arrays above become views of
+        # over-allocated buffers owned by the engine on the first insert
+        self.max_per_class = None
+        self._buffers = None
+        self._class_counts = np.bincount(self.labels, minlength=len(self.classes))
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """Build an engine from a fitted sklearn KNeighborsClassifier"""
+        metric = model.effective_metric_
+        p = model.effective_metric_params_.get('p', 2)
+        if metric == 'l2':
+            metric = 'euclidean'
+        elif metric in ('l1', 'cityblock'):
+            metric = 'manhattan'
+        return cls(model._fit_X, model._y, model.classes_,
+                   n_neighbors=model.n_neighbors, weights=model.weights,
+                   metric=metric, p=p)
+
+    @property
+    def num_features(self):
+        return self.reference.shape[1]
+
+    def class_index(self, label):
+        """
+        Index of `label` in self.classes, adding it as a new class if needed.
+        Classes stay sorted like sklearn's classes_, so adding one renumbers the labels.
+        """
+        pos = int(np.searchsorted(self.classes, label))
+        if pos < len(self.classes) and self.classes[pos] == label:
+            return pos
+
+        # concatenate (unlike insert) widens the string dtype for longer labels
+        classes = np.sort(np.concatenate([self.classes, np.asarray([label])]))
+        remap = np.searchsorted(classes, self.classes)
+        self._own_buffers(0)
+        self.labels[:] = remap[self.labels]
+        self.classes = classes
+        self._class_counts = np.insert(self._class_counts, pos, 0)
+        return pos
+
+    def add(self, rows, labels):
+        """
+        Insert (N, F) reference vectors with their class labels (values, not
+        indices; unseen classes are added). Buffers grow by doubling, so an
+        insert costs O(N) amortized, independent of the index size.
+        If max_per_class is set, the oldest samples of a class beyond the cap
+        are dropped.
+        """
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, self.num_features)
+        labels = np.asarray(labels)
+        # Register new classes first: each one renumbers the codes after it
+        for label in np.unique(labels):
+            self.class_index(label)
+        codes = np.searchsorted(self.classes, labels).astype(np.intp)
+        if len(codes) != len(rows):
+            raise ValueError("add needs one label per row")
+
+        self._own_buffers(len(rows))
+        start, end = len(self.reference), len(self.reference) + len(rows)
+        reference, label_buf, sq_norms, ages = self._buffers
+        reference[start:end] = rows
+        label_buf[start:end] = codes
+        sq_norms[start:end] = np.einsum('ij,ij->i', rows, rows)
+        ages[start:end] = np.arange(self._next_age, self._next_age + len(rows))
+        self._next_age += len(rows)
+        self._set_size(end)
+
+        self._max_sq_norm = max(self._max_sq_norm, sq_norms[start:end].max(initial=0.0))
+        self._class_counts += np.bincount(codes, minlength=len(self.classes))
+        if self.max_per_class is not None and self._class_counts.max() > self._trim_threshold():
+            self.trim(self.max_per_class)
+
+    def trim(self, max_per_class):
+        """Keep only the newest max_per_class samples of every class"""
+        if self._class_counts.max(initial=0) <= max_per_class:
+            return
+        self._own_buffers(0)
+        reference, label_buf, sq_norms, ages = self._buffers
+        size = len(self.reference)
+
+        # Newest first within each class, then keep the first max_per_class of each
+        order = np.lexsort((-ages[:size], label_buf[:size]))
+        sorted_labels = label_buf[:size][order]
+        first = np.searchsorted(sorted_labels, sorted_labels)
+        keep = np.sort(order[np.arange(size) - first < max_per_class])
+
+        new_size = len(keep)
+        for buf in self._buffers:
+            buf[:new_size] = buf[:size][keep]
+        self._set_size(new_size)
+        # _max_sq_norm stays an upper bound, which keeps the shortcut's error check valid
+        self._class_counts = np.bincount(self.labels, minlength=len(self.classes))
+
+    def _trim_threshold(self):
+        # Classes may overshoot the cap by 1/8 before a trim, so trims
+        # (which compact the whole index) stay amortized across inserts
+        return self.max_per_class + max(1, self.max_per_class // 8)
+
+    def _own_buffers(self, extra):
+        """Make sure the engine owns writable buffers with room for `extra` more rows"""
+        size = len(self.reference)
+        if self._buffers is not None and len(self._buffers[0]) >= size + extra:
+            return
+        capacity = max(size + extra, 2 * size, 64)
+        reference = np.empty((capacity, self.num_features))
+        label_buf = np.empty(capacity, dtype=np.intp)
+        sq_norms = np.empty(capacity)
+        ages = np.empty(capacity, dtype=np.int64)
+        reference[:size] = self.reference
+        label_buf[:size] = self.labels
+        sq_norms[:size] = self._ref_sq_norms
+        if self._buffers is None:
+            ages[:size] = np.arange(size)
+            self._next_age = size
+        else:
+            ages[:size] = self._buffers[3][:size]
+        self._buffers = (reference, label_buf, sq_norms, ages)
+        self._set_size(size)
+
+    def _set_size(self, size):
+        reference, label_buf, sq_norms, _ = self._buffers
+        self.reference = reference[:size]
+        self.labels = label_buf[:size]
+        self._ref_sq_norms = sq_norms[:size]
+        self.n_neighbors = min(self.k, size)
+
+    def predict(self, features, layer=None):
+        """
+        Return (label, confidence) for a single feature vector.
+        layer: optional engine with extra references (e.g. one user's samples)
+        searched together with this one; see predict_proba.
+        """
+        row = np.asarray(features, dtype=np.float64).ravel()
+        if layer is not None and len(layer.reference):
+            proba = self.predict_proba(row, layer)[0]
+            best = proba.argmax()
+            return self.classes[best], proba[best]
+        if self.metric != 'euclidean' or len(self.reference) <= self.n_neighbors + self.CANDIDATE_SLACK:
+            proba = self._proba(row.reshape(1, -1))[0]
+            best = np.argmax(proba)
+            return self.classes[best], proba[best]
+
+        # Per-frame fast path: same algorithm as _neighbors, specialised to
+        # one row to avoid the batch bookkeeping
+        k = self.n_neighbors
+        m = k + self.CANDIDATE_SLACK
+        approx = self._ref_sq_norms - 2.0 * (self.reference @ row)
+        part = approx.argpartition(m)
+        cand = part[:m]
+        diff = self.reference[cand] - row
+        cand_dist = np.sqrt(np.einsum('ij,ij->i', diff, diff))
+        order = cand_dist.argpartition(k - 1)[:k]
+        neigh_dist = cand_dist[order]
+
+        q_sq = row @ row
+        if approx[part[m]] + q_sq - 1e-9 * (self._max_sq_norm + q_sq) <= neigh_dist.max() ** 2:
+            # Shortcut rounding could have hidden a closer reference
+            proba = self._proba(row.reshape(1, -1))[0]
+        else:
+            proba = self._votes(self.labels[cand[order]], neigh_dist)
+        best = proba.argmax()
+        return self.classes[best], proba[best]
+
+    def predict_batch(self, rows, layer=None):
+        """Return (labels, confidences) arrays for an (N, F) batch of feature vectors"""
+        proba = self.predict_proba(rows, layer)
+        best = np.argmax(proba, axis=1)
+        return self.classes[best], proba[np.arange(len(best)), best]
+
+    def predict_proba(self, rows, layer=None):
+        """
+        Class probabilities for an (N, F) batch, columns ordered as self.classes.
+        With a layer, the k nearest neighbors are taken from the union of both
+        engines' references; the layer's classes must all be in self.classes.
+        """
+        rows = np.asarray(rows, dtype=np.float64)
+        if rows.ndim == 1:
+            rows = rows.reshape(1, -1)
+        if layer is not None and len(layer.reference):
+            proba = self._layered_proba
+            proba_args = (layer,)
+        else:
+            proba = self._proba
+            proba_args = ()
+        if len(rows) <= self.batch_size:
+            return proba(rows, *proba_args)
+        return np.concatenate([proba(rows[i:i + self.batch_size], *proba_args)
+                               for i in range(0, len(rows), self.batch_size)])
+
+    def _distances(self, rows, reference=None):
+        """Exact distances from each row to each reference vector"""
+        if reference is None:
+            reference = self.reference[np.newaxis, :, :]
+        diff = np.abs(rows[:, np.newaxis, :] - reference)
+        if self.metric == 'euclidean':
+            return np.sqrt(np.sum(diff * diff, axis=2))
+        if self.metric == 'manhattan':
+            return np.sum(diff, axis=2)
+        if self.metric == 'chebyshev':
+            return np.max(diff, axis=2)
+        return np.sum(diff ** self.p, axis=2) ** (1.0 / self.p)
+
+    def _neighbors(self, rows):
+        """Indices (N, k) and exact distances (N, k) of the k nearest references"""
+        k = self.n_neighbors
+        n_ref = len(self.reference)
+        if self.metric != 'euclidean' or n_ref <= k + self.CANDIDATE_SLACK:
+            dist = self._distances(rows)
+            if k < n_ref:
+                neigh = np.argpartition(dist, k - 1, axis=1)[:, :k]
+            else:
+                neigh = np.broadcast_to(np.arange(n_ref), dist.shape)
+            return neigh, np.take_along_axis(dist, neigh, axis=1)
+
+        # Cheap squared distances from one matrix product pick a small
+        # candidate set, which is then re-ranked with exact distances
+        q_sq = np.einsum('ij,ij->i', rows, rows)
+        approx = self._ref_sq_norms[np.newaxis, :] - 2.0 * (rows @ self.reference.T)
+        approx += q_sq[:, np.newaxis]
+        m = k + self.CANDIDATE_SLACK
+        part = np.argpartition(approx, m, axis=1)
+        cand = part[:, :m]
+        boundary = np.take_along_axis(approx, part[:, m:m + 1], axis=1)[:, 0]
+
+        cand_dist = self._distances(rows, self.reference[cand])
+        order = np.argpartition(cand_dist, k - 1, axis=1)[:, :k]
+        neigh = np.take_along_axis(cand, order, axis=1)
+        neigh_dist = np.take_along_axis(cand_dist, order, axis=1)
+
+        # Rounding in the shortcut is bounded by a few ulps of the norms; if an
+        # excluded reference could still beat the k-th candidate, redo that row exactly
+        unsafe = boundary - 1e-9 * (self._max_sq_norm + q_sq) <= neigh_dist.max(axis=1) ** 2
+        for i in np.flatnonzero(unsafe):
+            dist = self._distances(rows[i:i + 1])[0]
+            neigh[i] = np.argpartition(dist, k - 1)[:k]
+            neigh_dist[i] = dist[neigh[i]]
+        return neigh, neigh_dist
+
+    def _proba(self, rows):
+        neigh, neigh_dist = self._neighbors(rows)
+        neigh_labels = self.labels[neigh]
+
+        weights = self._weights(neigh_dist)
+        return self._tally(neigh_labels, weights)
+
+    def _layered_proba(self, rows, layer):
+        # The k nearest of the union are among each side's own k nearest
+        neigh_labels = []
+        neigh_dists = []
+        for engine in (self, layer):
+            if len(engine.reference):
+                neigh, neigh_dist = engine._neighbors(rows)
+                labels = engine.labels[neigh]
+                if engine is layer:
+                    labels = np.searchsorted(self.classes, layer.classes)[labels]
+                neigh_labels.append(labels)
+                neigh_dists.append(neigh_dist)
+        neigh_labels = np.concatenate(neigh_labels, axis=1)
+        neigh_dist = np.concatenate(neigh_dists, axis=1)
+
+        k = min(self.k, neigh_dist.shape[1])
+        if k < neigh_dist.shape[1]:
+            order = np.argpartition(neigh_dist, k - 1, axis=1)[:, :k]
+            neigh_labels = np.take_along_axis(neigh_labels, order, axis=1)
+            neigh_dist = np.take_along_axis(neigh_dist, order, axis=1)
+        return self._tally(neigh_labels, self._weights(neigh_dist))
+
+    def _votes(self, neigh_labels, neigh_dist):
+        """Class probabilities for one row from its neighbor labels and distances"""
+        n_classes = len(self.classes)
+        if self.weights == 'uniform':
+            return np.bincount(neigh_labels, minlength=n_classes) / len(neigh_labels)
+        exact = neigh_dist == 0.0
+        if exact.any():
+            votes = np.bincount(neigh_labels[exact], minlength=n_classes)
+        else:
+            votes = np.bincount(neigh_labels, weights=1.0 / neigh_dist, minlength=n_classes)
+        return votes / votes.sum()
+
+    def _weights(self, neigh_dist):
+        if self.weights == 'uniform':
+            return np.ones_like(neigh_dist)
+        # Same convention as sklearn: exact matches take all the weight
+        with np.errstate(divide='ignore'):
+            weights = 1.0 / neigh_dist
+        inf_mask = np.isinf(weights)
+        inf_row = np.any(inf_mask, axis=1)
+        weights[inf_row] = inf_mask[inf_row]
+        return weights
+
+    def _tally(self, neigh_labels, weights):
+        rows = neigh_labels.shape[0]
+        # Per-row vote tallies via one flat bincount over (row, class) slots
+        n_classes = len(self.classes)
+        slots = neigh_labels + n_classes * np.arange(rows)[:, np.newaxis]
+        proba = np.bincount(slots.ravel(), weights=weights.ravel(),
+                            minlength=rows * n_classes).reshape(rows, n_classes)
+        normalizer = proba.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        return proba / normalizer
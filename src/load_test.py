@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from benchmark import PERCENTILES, synthetic_landmarks
+from server import read_message
+
+
+async def request(reader, writer, method, path, payload=None):
+    """One request on a keep-alive connection. Returns (status code, decoded JSON body)"""
+    body = json.dumps(payload).encode() if payload is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+    await writer.drain()
+    message = await read_message(reader)
+    if message is None:
+        raise ConnectionError("server closed the connection")
+    start_line, _, response = message
+    return int(start_line.split(" ")[1]), json.loads(response)
+
+
+async def run_session(host, port, frames, fps, stop_time, latencies, errors):
+    """
+    One simulated front end: starts a game, then sends landmark frames at
+    `fps` (as fast as possible with fps 0) until stop_time.
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    session = None
+    interval = 1.0 / fps if fps else 0.0
+    next_send = time.perf_counter()
+    i = 0
+    try:
+        while time.perf_counter() < stop_time:
+            payload = {"session": session, "landmarks": frames[i % len(frames)], "start": session is None}
+            start = time.perf_counter()
+            status, response = await request(reader, writer, "POST", "/predict", payload)
+            latencies.append(time.perf_counter() - start)
+            if status != 200:
+                errors.append(response.get("error", status))
+            else:
+                session = response["session"]
+            i += 1
+            if interval:
+                next_send += interval
+                wait = next_send - time.perf_counter()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+    finally:
+        writer.close()
+
+
+async def load_test(host="127.0.0.1", port=8765, sessions=50, fps=30, duration=10.0, seed=0):
+    """
+    Run `sessions` concurrent clients against the server for `duration` seconds.
+    Returns a report with throughput, latency percentiles and the server's batching stats.
+    """
+    # Hand-shaped landmarks with jitter, as JSON-ready lists; sessions start at different offsets
+    frames = synthetic_landmarks(256, seed).tolist()
+    latencies = []
+    errors = []
+    start = time.perf_counter()
+    stop_time = start + duration
+    await asyncio.gather(*(run_session(host, port, frames[i % len(frames):] + frames[:i % len(frames)], fps,
+                                       stop_time, latencies, errors) for i in range(sessions)))
+    elapsed = time.perf_counter() - start
+
+    reader, writer = await asyncio.open_connection(host, port)
+    _, server_stats = await request(reader, writer, "GET", "/stats")
+    writer.close()
+
+    latencies_ms = np.asarray(latencies) * 1000
+    report = {"sessions": sessions, "fps_per_session": fps, "duration_s": elapsed, "requests": len(latencies),
+              "errors": len(errors), "throughput_rps": len(latencies) / elapsed, "server": server_stats}
+    if len(latencies_ms):
+        report.update({f"p{p}_ms": float(np.percentile(latencies_ms, p)) for p in PERCENTILES})
+        report["max_ms"] = float(latencies_ms.max())
+    return report
+
+
+def print_report(report):
+    print(f"{report['sessions']} sessions at " + (f"{report['fps_per_session']:g} FPS" if report["fps_per_session"]
+                                                  else "max rate") + f" for {report['duration_s']:.1f}s")
+    print(f"  requests:   {report['requests']} ({report['errors']} errors)")
+    print(f"  throughput: {report['throughput_rps']:.0f} requests/s")
+    if report["requests"]:
+        print("  latency:    " + "  ".join(f"p{p} {report[f'p{p}_ms']:.2f} ms" for p in PERCENTILES)
+              + f"  max {report['max_ms']:.2f} ms")
+    server = report["server"]
+    print(f"  server:     mean batch {server['mean_batch_size']:.1f}, max batch {server['max_batch_size']}, "
+          f"{server['sessions']} sessions")
+
+
+def spawn_server(port, extra_args=()):
+    """Start server.py (with a throwaway model) as a subprocess and wait until it listens"""
+    server = subprocess.Popen([sys.executable, "server.py", "--port", str(port), "--demo-model", *extra_args],
+                              cwd=os.path.dirname(os.path.abspath(__file__)), stdout=subprocess.PIPE, text=True)
+    for line in server.stdout:
+        if line.startswith("Serving on"):
+            return server
+    server.wait()
+    raise RuntimeError("server.py exited before listening")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load-test the inference server with concurrent simulated sessions")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--fps", type=float, default=30, help="Frames per second per session (0: as fast as possible)")
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--spawn", action="store_true", help="Start a local server.py --demo-model for the test")
+    parser.add_argument("--max-batch", type=int, default=None, help="With --spawn: the server's --max-batch")
+    parser.add_argument("--output", help="Write the report as JSON")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        server = spawn_server(args.port, ["--max-batch", str(args.max_batch)] if args.max_batch else [])
+    try:
+        report = asyncio.run(load_test(args.host, args.port, args.sessions, args.fps, args.duration))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+    print_report(report)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
@@ -1,21 +1,98 @@
-import cv2
-import time
-import numpy as np
-from hand_detector import HandDetector
-from feature_extractor import FeatureExtractor
-from classifier import SignClassifier
-from game_engine import GameEngine
-
-def main():
-    # Initialize components
-    detector = HandDetector(detection_con=0.8)
-    extractor = FeatureExtractor()
-    classifier = SignClassifier() # Will try to load model
+import argparse
+from startup_profiler import StartupProfiler
+
+# Started before the heavy imports so --profile-startup covers them
+startup = StartupProfiler()
+
+with startup.stage("import cv2"):
+    import cv2
+with startup.stage("import app modules"):
+    from game_engine import GameEngine
+    from instrumentation import Instrumentation
+    from overlay import OverlayCompositor
+    from pipeline import RecognitionPipeline, open_source
+
+# UI text is rendered once per distinct content and copied into each frame
+overlay = OverlayCompositor()
+
+def draw_ui(img, ui_data, predicted_sign, confidence):
+    h, w, c = img.shape
+    
+    # Draw Status Bar
+    img[:81] = 0 # rows 0..80, like cv2.rectangle((0, 0), (w, 80))
+    
+    if ui_data["state"] == GameEngine.STATE_MENU:
+        overlay.put_text(img, "Press SPACE to Start", (50, 50), 3, (255, 255, 255), 3, background=(0, 0, 0))
+    
+    elif ui_data["state"] == GameEngine.STATE_PLAYING or ui_data["state"] == GameEngine.STATE_FEEDBACK:
+        # Score (top left); the status bar sprites are opaque
+        overlay.put_text(img, f"Score: {ui_data['score']}", (20, 50), 2.5, (255, 255, 255), 3, background=(0, 0, 0))
+        # Time (top right)
+        overlay.put_text(img, f"Time: {ui_data['time_left']}", (w - 20, 50), 2.5, (255, 255, 255), 3,
+                         background=(0, 0, 0), align="right")
+        
+        # Feedback (center top)
+        if ui_data["state"] == GameEngine.STATE_FEEDBACK:
+            overlay.put_text(img, ui_data["feedback"], (w // 2, 150), 3, (0, 255, 255), 3, align="center")
+        
+        # Target letter - LARGE at top right corner, on a black box
+        target = overlay.text_sprite(ui_data['target'], 8, (0, 255, 0), 12, background=(0, 0, 0), padding=25)
+        overlay.blit(img, target, w - 50 - target.text_width - target.anchor_x,
+                     100 + target.text_height - target.anchor_y)
+        
+        # Show current prediction (top center, smaller)
+        if predicted_sign:
+            color = (0, 255, 0) if predicted_sign == ui_data["target"] else (0, 0, 255)
+            overlay.put_text(img, f"You: {predicted_sign} ({int(confidence*100)}%)", (w // 2, 100), 2, color, 2,
+                             align="center")
+
+    elif ui_data["state"] == GameEngine.STATE_GAME_OVER:
+        overlay.put_text(img, "GAME OVER", (w//2 - 150, h//2), 5, (0, 0, 255), 5)
+        overlay.put_text(img, f"Final Score: {ui_data['score']}", (w//2 - 150, h//2 + 60), 3, (255, 255, 255), 3)
+        overlay.put_text(img, "Press SPACE to Restart", (w//2 - 200, h//2 + 120), 2, (200, 200, 200), 2)
+
+
+def main(source=0, roi_tracking=False, profile_startup=False, user=None, sequences=None,
+         metrics=False, metrics_out=None, target_fps=None, prediction_cache=None):
+    # Disabled instrumentation costs next to nothing, so it is always wired in
+    instrumentation = Instrumentation(enabled=metrics or metrics_out is not None)
+    show_metrics = [metrics]
+
+    # Initialize components; MediaPipe and the model are only loaded here
+    with startup.stage("import mediapipe"):
+        import mediapipe
+        from hand_detector import HandDetector
+    with startup.stage("build MediaPipe graph"):
+        detector = HandDetector(detection_con=0.8, roi_tracking=roi_tracking, instrumentation=instrumentation)
+    with startup.stage("load model"):
+        from classifier import SignClassifier
+        classifier = SignClassifier() # Will try to load model
+        # Personal samples recorded with data_collector.py --user
+        classifier.load_user(user)
+        if prediction_cache and classifier.model is not None:
+            # Reuse predictions while the hand is held still
+            classifier.enable_cache(prediction_cache)
+    # The feature set the loaded model was trained on
+    extractor = classifier.feature_extractor()
     game = GameEngine()
 
-    cap = cv2.VideoCapture(0)
-    cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+    sequence = None
+    if sequences:
+        from sequence_recognizer import SequenceRecognizer
+
+        with startup.stage("load sequence templates"):
+            sequence = SequenceRecognizer()
+            loaded = sequence.load_templates(sequences)
+        if loaded:
+            # Moving signs become targets too
+            game.signs = game.signs + [label for label in sequence.classes if label not in game.signs]
+            print(f"Loaded {loaded} motion templates for {', '.join(sequence.classes)}")
+        else:
+            print(f"No motion templates in {sequences}. Record some with sequence_recognizer.py record.")
+            sequence = None
+
+    with startup.stage("open camera"):
+        cap = open_source(source)
     
     # Check if model is loaded
     if classifier.model is None:
@@ -25,99 +102,97 @@ def main():
     print("Starting Sign Spell AI...")
     print("Press 'SPACE' to start game.")
     print("Press 'q' to quit.")
+    if instrumentation.enabled:
+        print("Press 'm' to toggle the metrics overlay.")
 
-    while True:
-        success, img = cap.read()
-        if not success:
-            break
-
-        # 1. Detect Hands
-        img = detector.find_hands(img)
-        lm_list = detector.find_position(img, draw=False)
+    governor = None
+    if target_fps:
+        from governor import Governor
 
-        predicted_sign = None
-        confidence = 0.0
+        # Lowers detection quality step by step if frames take longer than the target allows
+        governor = Governor(detector, target_fps)
 
-        # 2. Extract Features & Predict
-        if len(lm_list) != 0:
-            features = extractor.extract_features(lm_list)
-            if features and classifier.model is not None:
-                predicted_sign, confidence = classifier.predict(features)
+    # Capture and detection/classification run on worker threads;
+    # drawing and window events stay on this thread
+    pipeline = RecognitionPipeline(cap, detector, extractor, classifier, game, sequence=sequence,
+                                   instrumentation=instrumentation, governor=governor)
 
-        # 3. Update Game State
-        game.update(predicted_sign, confidence)
-        ui_data = game.get_ui_data()
+    def render(result):
+        ui_data = result.ui_data
+        img = result.img
+        with instrumentation.time("draw"):
+            draw_ui(img, ui_data, result.predicted_sign, result.confidence)
+            if show_metrics[0]:
+                instrumentation.draw_overlay(img)
 
-        # 4. Draw UI
-        h, w, c = img.shape
-        
-        # Draw Status Bar
-        cv2.rectangle(img, (0, 0), (w, 80), (0, 0, 0), cv2.FILLED)
-        
-        if ui_data["state"] == GameEngine.STATE_MENU:
-            cv2.putText(img, "Press SPACE to Start", (50, 50), 
-                        cv2.FONT_HERSHEY_PLAIN, 3, (255, 255, 255), 3)
-        
-        elif ui_data["state"] == GameEngine.STATE_PLAYING or ui_data["state"] == GameEngine.STATE_FEEDBACK:
-            # Score (top left)
-            cv2.putText(img, f"Score: {ui_data['score']}", (20, 50), 
-                        cv2.FONT_HERSHEY_PLAIN, 2.5, (255, 255, 255), 3)
-            # Time (top right)
-            time_text = f"Time: {ui_data['time_left']}"
-            time_size = cv2.getTextSize(time_text, cv2.FONT_HERSHEY_PLAIN, 2.5, 3)[0]
-            cv2.putText(img, time_text, (w - time_size[0] - 20, 50), 
-                        cv2.FONT_HERSHEY_PLAIN, 2.5, (255, 255, 255), 3)
-            
-            # Feedback (center top)
-            if ui_data["state"] == GameEngine.STATE_FEEDBACK:
-                feedback_size = cv2.getTextSize(ui_data["feedback"], cv2.FONT_HERSHEY_PLAIN, 3, 3)[0]
-                cv2.putText(img, ui_data["feedback"], ((w - feedback_size[0]) // 2, 150), 
-                            cv2.FONT_HERSHEY_PLAIN, 3, (0, 255, 255), 3)
-            
-            # Target letter - LARGE at top right corner
-            target_text = ui_data['target']
-            font_scale = 8
-            thickness = 12
-            target_size = cv2.getTextSize(target_text, cv2.FONT_HERSHEY_PLAIN, font_scale, thickness)[0]
-            target_x = w - target_size[0] - 50
-            target_y = target_size[1] + 100
-            
-            # Draw background rectangle for target
-            padding = 25
-            cv2.rectangle(img, 
-                         (target_x - padding, target_y - target_size[1] - padding),
-                         (target_x + target_size[0] + padding, target_y + padding),
-                         (0, 0, 0), cv2.FILLED)
-            cv2.putText(img, target_text, (target_x, target_y), 
-                        cv2.FONT_HERSHEY_PLAIN, font_scale, (0, 255, 0), thickness)
-            
-            # Show current prediction (top center, smaller)
-            if predicted_sign:
-                color = (0, 255, 0) if predicted_sign == ui_data["target"] else (0, 0, 255)
-                pred_text = f"You: {predicted_sign} ({int(confidence*100)}%)"
-                pred_size = cv2.getTextSize(pred_text, cv2.FONT_HERSHEY_PLAIN, 2, 2)[0]
-                cv2.putText(img, pred_text, ((w - pred_size[0]) // 2, 100), 
-                            cv2.FONT_HERSHEY_PLAIN, 2, color, 2)
-
-        elif ui_data["state"] == GameEngine.STATE_GAME_OVER:
-            cv2.putText(img, "GAME OVER", (w//2 - 150, h//2), 
-                        cv2.FONT_HERSHEY_PLAIN, 5, (0, 0, 255), 5)
-            cv2.putText(img, f"Final Score: {ui_data['score']}", (w//2 - 150, h//2 + 60), 
-                        cv2.FONT_HERSHEY_PLAIN, 3, (255, 255, 255), 3)
-            cv2.putText(img, "Press SPACE to Restart", (w//2 - 200, h//2 + 120), 
-                        cv2.FONT_HERSHEY_PLAIN, 2, (200, 200, 200), 2)
-
-        cv2.imshow("Sign Spell AI", img)
-        
-        key = cv2.waitKey(1)
+        with instrumentation.time("imshow/waitKey"):
+            cv2.imshow("Sign Spell AI", img)
+            key = cv2.waitKey(1)
+        instrumentation.frame_done()
+        if startup.first_frame is None:
+            startup.mark_first_frame()
+            if profile_startup:
+                startup.report()
         if key == ord('q'):
-            break
+            return False
+        elif key == ord('m') and instrumentation.enabled:
+            show_metrics[0] = not show_metrics[0]
         elif key == ord(' '):
             if ui_data["state"] == GameEngine.STATE_MENU or ui_data["state"] == GameEngine.STATE_GAME_OVER:
-                game.start_game()
+                with pipeline.game_lock:
+                    game.start_game()
+        return True
+
+    report = pipeline.run(render)
 
     cap.release()
     cv2.destroyAllWindows()
 
+    print("Pipeline throughput:")
+    for name in ("capture", "inference", "render"):
+        stage = report[name]
+        print(f"  {name:<10} {stage['fps']:6.1f} FPS  {stage['avg_ms']:6.2f} ms/frame  ({stage['frames']} frames)")
+    for name, count in report["dropped"].items():
+        print(f"  dropped {name}: {count}")
+    if roi_tracking:
+        print(f"  full-frame detections: {detector.full_detections}, ROI-only: {detector.roi_detections}")
+    if classifier.cache is not None:
+        stats = classifier.cache.stats()
+        print(f"  prediction cache: {stats['hit_rate'] * 100:.1f}% hits ({stats['hits']}/{stats['hits'] + stats['misses']})"
+              + (f", {stats['agreement'] * 100:.1f}% agreement on {stats['verified']} checked hits"
+                 if stats["verified"] else ""))
+    if governor is not None:
+        print(f"  governor: {len(governor.adjustments)} adjustments, final scale {governor.process_scale}, "
+              f"model_complexity {governor.model_complexity}, detecting every {governor.frame_skip} frame(s)")
+    if instrumentation.enabled:
+        print("Per-stage latency (last 300 frames):")
+        for name, stats in instrumentation.summary()["stages"].items():
+            if stats["count"]:
+                print(f"  {name:<15} p50 {stats['p50_ms']:6.2f} ms  p95 {stats['p95_ms']:6.2f} ms  "
+                      f"p99 {stats['p99_ms']:6.2f} ms")
+    if metrics_out:
+        instrumentation.export(metrics_out)
+        print(f"Metrics written to {metrics_out}")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Sign Spell AI")
+    parser.add_argument("--source", default="0", help="Camera index or path to a video file")
+    parser.add_argument("--roi-tracking", action="store_true",
+                        help="Track the hand in a cropped region instead of detecting on every full frame")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import/initialization timing breakdown and time to first frame")
+    parser.add_argument("--user", help="Also use this user's personal samples (see data_collector.py --user)")
+    parser.add_argument("--sequences", nargs="?", const="../data/sequences", default=None,
+                        help="Also recognize moving signs (J, Z, ...) from templates in this directory")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Time every per-frame stage and show a live latency overlay ('m' toggles it)")
+    parser.add_argument("--metrics-out",
+                        help="Write the stage metrics on exit: .json, .csv, or Prometheus text for any other extension")
+    parser.add_argument("--target-fps", type=float, default=None,
+                        help="Reduce detection resolution/model/rate as needed to keep up with this frame rate")
+    parser.add_argument("--prediction-cache", type=float, nargs="?", const=0.5, default=None, metavar="GRANULARITY",
+                        help="Cache predictions on quantized features (step as a fraction of the spread "
+                             "of each principal component)")
+    args = parser.parse_args()
+    main(args.source, args.roi_tracking, args.profile_startup, args.user, args.sequences,
+         args.metrics, args.metrics_out, args.target_fps, args.prediction_cache)
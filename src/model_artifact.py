@@ -0,0 +1,105 @@
+import json
+import os
+import shutil
+import time
+import numpy as np
+from knn_engine import KNNEngine
+
+DEFAULT_ARTIFACT_PATH = "../data/model"
+
+
+class ModelVersionError(ValueError):
+    """The model was trained on a different feature set than the running FeatureExtractor"""
+
+
+class ModelArtifact:
+    """
+    On-disk KNN model that loads without sklearn.
+
+    A directory holding the reference vectors, their class indices and squared
+    norms as .npy files (memory-mapped on load), plus manifest.json with the
+    KNN parameters, class names (sign list), feature version and training metrics.
+    """
+
+    MANIFEST = "manifest.json"
+    FORMAT_VERSION = 1
+
+    @staticmethod
+    def exists(path=DEFAULT_ARTIFACT_PATH):
+        return os.path.exists(os.path.join(path, ModelArtifact.MANIFEST))
+
+    @staticmethod
+    def save(engine, path=DEFAULT_ARTIFACT_PATH, feature_version=None, metrics=None):
+        """Write a KNNEngine (e.g. KNNEngine.from_sklearn(model)) as an artifact directory"""
+        # Write into a sibling directory and swap it in, so readers never see a partial model
+        tmp_path = path.rstrip("/\\") + ".tmp"
+        if os.path.exists(tmp_path):
+            shutil.rmtree(tmp_path)
+        os.makedirs(tmp_path)
+
+        np.save(os.path.join(tmp_path, "reference.npy"), engine.reference)
+        np.save(os.path.join(tmp_path, "labels.npy"), engine.labels)
+        np.save(os.path.join(tmp_path, "sq_norms.npy"), engine._ref_sq_norms)
+        manifest = {
+            "format_version": ModelArtifact.FORMAT_VERSION,
+            "model_type": "knn",
+            "feature_version": feature_version,
+            "num_features": int(engine.num_features),
+            "num_references": int(len(engine.reference)),
+            "classes": [str(c) for c in engine.classes],
+            "params": {
+                "n_neighbors": int(engine.k),
+                "weights": engine.weights,
+                "metric": engine.metric,
+                "p": float(engine.p),
+            },
+            "metrics": metrics or {},
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        with open(os.path.join(tmp_path, ModelArtifact.MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=2)
+
+        if os.path.exists(path):
+            shutil.rmtree(path)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def read_manifest(path=DEFAULT_ARTIFACT_PATH):
+        with open(os.path.join(path, ModelArtifact.MANIFEST)) as f:
+            return json.load(f)
+
+    @staticmethod
+    def load(path=DEFAULT_ARTIFACT_PATH, feature_version=None, num_features=None, mmap=True):
+        """
+        Load an artifact as a KNNEngine.
+        Raises ModelVersionError if feature_version / num_features (those of the
+        running FeatureExtractor) do not match what the model was trained on.
+        """
+        manifest = ModelArtifact.read_manifest(path)
+        if manifest.get("format_version", 1) > ModelArtifact.FORMAT_VERSION:
+            raise ModelVersionError(f"{path}: artifact format {manifest['format_version']} is newer than supported")
+        if feature_version is not None and manifest["feature_version"] != feature_version:
+            raise ModelVersionError(
+                f"{path} was trained on features v{manifest['feature_version']}, "
+                f"but FeatureExtractor is v{feature_version}. Retrain the model.")
+        if num_features is not None and manifest["num_features"] != num_features:
+            raise ModelVersionError(
+                f"{path} expects {manifest['num_features']} features, "
+                f"but FeatureExtractor produces {num_features}. Retrain the model.")
+
+        mode = "r" if mmap else None
+        params = manifest["params"]
+        engine = KNNEngine(
+            np.load(os.path.join(path, "reference.npy"), mmap_mode=mode),
+            np.load(os.path.join(path, "labels.npy"), mmap_mode=mode),
+            np.asarray(manifest["classes"]),
+            n_neighbors=params["n_neighbors"], weights=params["weights"],
+            metric=params["metric"], p=params["p"],
+            ref_sq_norms=np.load(os.path.join(path, "sq_norms.npy"), mmap_mode=mode))
+        engine.manifest = manifest
+        return engine
+
+    @staticmethod
+    def remove(path=DEFAULT_ARTIFACT_PATH):
+        if os.path.exists(path):
+            shutil.rmtree(path)
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+# Populated in each worker process by _init_worker
+_worker_data = {}
+
+
+def candidate_grid(quick=False):
+    """(family, params) pairs to evaluate"""
+    candidates = []
+    ks = (3, 5, 9) if quick else (1, 3, 5, 7, 9, 15)
+    metrics = ("euclidean", "manhattan") if quick else ("euclidean", "manhattan", "chebyshev")
+    for k in ks:
+        for metric in metrics:
+            for weights in ("uniform", "distance"):
+                candidates.append(("knn", {"n_neighbors": k, "metric": metric, "weights": weights}))
+    for c in ((1.0,) if quick else (0.1, 1.0, 10.0)):
+        candidates.append(("logistic", {"C": c}))
+    for n in ((50,) if quick else (50, 200)):
+        candidates.append(("random_forest", {"n_estimators": n}))
+        candidates.append(("extra_trees", {"n_estimators": n}))
+    return candidates
+
+
+def build_model(family, params):
+    """Unfitted sklearn estimator for a candidate"""
+    if family == "knn":
+        from sklearn.neighbors import KNeighborsClassifier
+        return KNeighborsClassifier(**params)
+    if family == "logistic":
+        from sklearn.linear_model import LogisticRegression
+        from sklearn.pipeline import make_pipeline
+        from sklearn.preprocessing import StandardScaler
+        return make_pipeline(StandardScaler(), LogisticRegression(max_iter=2000, **params))
+    if family == "random_forest":
+        from sklearn.ensemble import RandomForestClassifier
+        return RandomForestClassifier(random_state=42, n_jobs=1, **params)
+    if family == "extra_trees":
+        from sklearn.ensemble import ExtraTreesClassifier
+        return ExtraTreesClassifier(random_state=42, n_jobs=1, **params)
+    raise ValueError(f"Unknown model family: {family}")
+
+
+def _init_worker(cache_dir):
+    # Every worker memory-maps the same cached feature matrix and fold indices
+    # instead of receiving a pickled copy per task
+    _worker_data["X"] = np.load(os.path.join(cache_dir, "X.npy"), mmap_mode="r")
+    _worker_data["y"] = np.load(os.path.join(cache_dir, "y.npy"), mmap_mode="r")
+    with np.load(os.path.join(cache_dir, "folds.npz")) as folds:
+        _worker_data["folds"] = [(folds[f"train{i}"], folds[f"test{i}"]) for i in range(len(folds.files) // 2)]
+
+
+def _evaluate(candidate):
+    """Cross-validated accuracy of one candidate (runs in a worker process)"""
+    family, params = candidate
+    X, y = _worker_data["X"], _worker_data["y"]
+    scores = []
+    start = time.perf_counter()
+    for train_idx, test_idx in _worker_data["folds"]:
+        model = build_model(family, params)
+        model.fit(X[train_idx], y[train_idx])
+        scores.append(float(np.mean(model.predict(X[test_idx]) == y[test_idx])))
+    return {
+        "family": family,
+        "params": params,
+        "accuracy": float(np.mean(scores)),
+        "accuracy_std": float(np.std(scores)),
+        "fit_seconds": time.perf_counter() - start,
+    }
+
+
+def measure_latency(model, X, samples=200):
+    """
+    Median per-sample inference latency (microseconds) through the same path
+    SignClassifier uses at runtime, one row at a time.
+    """
+    from classifier import SignClassifier
+
+    classifier = SignClassifier.from_model(model)
+
+    rows = X[np.linspace(0, len(X) - 1, min(samples, len(X))).astype(int)]
+    for row in rows[:10]:
+        classifier.predict(row)
+    timings = []
+    for row in rows:
+        t0 = time.perf_counter()
+        classifier.predict(row)
+        timings.append(time.perf_counter() - t0)
+    return float(np.median(timings) * 1e6)
+
+
+def search(X, y, candidates, folds=5, workers=None, cache_dir=None):
+    """
+    Evaluate every candidate with stratified k-fold CV in a process pool.
+    Returns one result dict per candidate, with accuracy and per-sample latency.
+    """
+    from sklearn.model_selection import StratifiedKFold
+
+    X = np.ascontiguousarray(X, dtype=np.float64)
+    y = np.asarray(y).astype(str)
+
+    with tempfile.TemporaryDirectory(dir=cache_dir) as tmp:
+        np.save(os.path.join(tmp, "X.npy"), X)
+        np.save(os.path.join(tmp, "y.npy"), y)
+        splitter = StratifiedKFold(n_splits=folds, shuffle=True, random_state=42)
+        fold_arrays = {}
+        for i, (train_idx, test_idx) in enumerate(splitter.split(X, y)):
+            fold_arrays[f"train{i}"] = train_idx
+            fold_arrays[f"test{i}"] = test_idx
+        np.savez(os.path.join(tmp, "folds.npz"), **fold_arrays)
+
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count(),
+                                 initializer=_init_worker, initargs=(tmp,)) as pool:
+            results = list(pool.map(_evaluate, candidates))
+
+    # Latency is measured sequentially so candidates do not compete for cores
+    for result in results:
+        model = build_model(result["family"], result["params"]).fit(X, y)
+        result["latency_us"] = measure_latency(model, X)
+    return results
+
+
+def select(results, latency_budget_us=None):
+    """Most accurate candidate within the latency budget (ties go to the faster one)"""
+    eligible = [r for r in results if latency_budget_us is None or r["latency_us"] <= latency_budget_us]
+    if not eligible:
+        return None
+    return max(eligible, key=lambda r: (round(r["accuracy"], 4), -r["latency_us"]))
+
+
+def pareto_front(results):
+    """Candidates not beaten on both accuracy and latency by any other"""
+    return [r for r in results
+            if not any(o["accuracy"] >= r["accuracy"] and o["latency_us"] < r["latency_us"]
+                       or o["accuracy"] > r["accuracy"] and o["latency_us"] <= r["latency_us"]
+                       for o in results)]
+
+
+def describe(result):
+    params = ", ".join(f"{k}={v}" for k, v in result["params"].items())
+    return f"{result['family']}({params})"
+
+
+def print_report(results, chosen):
+    front = pareto_front(results)
+    print(f"\n{'candidate':<58}{'accuracy':>16}{'latency (us)':>14}")
+    for result in sorted(results, key=lambda r: -r["accuracy"]):
+        marks = ("*" if result in front else " ") + (">" if result is chosen else " ")
+        print(f"{marks}{describe(result):<56}"
+              f"{result['accuracy'] * 100:>9.2f}% ±{result['accuracy_std'] * 100:4.1f}"
+              f"{result['latency_us']:>14.1f}")
+    print("* = accuracy/latency Pareto front, > = selected")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Cross-validated model search for SignClassifier")
+    parser.add_argument("--data", default=None, help="Dataset store directory or CSV (default: ../data/dataset)")
+    parser.add_argument("--model", default="../data/model.pkl", help="Where to save the selected model")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--latency-budget-us", type=float, default=None,
+                        help="Only select models whose per-sample latency is within this budget")
+    parser.add_argument("--quick", action="store_true", help="Smaller candidate grid")
+    args = parser.parse_args(argv)
+
+    from classifier import SignClassifier
+
+    data_path = args.data
+    if data_path is None:
+        data_path = "../data/dataset" if os.path.isdir("../data/dataset") else "../data/dataset.csv"
+    if not os.path.exists(data_path):
+        print("Dataset not found. Please run data_collector.py first.")
+        return 1
+
+    X, y = SignClassifier.load_dataset(data_path, SignClassifier.dataset_feature_version(data_path))
+    candidates = candidate_grid(args.quick)
+    print(f"Searching {len(candidates)} candidates, {args.folds}-fold CV on {len(X)} samples...")
+    start = time.perf_counter()
+    results = search(X, y, candidates, folds=args.folds, workers=args.workers)
+    print(f"Search took {time.perf_counter() - start:.1f}s")
+
+    chosen = select(results, args.latency_budget_us)
+    print_report(results, chosen)
+    if chosen is None:
+        print(f"No candidate meets the {args.latency_budget_us} us latency budget.")
+        return 1
+
+    print(f"\nSelected {describe(chosen)}: {chosen['accuracy'] * 100:.2f}% at {chosen['latency_us']:.1f} us/sample")
+    model = build_model(chosen["family"], chosen["params"]).fit(np.asarray(X, dtype=np.float64), y)
+    classifier = SignClassifier.from_model(model)
+    classifier.model_path = args.model
+    classifier.artifact_path = os.path.splitext(args.model)[0]
+    classifier.save_model({"accuracy": chosen["accuracy"], "accuracy_std": chosen["accuracy_std"],
+                           "latency_us": chosen["latency_us"], "folds": args.folds, "num_samples": len(X)})
+
+    metrics_path = os.path.splitext(args.model)[0] + "_metrics.json"
+    with open(metrics_path, "w") as f:
+        json.dump({"selected": chosen, "latency_budget_us": args.latency_budget_us,
+                   "folds": args.folds, "num_samples": len(X), "candidates": results}, f, indent=2)
+    print(f"Search metrics saved to {metrics_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,185 @@
+import argparse
+import numpy as np
+from game_engine import GameEngine
+
+
+class HandTracker:
+    """
+    Assigns stable track IDs to hands across frames by greedily matching each
+    hand's wrist position to the nearest track from the previous frames.
+    """
+
+    def __init__(self, max_distance=150, max_missed=15):
+        self.max_distance = max_distance # pixels a hand may move between frames
+        self.max_missed = max_missed # frames a track survives without a matching hand
+        self.tracks = {} # track_id -> [position, frames_missed]
+        self.next_id = 0
+
+    def update(self, positions):
+        """
+        positions: (N, 2) hand positions for this frame.
+        Returns (track_ids for each position, list of track_ids that expired this frame).
+        """
+        positions = np.asarray(positions, dtype=np.float64).reshape(-1, 2)
+        track_ids = list(self.tracks)
+        assigned = [None] * len(positions)
+
+        if track_ids and len(positions):
+            previous = np.array([self.tracks[t][0] for t in track_ids])
+            dist = np.linalg.norm(positions[:, np.newaxis, :] - previous[np.newaxis, :, :], axis=2)
+            used_tracks = set()
+            # Closest pairs first
+            for flat in np.argsort(dist, axis=None):
+                i, j = divmod(int(flat), len(track_ids))
+                if dist[i, j] > self.max_distance:
+                    break
+                if assigned[i] is None and j not in used_tracks:
+                    assigned[i] = track_ids[j]
+                    used_tracks.add(j)
+
+        for i, position in enumerate(positions):
+            if assigned[i] is None:
+                assigned[i] = self.next_id
+                self.next_id += 1
+            self.tracks[assigned[i]] = [position, 0]
+
+        expired = []
+        seen = set(assigned)
+        for track_id in list(self.tracks):
+            if track_id not in seen:
+                self.tracks[track_id][1] += 1
+                if self.tracks[track_id][1] > self.max_missed:
+                    del self.tracks[track_id]
+                    expired.append(track_id)
+        return assigned, expired
+
+
+class PlayerResult:
+    """Per-hand outcome of one frame"""
+
+    def __init__(self, track_id, landmarks, predicted_sign, confidence, ui_data):
+        self.track_id = track_id
+        self.landmarks = landmarks
+        self.predicted_sign = predicted_sign
+        self.confidence = confidence
+        self.ui_data = ui_data
+
+
+class MultiPlayerSession:
+    """
+    Several learners in front of one camera.
+
+    Every frame, all detected hands are featurized and classified in one
+    batched call, and each result is routed to the GameEngine of the player
+    that owns the hand's track ID. A player joins (and starts a game) when a
+    new track appears and leaves when the track expires.
+    """
+
+    def __init__(self, detector, extractor, classifier, tracker=None):
+        self.detector = detector
+        self.extractor = extractor
+        self.classifier = classifier
+        self.tracker = tracker if tracker is not None else HandTracker()
+        self.players = {} # track_id -> GameEngine
+
+    def process(self, img):
+        """Detect, classify and update all players for one frame. Returns a list of PlayerResults"""
+        self.detector.find_hands(img, draw=False)
+        landmarks, handedness, _ = self.detector.find_landmarks(img, space="pixel")
+
+        track_ids, expired = self.tracker.update(landmarks[:, 0, :2])
+        for track_id in expired:
+            self.players.pop(track_id, None)
+
+        if len(landmarks) and self.classifier.model is not None:
+            # One featurize and one classify call for all hands
+            features = self.extractor.extract_features_batch(landmarks, handedness)
+            labels, confidences = self.classifier.predict_batch(features)
+        else:
+            labels, confidences = [None] * len(landmarks), [0.0] * len(landmarks)
+
+        results = []
+        for i, track_id in enumerate(track_ids):
+            game = self.players.get(track_id)
+            if game is None:
+                game = self.players[track_id] = GameEngine()
+                game.start_game()
+            game.update(labels[i], confidences[i])
+            results.append(PlayerResult(track_id, landmarks[i].copy(), labels[i], confidences[i],
+                                        game.get_ui_data()))
+
+        # Players whose hand is briefly out of view keep their round timer running
+        for track_id, game in self.players.items():
+            if track_id not in track_ids:
+                game.update(None, 0.0)
+        return results
+
+
+def draw_players(img, results):
+    """Label each hand with its player's target, score and current prediction"""
+    import cv2
+
+    for result in results:
+        ui_data = result.ui_data
+        x = int(result.landmarks[:, 0].min())
+        y = max(30, int(result.landmarks[:, 1].min()) - 60)
+        color = (0, 255, 0) if result.predicted_sign == ui_data["target"] else (0, 0, 255)
+        cv2.putText(img, f"P{result.track_id + 1}  Sign: {ui_data['target']}  Score: {ui_data['score']}",
+                    (x, y), cv2.FONT_HERSHEY_PLAIN, 1.5, (255, 255, 255), 2)
+        if ui_data["state"] == GameEngine.STATE_FEEDBACK:
+            cv2.putText(img, ui_data["feedback"], (x, y + 30), cv2.FONT_HERSHEY_PLAIN, 1.5, (0, 255, 255), 2)
+        elif result.predicted_sign:
+            cv2.putText(img, f"You: {result.predicted_sign} ({int(result.confidence * 100)}%)",
+                        (x, y + 30), cv2.FONT_HERSHEY_PLAIN, 1.5, color, 2)
+
+
+def main(source=0, max_players=4, profile_startup=False):
+    from startup_profiler import StartupProfiler
+
+    startup = StartupProfiler()
+    with startup.stage("import cv2"):
+        import cv2
+    with startup.stage("import app modules"):
+        from pipeline import open_source
+    with startup.stage("import mediapipe"):
+        import mediapipe
+        from hand_detector import HandDetector
+    with startup.stage("build MediaPipe graph"):
+        detector = HandDetector(max_hands=max_players, detection_con=0.8)
+    with startup.stage("load model"):
+        from classifier import SignClassifier
+        classifier = SignClassifier()
+    session = MultiPlayerSession(detector, classifier.feature_extractor(), classifier)
+    with startup.stage("open camera"):
+        cap = open_source(source)
+
+    print(f"Classroom mode: up to {max_players} players. Press 'q' to quit.")
+    while True:
+        success, img = cap.read()
+        if not success:
+            break
+
+        results = session.process(img)
+        draw_players(img, results)
+
+        cv2.imshow("Sign Spell AI - Classroom", img)
+        key = cv2.waitKey(1)
+        if startup.first_frame is None:
+            startup.mark_first_frame()
+            if profile_startup:
+                startup.report()
+        if key & 0xFF == ord('q'):
+            break
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sign Spell AI classroom mode (several players, one camera)")
+    parser.add_argument("--source", default="0", help="Camera index or path to a video file")
+    parser.add_argument("--players", type=int, default=4, help="Maximum number of hands/players")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import/initialization timing breakdown and time to first frame")
+    args = parser.parse_args()
+    main(args.source, args.players, args.profile_startup)
@@ -0,0 +1,114 @@
+from collections import OrderedDict
+import cv2
+import numpy as np
+
+FONT = cv2.FONT_HERSHEY_PLAIN
+
+
+class Sprite:
+    """
+    A pre-rendered UI element. Opaque sprites (inverse_alpha None) are copied
+    as they are; otherwise img holds the color premultiplied by alpha and the
+    frame is blended as frame * inverse_alpha / 255 + img. (anchor_x, anchor_y)
+    is where the cv2.putText origin lies inside the sprite.
+    """
+
+    def __init__(self, img, inverse_alpha, anchor_x, anchor_y, text_width, text_height):
+        self.img = img
+        self.inverse_alpha = inverse_alpha
+        self.anchor_x = anchor_x
+        self.anchor_y = anchor_y
+        self.text_width = text_width
+        self.text_height = text_height
+
+    @property
+    def height(self):
+        return self.img.shape[0]
+
+    @property
+    def width(self):
+        return self.img.shape[1]
+
+
+class OverlayCompositor:
+    """
+    Draws text widgets from cached sprites instead of calling cv2.putText on
+    the full frame every time.
+
+    A sprite is keyed on everything that affects its pixels (text, scale,
+    color, thickness, background, padding), so it is only rendered again
+    when its content changes - once per round for the target, once per
+    second for the timer. Drawing is a slice copy into the frame, or for text
+    without a background an alpha blend over just the sprite's area (the
+    strokes are anti-aliased), both a fraction of the cost of rasterizing
+    the glyphs again. The least recently used sprites are evicted beyond
+    max_sprites.
+    """
+
+    def __init__(self, max_sprites=64):
+        self.max_sprites = max_sprites
+        self.sprites = OrderedDict()
+        self.renders = 0 # sprites rendered so far (cache misses)
+
+    def text_sprite(self, text, font_scale, color, thickness, background=None, padding=0):
+        key = (text, font_scale, color, thickness, background, padding)
+        sprite = self.sprites.get(key)
+        if sprite is not None:
+            self.sprites.move_to_end(key)
+            return sprite
+
+        (text_w, text_h), baseline = cv2.getTextSize(text, FONT, font_scale, thickness)
+        # Strokes spread thickness/2 beyond the nominal text box
+        margin = max(padding, thickness)
+        anchor_x, anchor_y = margin, margin + text_h
+        height, width = anchor_y + baseline + margin, text_w + 2 * margin
+
+        img = np.empty((height, width, 3), dtype=np.uint8)
+        if background is None:
+            alpha = np.zeros((height, width), dtype=np.uint8)
+            cv2.putText(alpha, text, (anchor_x, anchor_y), FONT, font_scale, 255, thickness)
+            alpha = cv2.merge([alpha] * 3)
+            img[:] = color
+            img = cv2.multiply(img, alpha, scale=1 / 255)
+            inverse_alpha = 255 - alpha
+        else:
+            img[:] = background
+            cv2.putText(img, text, (anchor_x, anchor_y), FONT, font_scale, color, thickness)
+            inverse_alpha = None
+
+        sprite = self.sprites[key] = Sprite(img, inverse_alpha, anchor_x, anchor_y, text_w, text_h)
+        self.renders += 1
+        if len(self.sprites) > self.max_sprites:
+            self.sprites.popitem(last=False)
+        return sprite
+
+    def blit(self, img, sprite, x, y):
+        """Draw sprite into img with its top-left corner at (x, y), clipped to the frame"""
+        h, w = img.shape[:2]
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + sprite.width, w), min(y + sprite.height, h)
+        if x0 >= x1 or y0 >= y1:
+            return
+        src = (slice(y0 - y, y1 - y), slice(x0 - x, x1 - x))
+        roi = img[y0:y1, x0:x1]
+        if sprite.inverse_alpha is None:
+            roi[:] = sprite.img[src]
+        else:
+            cv2.add(cv2.multiply(roi, sprite.inverse_alpha[src], scale=1 / 255), sprite.img[src], dst=roi)
+
+    def put_text(self, img, text, org, font_scale, color, thickness, background=None, padding=0, align="left"):
+        """
+        Drop-in for cv2.putText(img, text, org, FONT_HERSHEY_PLAIN, ...).
+        align: whether org's x is the left edge, "center" or "right" edge of the
+        text, which saves measuring it with cv2.getTextSize first.
+        With background, a filled box extending `padding` pixels around the
+        text is drawn behind it. Returns the sprite.
+        """
+        sprite = self.text_sprite(text, font_scale, color, thickness, background, padding)
+        x = org[0]
+        if align == "center":
+            x -= (sprite.text_width + 1) // 2 # same as (width - text_width) // 2
+        elif align == "right":
+            x -= sprite.text_width
+        self.blit(img, sprite, x - sprite.anchor_x, org[1] - sprite.anchor_y)
+        return sprite
@@ -0,0 +1,276 @@
+import threading
+import time
+from collections import deque
+from instrumentation import Instrumentation
+
+class DropOldestQueue:
+    """
+    Bounded queue that never blocks the producer.
+    When full, the oldest item is discarded so consumers always see the freshest frames.
+    """
+
+    def __init__(self, maxsize=2):
+        self.items = deque(maxlen=maxsize)
+        self.cond = threading.Condition()
+        self.dropped = 0
+        self.closed = False
+
+    def put(self, item):
+        with self.cond:
+            if len(self.items) == self.items.maxlen:
+                self.dropped += 1
+            self.items.append(item)
+            self.cond.notify()
+
+    def get(self, timeout=None):
+        """Return the oldest queued item, or None on timeout / once closed and drained"""
+        with self.cond:
+            if not self.items and not self.closed:
+                self.cond.wait(timeout)
+            if self.items:
+                return self.items.popleft()
+            return None
+
+    def close(self):
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+    def __len__(self):
+        return len(self.items)
+
+
+class SyntheticSource:
+    """
+    Frame source with the cv2.VideoCapture read()/release() interface,
+    fed from a list or generator of images. Used to drive the pipeline headlessly.
+    """
+
+    def __init__(self, frames, fps=None):
+        self.frames = iter(frames)
+        self.frame_interval = 1.0 / fps if fps else 0.0
+        self.last_read = 0.0
+
+    def read(self):
+        if self.frame_interval:
+            wait = self.last_read + self.frame_interval - time.perf_counter()
+            if wait > 0:
+                time.sleep(wait)
+            self.last_read = time.perf_counter()
+        try:
+            return True, next(self.frames)
+        except StopIteration:
+            return False, None
+
+    def isOpened(self):
+        return True
+
+    def release(self):
+        pass
+
+
+def open_source(source, width=1280, height=720):
+    """
+    Open a frame source: a camera index (int or digit string) or a video file path.
+    """
+    import cv2
+
+    if isinstance(source, str) and source.isdigit():
+        source = int(source)
+    cap = cv2.VideoCapture(source)
+    if isinstance(source, int):
+        cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    return cap
+
+
+class StageStats:
+    """Frame count and busy time for one pipeline stage"""
+
+    def __init__(self, name):
+        self.name = name
+        self.frames = 0
+        self.busy_time = 0.0
+        self.start_time = None
+        self.end_time = None
+
+    def record(self, duration):
+        now = time.perf_counter()
+        if self.start_time is None:
+            self.start_time = now - duration
+        self.end_time = now
+        self.frames += 1
+        self.busy_time += duration
+
+    def summary(self):
+        elapsed = (self.end_time - self.start_time) if self.frames else 0.0
+        return {
+            "frames": self.frames,
+            "fps": self.frames / elapsed if elapsed > 0 else 0.0,
+            "avg_ms": 1000 * self.busy_time / self.frames if self.frames else 0.0,
+        }
+
+
+class FrameResult:
+    """Output of the detector/classifier worker for one frame"""
+
+    def __init__(self, frame_id, img, predicted_sign, confidence, ui_data, capture_time):
+        self.frame_id = frame_id
+        self.img = img
+        self.predicted_sign = predicted_sign
+        self.confidence = confidence
+        self.ui_data = ui_data
+        self.capture_time = capture_time
+
+
+class RecognitionPipeline:
+    """
+    Staged runtime: capture thread -> detector/classifier worker -> render loop.
+
+    Stages are connected by DropOldestQueues, so a slow stage skips stale frames
+    instead of falling further behind. The render loop runs on the calling thread
+    (OpenCV windows must be driven from there). GameEngine is only touched while
+    holding game_lock, so the render side always sees a consistent state.
+    """
+
+    def __init__(self, source, detector, extractor, classifier, game, queue_size=2, sequence=None,
+                 instrumentation=None, governor=None):
+        """
+        sequence: optional SequenceRecognizer for moving signs, run next to the static classifier
+        instrumentation: Instrumentation that times the "capture", "featurize", "classify"
+        and "game update" stages (pass the detector's to see all stages together)
+        governor: optional Governor fed with every frame's capture-to-result latency; frames
+        it skips reuse the previous prediction
+        """
+        self.source = source
+        self.detector = detector
+        self.extractor = extractor
+        self.classifier = classifier
+        self.game = game
+        self.sequence = sequence
+        self.instrumentation = instrumentation if instrumentation is not None else Instrumentation()
+        self.governor = governor
+        self.game_lock = threading.Lock()
+
+        self.frame_queue = DropOldestQueue(queue_size)
+        self.result_queue = DropOldestQueue(queue_size)
+        self.stop_event = threading.Event()
+        self.threads = []
+
+        self.stats = {name: StageStats(name) for name in ("capture", "inference", "render")}
+
+    def start(self):
+        self.stop_event.clear()
+        self.threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        self.frame_queue.close()
+        self.result_queue.close()
+        for thread in self.threads:
+            thread.join()
+        self.threads = []
+
+    def _capture_loop(self):
+        stats = self.stats["capture"]
+        frame_id = 0
+        while not self.stop_event.is_set():
+            t0 = time.perf_counter()
+            success, img = self.source.read()
+            if not success:
+                break
+            # Frames are timestamped once read: waiting for the camera is not latency
+            captured = time.perf_counter()
+            stats.record(captured - t0)
+            self.instrumentation.record("capture", captured - t0)
+            self.frame_queue.put((frame_id, img, captured))
+            frame_id += 1
+        self.frame_queue.close()
+
+    def _inference_loop(self):
+        stats = self.stats["inference"]
+        last_prediction = (None, 0.0)
+        while not self.stop_event.is_set():
+            item = self.frame_queue.get(timeout=0.1)
+            if item is None:
+                if self.frame_queue.closed and not len(self.frame_queue):
+                    break
+                continue
+            frame_id, img, capture_time = item
+
+            t0 = time.perf_counter()
+            if self.governor is None or self.governor.should_process(frame_id):
+                last_prediction = self.process_frame(img)
+            predicted_sign, confidence = last_prediction
+            with self.game_lock, self.instrumentation.time("game update"):
+                self.game.update(predicted_sign, confidence)
+                ui_data = self.game.get_ui_data()
+            stats.record(time.perf_counter() - t0)
+            if self.governor is not None:
+                self.governor.update(time.perf_counter() - capture_time)
+
+            self.result_queue.put(FrameResult(frame_id, img, predicted_sign, confidence,
+                                              ui_data, capture_time))
+        self.result_queue.close()
+
+    def process_frame(self, img):
+        """Detect, featurize and classify one frame. Returns (predicted_sign, confidence)"""
+        img = self.detector.find_hands(img)
+        # Views into the detector's reused buffers; no per-frame landmark lists
+        landmarks, handedness, _ = self.detector.find_landmarks(img, space="pixel")
+
+        if self.sequence is not None:
+            # A recognized movement takes precedence over the static pose
+            label, confidence = self.sequence.update(landmarks[0] if len(landmarks) else None, time.perf_counter())
+            if label is not None:
+                return label, confidence
+
+        if len(landmarks) != 0 and self.classifier.model is not None:
+            with self.instrumentation.time("featurize"):
+                features = self.extractor.extract_features_batch(landmarks[:1], handedness[:1])[0]
+            with self.instrumentation.time("classify"):
+                return self.classifier.predict(features)
+        return None, 0.0
+
+    def results(self):
+        """Yield FrameResults until the source is exhausted or stop() is called"""
+        while not self.stop_event.is_set():
+            result = self.result_queue.get(timeout=0.1)
+            if result is None:
+                if self.result_queue.closed and not len(self.result_queue):
+                    return
+                continue
+            yield result
+
+    def run(self, render=None):
+        """
+        Start the pipeline and drive the render loop on this thread.
+        render(result) draws/shows a FrameResult and returns False to stop.
+        With render=None the results are just consumed (headless mode).
+        """
+        self.start()
+        stats = self.stats["render"]
+        try:
+            for result in self.results():
+                t0 = time.perf_counter()
+                keep_going = render(result) if render is not None else True
+                stats.record(time.perf_counter() - t0)
+                if keep_going is False:
+                    break
+        finally:
+            self.stop()
+        return self.report()
+
+    def report(self):
+        """Per-stage throughput plus frames dropped between stages"""
+        report = {name: stats.summary() for name, stats in self.stats.items()}
+        report["dropped"] = {
+            "capture->inference": self.frame_queue.dropped,
+            "inference->render": self.result_queue.dropped,
+        }
+        return report
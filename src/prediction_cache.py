@@ -0,0 +1,226 @@
+import argparse
+import sys
+import time
+from collections import OrderedDict
+import numpy as np
+
+
+class PredictionCache:
+    """
+    LRU memo of (label, confidence) predictions keyed on quantized feature
+    vectors, for frames where the hand is held still and consecutive feature
+    vectors are nearly identical.
+
+    step: quantization step per key coordinate (scalar or array); vectors that
+    round to the same multiples of step share a prediction.
+    basis: optional (F, M) projection, with center, applied before quantizing.
+    With many features, a held hand's jitter moves some feature across a cell
+    boundary on most frames; keying on the few directions that separate signs
+    (see from_reference) keeps the key stable.
+
+    Agreement with the uncached path is checked as it runs: every
+    verify_every-th hit is also predicted without the cache. Once min_checks
+    hits have been verified, an agreement below min_agreement halves the
+    step and clears the cache, so a too-coarse setting corrects itself.
+    """
+
+    def __init__(self, step, max_entries=4096, min_agreement=0.98, verify_every=20, min_checks=50,
+                 basis=None, center=0.0):
+        self.step = np.asarray(step, dtype=np.float64)
+        self.basis = None if basis is None else np.asarray(basis, dtype=np.float64)
+        self.center = np.asarray(center, dtype=np.float64)
+        self.max_entries = max_entries
+        self.min_agreement = min_agreement
+        self.verify_every = verify_every
+        self.min_checks = min_checks
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.checks = 0
+        self.agreements = 0
+        self.refinements = 0
+        self._compile()
+
+    @classmethod
+    def from_reference(cls, reference, granularity=0.5, variance=0.9, **params):
+        """
+        Cache keyed on the principal components of a (N, F) reference set that
+        explain `variance` of its spread, quantized at granularity times each
+        component's standard deviation.
+        """
+        reference = np.asarray(reference, dtype=np.float64)
+        if len(reference) < 2:
+            return cls(granularity, **params)
+        center = reference.mean(axis=0)
+        _, singular, axes = np.linalg.svd(reference - center, full_matrices=False)
+        explained = np.cumsum(singular ** 2)
+        if explained[-1] == 0:
+            return cls(granularity, **params)
+        num_axes = int(np.searchsorted(explained / explained[-1], variance)) + 1
+        basis = axes[:num_axes].T
+        spread = singular[:num_axes] / np.sqrt(len(reference))
+        step = np.where(spread > 0, spread * granularity, granularity)
+        return cls(step, basis=basis, center=center, **params)
+
+    def _compile(self):
+        # Fold centering, projection and step into one multiply-add: key cells
+        # are floor(features @ scale + offset)
+        if self.basis is None:
+            self.scale = 1.0 / self.step
+            self.offset = 0.5 - self.center * self.scale
+        else:
+            self.scale = self.basis / self.step
+            self.offset = 0.5 - self.center @ self.scale
+
+    def key(self, features, context=None):
+        if self.basis is None:
+            cells = features * self.scale
+        else:
+            cells = np.dot(features, self.scale)
+        cells += self.offset
+        return context, np.floor(cells, out=cells).astype(np.int64).tobytes()
+
+    def predict(self, features, compute, context=None):
+        """
+        Cached compute(features). context separates entries that must not be
+        shared (e.g. the active user, whose personal samples change the answer).
+        """
+        key = self.key(features, context)
+        result = self.entries.get(key)
+        if result is None:
+            self.misses += 1
+            result = self.entries[key] = compute(features)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+            return result
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        if self.verify_every and self.hits % self.verify_every == 0:
+            actual = compute(features)
+            if actual[0] != result[0]:
+                # Later hits on this cell get the model's answer, not the stale one
+                self.entries[key] = actual
+            self._verify(result, actual)
+            return actual
+        return result
+
+    def _verify(self, cached, actual):
+        self.checks += 1
+        self.agreements += cached[0] == actual[0]
+        if self.checks >= self.min_checks and self.agreements / self.checks < self.min_agreement:
+            print(f"Prediction cache agreed with the uncached path on only {self.agreements}/{self.checks} "
+                  f"checked hits; halving its quantization step")
+            self.step = self.step / 2
+            self._compile()
+            self.refinements += 1
+            self.clear()
+
+    def clear(self):
+        """Drop all entries (call whenever the model changes)"""
+        self.entries.clear()
+        self.checks = 0
+        self.agreements = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self.entries), "verified": self.checks,
+                "agreement": self.agreements / self.checks if self.checks else None,
+                "refinements": self.refinements}
+
+
+def synthetic_poses(num_poses, seed=0):
+    """
+    (num_poses, 21, 3) distinct right-hand poses in pixels: the benchmark's
+    fanned fingers, each curled towards the palm (-z) by a random amount.
+    """
+    rng = np.random.default_rng(seed)
+    directions = np.linspace(-0.9, 0.6, 5)
+    poses = np.zeros((num_poses, 21, 3))
+    for n, curls in enumerate(rng.random((num_poses, 5))):
+        for finger, (direction, curl) in enumerate(zip(directions, curls)):
+            heading = np.array([np.sin(direction), -np.cos(direction), 0.0])
+            point = heading * (0.25 if finger == 0 else 0.35)
+            poses[n, 1 + 4 * finger] = point
+            bend = 0.0
+            for joint in range(2, 5):
+                bend += curl * 1.2
+                bone = heading * np.cos(bend) + np.array([0.0, 0.0, -np.sin(bend)])
+                point = point + bone * (0.2 if finger == 0 else 0.25)
+                poses[n, joint + 4 * finger] = point
+    return poses * 150 + [640, 500, 0]
+
+
+def hold_stream(poses, hold_frames=60, jitter=1.0, seed=0):
+    """
+    Landmark frames of a hand holding each pose for hold_frames, with
+    MediaPipe-like per-frame jitter (standard deviation in pixels).
+    """
+    rng = np.random.default_rng(seed)
+    frames = np.repeat(poses, hold_frames, axis=0)
+    return frames + rng.normal(0, jitter, size=frames.shape)
+
+
+def validate(classifier, features, min_agreement=0.98):
+    """
+    Replay feature vectors through the classifier without and with its cache.
+    Returns a report with label agreement, hit rate and classifier CPU time.
+    """
+    cache, classifier.cache = classifier.cache, None
+    start = time.process_time()
+    uncached = [classifier.predict(row)[0] for row in features]
+    uncached_s = time.process_time() - start
+
+    classifier.cache = cache
+    cache.entries.clear()
+    start = time.process_time()
+    cached = [classifier.predict(row)[0] for row in features]
+    cached_s = time.process_time() - start
+
+    agreement = float(np.mean([a == b for a, b in zip(uncached, cached)]))
+    return {"frames": len(features), "agreement": agreement, "passed": agreement >= min_agreement,
+            "uncached_cpu_s": uncached_s, "cached_cpu_s": cached_s, "cache": cache.stats()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check the prediction cache's hit rate, CPU saving and label agreement")
+    parser.add_argument("--model", default="../data/model.pkl")
+    parser.add_argument("--landmarks", help="Recorded landmark sequence (.npy/.npz, see benchmark.py); "
+                                            "default: synthetic held poses")
+    parser.add_argument("--granularity", type=float, default=0.5,
+                        help="Quantization step as a fraction of the spread of each principal component")
+    parser.add_argument("--max-entries", type=int, default=4096)
+    parser.add_argument("--min-agreement", type=float, default=0.98,
+                        help="Fail (exit 1) if fewer labels than this match the uncached path")
+    args = parser.parse_args()
+
+    from benchmark import load_landmarks
+    from classifier import SignClassifier
+
+    poses = synthetic_poses(20)
+    landmarks, handedness = load_landmarks(args.landmarks) if args.landmarks else (hold_stream(poses), None)
+    classifier = SignClassifier(args.model)
+    if classifier.model is None:
+        from sklearn.neighbors import KNeighborsClassifier
+
+        # Every synthetic pose is a sign, with 50 noisier samples each
+        print("Using a throwaway model fitted on synthetic poses.")
+        samples = hold_stream(poses, 50, jitter=3.0, seed=1)
+        labels = np.repeat([f"pose{i}" for i in range(len(poses))], 50)
+        features = classifier.feature_extractor().extract_features_batch(samples)
+        classifier = SignClassifier.from_model(KNeighborsClassifier(n_neighbors=5).fit(features, labels))
+    extractor = classifier.feature_extractor()
+    classifier.enable_cache(args.granularity, args.max_entries, args.min_agreement)
+    report = validate(classifier, extractor.extract_features_batch(landmarks, handedness), args.min_agreement)
+
+    stats = report["cache"]
+    print(f"{report['frames']} frames, granularity {args.granularity}")
+    print(f"  hit rate:       {stats['hit_rate'] * 100:.1f}% ({stats['entries']} entries)")
+    print(f"  classifier CPU: {report['uncached_cpu_s'] * 1000:.1f} ms uncached, "
+          f"{report['cached_cpu_s'] * 1000:.1f} ms cached "
+          f"({report['uncached_cpu_s'] / max(report['cached_cpu_s'], 1e-9):.1f}x less)")
+    print(f"  agreement:      {report['agreement'] * 100:.2f}% (minimum {args.min_agreement * 100:.2f}%)")
+    if not report["passed"]:
+        print("FAILED: the cache changes too many labels; lower --granularity")
+        sys.exit(1)
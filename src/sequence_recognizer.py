@@ -0,0 +1,470 @@
+import argparse
+import os
+import time
+import numpy as np
+
+DEFAULT_SEQUENCE_PATH = "../data/sequences"
+
+
+class RingBuffer:
+    """
+    Fixed-capacity FIFO of equally shaped arrays in one preallocated block.
+    Items are addressed by their absolute append index (0, 1, 2, ...).
+    """
+
+    def __init__(self, capacity, shape=(), dtype=np.float64):
+        self.data = np.zeros((capacity,) + tuple(shape), dtype=dtype)
+        self.capacity = capacity
+        self.count = 0 # items appended so far
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    @property
+    def first(self):
+        """Absolute index of the oldest item still held"""
+        return max(0, self.count - self.capacity)
+
+    def __getitem__(self, index):
+        return self.data[index % self.capacity]
+
+    def append(self, item):
+        self.data[self.count % self.capacity] = item
+        self.count += 1
+
+    def since(self, start):
+        """Copy of the items from absolute index `start` to the newest, oldest first"""
+        start = max(start, self.first)
+        return self.data[np.arange(start, self.count) % self.capacity]
+
+    def clear(self):
+        self.count = 0
+
+
+class TrajectoryFeatures:
+    """
+    Per-frame trajectory descriptor, computed from the new frame and the
+    previous one only: thumb/index/pinky tip positions relative to the palm,
+    and the smoothed velocities of the palm center and the index/pinky tips.
+    Everything is measured in palm lengths, so distance to the camera does
+    not matter.
+    """
+
+    PALM = [0, 5, 9, 13, 17]
+    TIPS = [4, 8, 20] # thumb, index, pinky
+    MOVING = [8, 20] # velocities are tracked for the palm center and these
+    NUM_FEATURES = 2 * len(TIPS) + 2 * (1 + len(MOVING))
+
+    def __init__(self, smoothing=0.05, velocity_scale=0.25):
+        self.smoothing = smoothing # seconds, time constant of the velocity smoothing
+        self.velocity_scale = velocity_scale # seconds; weighs velocities against positions
+        self.reset()
+
+    def reset(self):
+        self.previous = None # (pixel points, time) of the last frame
+        self.velocity = np.zeros(2 * (1 + len(self.MOVING)))
+
+    def update(self, landmarks, now):
+        """
+        landmarks: (21, 2|3) landmarks of one hand, observed at `now` seconds.
+        Returns (descriptor, speed): speed is the fastest tracked point in palm lengths/second.
+        """
+        lm = np.asarray(landmarks, dtype=np.float64)[:, :2]
+        center = lm[self.PALM].mean(axis=0)
+        scale = np.linalg.norm(lm[9] - lm[0]) or 1.0
+        points = np.vstack([center, lm[self.MOVING]])
+
+        if self.previous is not None and now > self.previous[1]:
+            prev_points, prev_time = self.previous
+            dt = now - prev_time
+            raw = (points - prev_points).ravel() / (scale * dt)
+            # Time-based smoothing, so 15 and 60 FPS streams give the same velocities
+            self.velocity += (1.0 - np.exp(-dt / self.smoothing)) * (raw - self.velocity)
+        self.previous = (points, now)
+
+        tips = (lm[self.TIPS] - center) / scale
+        descriptor = np.concatenate([tips.ravel(), self.velocity * self.velocity_scale])
+        speed = float(np.sqrt((self.velocity.reshape(-1, 2) ** 2).sum(axis=1)).max())
+        return descriptor, speed
+
+
+def resample(times, descriptors, end, duration, length):
+    """Linearly interpolate a descriptor sequence at `length` evenly spaced times over [end - duration, end]"""
+    sample = np.linspace(end - duration, end, length)
+    if len(times) == 1:
+        return np.repeat(descriptors, length, axis=0)
+    idx = np.clip(np.searchsorted(times, sample, side='right'), 1, len(times) - 1)
+    t0, t1 = times[idx - 1], times[idx]
+    w = np.clip((sample - t0) / np.maximum(t1 - t0, 1e-9), 0.0, 1.0)[:, np.newaxis]
+    return descriptors[idx - 1] + (descriptors[idx] - descriptors[idx - 1]) * w
+
+
+def lb_keogh(query, templates, radius):
+    """
+    LB_Keogh lower bounds of the band-constrained DTW distance from `query`
+    (L, D) to each of `templates` (T, L, D).
+    """
+    length = len(query)
+    padded_hi = np.pad(query, ((radius, radius), (0, 0)), mode='edge')
+    windows = np.lib.stride_tricks.sliding_window_view(padded_hi, 2 * radius + 1, axis=0)[:length]
+    upper = windows.max(axis=2)
+    lower = windows.min(axis=2)
+    above = np.maximum(templates - upper, 0.0)
+    below = np.maximum(lower - templates, 0.0)
+    return (above * above + below * below).sum(axis=(1, 2))
+
+
+def dtw_distances(query, templates, radius, abandon=np.inf):
+    """
+    DTW distances (sum of squared frame distances along the warping path,
+    Sakoe-Chiba band of `radius`) from `query` (L, D) to `templates` (T, L, D).
+    Rows are filled with a prefix-sum/cumulative-min recurrence, so each row
+    is a handful of vectorized operations over all templates. Stops early
+    (returning inf) once every template's partial cost exceeds `abandon`.
+    """
+    count, length, _ = templates.shape
+    # Squared frame distances |t|^2 + |q|^2 - 2 t.q, one matrix product for all templates
+    cost = templates @ (-2.0 * query.T)
+    cost += np.einsum('tij,tij->ti', templates, templates)[:, :, np.newaxis]
+    cost += np.einsum('ij,ij->i', query, query)
+    np.maximum(cost, 0.0, out=cost)
+
+    prev = np.full((count, length + 1), np.inf)
+    prev[:, 0] = 0.0
+    for i in range(1, length + 1):
+        lo, hi = max(1, i - radius), min(length, i + radius)
+        c = cost[:, i - 1, lo - 1:hi]
+        # D[i, j] = c[j] + min(D[i-1, j-1], D[i-1, j], D[i, j-1])
+        #         = S[j] + min over l <= j of (m[l] - S[l] + c[l]), S = cumsum(c)
+        m = np.minimum(prev[:, lo - 1:hi], prev[:, lo:hi + 1])
+        s = np.cumsum(c, axis=1)
+        cur = np.full((count, length + 1), np.inf)
+        cur[:, lo:hi + 1] = s + np.minimum.accumulate(m - s + c, axis=1)
+        prev = cur
+        if (prev[:, lo:hi + 1].min(axis=1) > abandon).all():
+            return np.full(count, np.inf)
+    return prev[:, length]
+
+
+class SequenceRecognizer:
+    """
+    Recognizes dynamic (moving) signs from the last `window_seconds` of one hand.
+
+    Every frame, update() computes that frame's trajectory descriptor
+    incrementally and appends it (with the raw landmarks and timestamp) to ring
+    buffers. When the hand is moving and there is a full window of history,
+    the window is resampled to `length` steps and classified by k-nearest-
+    neighbor DTW against recorded templates, visiting templates in LB_Keogh
+    order and stopping once no lower bound can beat the current k-th best.
+
+    Classification is rate limited by a CPU budget: each frame adds budget_ms
+    of credit and spends the measured cost of the whole update (descriptor,
+    buffers and any classification), so on average the recognizer stays
+    within budget_ms per frame next to the static classifier. A frame only
+    classifies if the remaining credit covers the expected classification
+    cost; in between, the last result is repeated.
+    """
+
+    def __init__(self, window_seconds=1.0, length=20, radius=3, n_neighbors=3, budget_ms=2.0,
+                 min_motion=0.5, max_gap=0.25, capacity=256, reject_factor=3.0):
+        self.window_seconds = window_seconds
+        self.length = length
+        self.radius = radius
+        self.n_neighbors = n_neighbors
+        self.budget = budget_ms / 1000.0
+        self.min_motion = min_motion # palm lengths/second; slower windows are left to the static classifier
+        self.max_gap = max_gap # seconds without a hand before the history is dropped
+        self.reject_factor = reject_factor
+
+        self.features = TrajectoryFeatures()
+        self.times = RingBuffer(capacity)
+        self.descriptors = RingBuffer(capacity, (TrajectoryFeatures.NUM_FEATURES,))
+        self.speeds = RingBuffer(capacity)
+        self.landmarks = RingBuffer(capacity, (21, 3), np.float32)
+
+        self.templates = np.empty((0, length, TrajectoryFeatures.NUM_FEATURES))
+        self.labels = np.empty(0, dtype=str)
+        self.classes = np.empty(0, dtype=str)
+        self.reject_distance = np.inf
+
+        self.classify_time = 0.0 # smoothed cost of one classification, seconds
+        self.classifications = 0
+        self.reset()
+
+    def reset(self):
+        """Forget the hand's history (e.g. when it leaves the frame)"""
+        self.features.reset()
+        for ring in (self.times, self.descriptors, self.speeds, self.landmarks):
+            ring.clear()
+        self._window_start = 0 # absolute index of the first frame of the current window
+        self._speed_sum = 0.0 # running sum of speeds over the window
+        self._credit = 0.0
+        self._result = (None, 0.0)
+
+    # -- templates --------------------------------------------------------
+
+    def window_from_clip(self, landmarks, times):
+        """Template window for a recorded clip: its last window_seconds, through the same per-frame features"""
+        features = TrajectoryFeatures(self.features.smoothing, self.features.velocity_scale)
+        descriptors = np.array([features.update(lm, t)[0] for lm, t in zip(landmarks, times)])
+        return resample(np.asarray(times), descriptors, times[-1], self.window_seconds, self.length)
+
+    def fit(self, windows, labels):
+        """
+        Use (T, length, D) template windows with their labels. The rejection
+        distance is reject_factor times the median distance of each template
+        to its nearest other template.
+        """
+        self.templates = np.ascontiguousarray(windows, dtype=np.float64)
+        self.labels = np.asarray(labels).astype(str)
+        self.classes = np.unique(self.labels)
+        if len(self.templates) > 1:
+            nearest = []
+            for i, window in enumerate(self.templates):
+                others = np.delete(self.templates, i, axis=0)
+                nearest.append(dtw_distances(window, others, self.radius).min())
+            self.reject_distance = self.reject_factor * float(np.median(nearest))
+        else:
+            self.reject_distance = np.inf
+        return self
+
+    def load_templates(self, path=DEFAULT_SEQUENCE_PATH):
+        """Fit on the clips recorded under path/<label>/*.npz. Returns the number of templates"""
+        windows = []
+        labels = []
+        if os.path.isdir(path):
+            for label in sorted(os.listdir(path)):
+                label_dir = os.path.join(path, label)
+                if not os.path.isdir(label_dir):
+                    continue
+                for name in sorted(os.listdir(label_dir)):
+                    if name.endswith(".npz"):
+                        with np.load(os.path.join(label_dir, name)) as clip:
+                            windows.append(self.window_from_clip(clip["landmarks"], clip["times"]))
+                        labels.append(label)
+        if windows:
+            self.fit(np.array(windows), labels)
+        return len(windows)
+
+    def save_clip(self, label, path=DEFAULT_SEQUENCE_PATH):
+        """Save the current window's raw landmarks and timestamps as a template clip"""
+        label_dir = os.path.join(path, label)
+        os.makedirs(label_dir, exist_ok=True)
+        name = os.path.join(label_dir, f"{len(os.listdir(label_dir)):04d}.npz")
+        np.savez(name, landmarks=self.landmarks.since(self._window_start),
+                 times=self.times.since(self._window_start))
+        return name
+
+    # -- streaming --------------------------------------------------------
+
+    def update(self, landmarks, now):
+        """
+        Feed one frame: landmarks (21, 2|3) of the hand, or None if no hand was
+        found, observed at `now` seconds. Returns (label, confidence); label is
+        None while the hand is still, history is short or nothing matches.
+        """
+        start = time.perf_counter()
+        self._credit = min(self._credit + self.budget, max(4 * self.budget, 2 * self.classify_time))
+        result = self._advance(landmarks, now, start)
+        self._credit -= time.perf_counter() - start
+        return result
+
+    def _advance(self, landmarks, now, start):
+        # update() without the budget accounting; start is when the frame's update began
+        if landmarks is None or not len(landmarks):
+            if self.times.count and now - self.times[self.times.count - 1] > self.max_gap:
+                self.reset()
+            return None, 0.0
+
+        descriptor, speed = self.features.update(landmarks, now)
+
+        # The slot about to be overwritten may still be inside the window
+        if len(self.times) == self.times.capacity and self._window_start <= self.times.first:
+            self._speed_sum -= self.speeds[self.times.first]
+            self._window_start = self.times.first + 1
+        index = self.times.count
+        self.times.append(now)
+        self.descriptors.append(descriptor)
+        self.speeds.append(speed)
+        self.landmarks.append(np.asarray(landmarks, dtype=np.float32)[:, :3] if np.shape(landmarks)[1] == 3
+                              else np.pad(np.asarray(landmarks, dtype=np.float32), ((0, 0), (0, 1))))
+        self._speed_sum += speed
+
+        # Keep exactly one frame at or before the window start, for interpolation
+        window_begin = now - self.window_seconds
+        while self._window_start < index and self.times[self._window_start + 1] <= window_begin:
+            self._speed_sum -= self.speeds[self._window_start]
+            self._window_start += 1
+
+        if not len(self.templates) or self.times[self._window_start] > window_begin:
+            return None, 0.0
+        if self._speed_sum / (index + 1 - self._window_start) < self.min_motion:
+            self._result = (None, 0.0)
+            return self._result
+        if self._credit - (time.perf_counter() - start) < self.classify_time:
+            return self._result
+
+        classify_start = time.perf_counter()
+        self._result = self.classify(self.window(now))
+        cost = time.perf_counter() - classify_start
+        self.classify_time = cost if not self.classifications else 0.8 * self.classify_time + 0.2 * cost
+        self.classifications += 1
+        return self._result
+
+    def window(self, now):
+        """The current window resampled to (length, D)"""
+        return resample(self.times.since(self._window_start), self.descriptors.since(self._window_start),
+                        now, self.window_seconds, self.length)
+
+    def classify(self, window, batch_size=8):
+        """(label, confidence) for a (length, D) window by pruned k-NN DTW"""
+        k = min(self.n_neighbors, len(self.templates))
+        bounds = lb_keogh(window, self.templates, self.radius)
+        order = np.argsort(bounds)
+        best = np.full(k, np.inf)
+        best_labels = np.full(k, "", dtype=self.labels.dtype)
+
+        start = 0
+        while start < len(order):
+            candidates = order[start:start + batch_size]
+            candidates = candidates[bounds[candidates] < best[-1]]
+            if not len(candidates):
+                break # bounds are sorted, so no later template can get closer
+            dist = dtw_distances(window, self.templates[candidates], self.radius, abandon=best[-1])
+            merged = np.concatenate([best, dist])
+            keep = np.argsort(merged, kind='stable')[:k]
+            best_labels = np.concatenate([best_labels, self.labels[candidates]])[keep]
+            best = merged[keep]
+            # The closest bounds usually settle the k best; check the rest in larger batches
+            start += batch_size
+            batch_size *= 4
+
+        if best[0] > self.reject_distance:
+            return None, 0.0
+        found = best_labels[np.isfinite(best)]
+        names, votes = np.unique(found, return_counts=True)
+        winner = votes.argmax()
+        return names[winner], votes[winner] / k
+
+
+def synthetic_clip(label, fps=30, duration=1.0, seed=0):
+    """
+    Landmarks (frames, 21, 3) and timestamps of a hand whose index tip traces
+    a letter-like path: "Z" (zig-zag), "J" (hook) or "O" (circle).
+    """
+    rng = np.random.default_rng(seed)
+    times = np.arange(0.0, duration, 1.0 / fps)
+    phase = times / duration
+    if label == "Z":
+        x = np.interp(phase, [0, 1 / 3, 2 / 3, 1], [0, 1, 0, 1])
+        y = np.interp(phase, [0, 1 / 3, 2 / 3, 1], [0, 0, 1, 1])
+    elif label == "J":
+        x = np.where(phase < 0.6, 0.5, 0.5 - 0.5 * np.sin((phase - 0.6) / 0.4 * np.pi))
+        y = np.where(phase < 0.6, phase / 0.6, 1.0 + 0.3 * np.sin((phase - 0.6) / 0.4 * np.pi))
+    else:
+        x = 0.5 + 0.5 * np.cos(2 * np.pi * phase)
+        y = 0.5 + 0.5 * np.sin(2 * np.pi * phase)
+    hand = np.random.default_rng(0).random((21, 3)) * 60 # same hand shape in every clip
+    hand[9] = hand[0] + [0, -60, 0] # palm length of 60 px
+    offset = np.stack([x, y, np.zeros_like(x)], axis=1) * 150 + rng.normal(0, 2, (len(times), 3))
+    landmarks = hand[np.newaxis] + offset[:, np.newaxis, :]
+    return landmarks, times
+
+
+def synthetic_recognizer(templates_per_class=20, **params):
+    """SequenceRecognizer fitted on synthetic "Z", "J" and "O" clips of varying speed"""
+    recognizer = SequenceRecognizer(**params)
+    windows, labels = [], []
+    for i, label in enumerate("ZJO" * templates_per_class):
+        landmarks, times = synthetic_clip(label, seed=i, duration=np.random.default_rng(i).uniform(0.8, 1.2))
+        windows.append(recognizer.window_from_clip(landmarks, times))
+        labels.append(label)
+    return recognizer.fit(np.array(windows), labels)
+
+
+def synthetic_stream(signs="ZJO" * 30, fps=30):
+    """(frames, 21, 3) landmarks performing each sign after half a second of holding still"""
+    clips = []
+    for i, label in enumerate(signs):
+        landmarks = synthetic_clip(label, fps=fps, seed=1000 + i)[0]
+        clips += [np.repeat(landmarks[:1], fps // 2, axis=0), landmarks]
+    return np.concatenate(clips)
+
+
+def benchmark(templates_per_class=20, frames=2000, fps=30):
+    """Per-frame update cost with synthetic templates and a synthetic moving hand"""
+    recognizer = synthetic_recognizer(templates_per_class)
+    stream = synthetic_stream(fps=fps)
+    timings = []
+    results = []
+    for i in range(min(frames, len(stream))):
+        start = time.perf_counter()
+        results.append(recognizer.update(stream[i], i / fps)[0])
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    print(f"{len(recognizer.templates)} templates, {len(timings)} frames at {fps} FPS")
+    print(f"update: mean {timings.mean():.3f} ms, p50 {np.percentile(timings, 50):.3f} ms, "
+          f"p99 {np.percentile(timings, 99):.3f} ms, max {timings.max():.3f} ms (budget {recognizer.budget * 1000:.1f} ms)")
+    print(f"classifications: {recognizer.classifications} ({recognizer.classify_time * 1000:.2f} ms each)")
+    # Collapse repeats to the sequence of recognized signs
+    spotted = [label for i, label in enumerate(results) if label is not None and (i == 0 or results[i - 1] != label)]
+    print(f"recognized: {''.join(spotted)}")
+    return results
+
+
+def record(label, source=0, samples=10, path=DEFAULT_SEQUENCE_PATH):
+    """Record `samples` template clips of a moving sign from the camera"""
+    import cv2
+    from hand_detector import HandDetector
+    from pipeline import open_source
+
+    detector = HandDetector(detection_con=0.8)
+    recognizer = SequenceRecognizer()
+    cap = open_source(source)
+    print(f"Recording '{label}': press 'r', then perform the sign within {recognizer.window_seconds:.1f}s. 'q' quits.")
+
+    saved = 0
+    record_until = None
+    while saved < samples:
+        success, img = cap.read()
+        if not success:
+            break
+        now = time.perf_counter()
+        detector.find_hands(img)
+        landmarks, _, _ = detector.find_landmarks(img, space="pixel")
+        recognizer.update(landmarks[0] if len(landmarks) else None, now)
+
+        if record_until is not None and now >= record_until:
+            print(f"Saved {recognizer.save_clip(label, path)}")
+            saved += 1
+            record_until = None
+        status = f"{label}: {saved}/{samples}" + ("  RECORDING" if record_until is not None else "  press 'r'")
+        cv2.putText(img, status, (10, 50), cv2.FONT_HERSHEY_PLAIN, 2, (0, 0, 255), 2)
+        cv2.imshow("Sequence Recorder", img)
+        key = cv2.waitKey(1)
+        if key == ord('q'):
+            break
+        elif key == ord('r') and record_until is None:
+            record_until = now + recognizer.window_seconds
+
+    cap.release()
+    cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Dynamic sign (motion) templates and benchmark")
+    sub = parser.add_subparsers(dest="command", required=True)
+    rec = sub.add_parser("record", help="Record template clips of a moving sign from the camera")
+    rec.add_argument("label")
+    rec.add_argument("--samples", type=int, default=10)
+    rec.add_argument("--source", default="0", help="Camera index or path to a video file")
+    rec.add_argument("--path", default=DEFAULT_SEQUENCE_PATH)
+    bench = sub.add_parser("bench", help="Per-frame cost on synthetic motion")
+    bench.add_argument("--templates-per-class", type=int, default=20)
+    bench.add_argument("--fps", type=int, default=30)
+    args = parser.parse_args()
+
+    if args.command == "record":
+        record(args.label, args.source, args.samples, args.path)
+    else:
+        benchmark(args.templates_per_class, fps=args.fps)
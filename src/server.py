@@ -0,0 +1,269 @@
+import argparse
+import asyncio
+import json
+import time
+import uuid
+import numpy as np
+from dataset_store import HANDEDNESS_CODES, HANDEDNESS_UNKNOWN
+from game_engine import GameEngine
+
+# Browser and mobile front ends run MediaPipe themselves and send landmarks
+# (not video) here; recognition and game state live on the server.
+#
+#   POST /predict  {"session": "id", "landmarks": [[x, y, z], ...21], "handedness": "Right", "start": false}
+#                  -> {"session": "id", "sign": "B", "confidence": 0.8, "ui": {...}}
+#   GET  /stats    -> sessions, requests, batching statistics
+#
+# landmarks are in pixels, or normalized with "image_size": [width, height];
+# null (or omitted) when no hand is visible. "handedness" is MediaPipe's
+# "Left"/"Right" label (optional). A request without a session
+# gets a new one. "start": true starts (or restarts) that session's game.
+
+MAX_BODY = 1 << 16
+
+
+class PayloadTooLarge(ValueError):
+    """A request body over MAX_BODY; answered with 413 before the connection is closed"""
+
+
+async def read_message(reader):
+    """
+    Read one HTTP/1.1 message from an asyncio StreamReader.
+    Returns (start_line, headers, body), or None when the connection closed.
+    Raises PayloadTooLarge (without reading the body) if it is over MAX_BODY.
+    """
+    start_line = await reader.readline()
+    if not start_line:
+        return None
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > MAX_BODY:
+        raise PayloadTooLarge(f"request body of {length} bytes is over the {MAX_BODY} byte limit")
+    body = await reader.readexactly(length) if length else b""
+    return start_line.decode("latin-1").strip(), headers, body
+
+
+class Session:
+    """One front end's game"""
+
+    def __init__(self):
+        self.game = GameEngine()
+        self.last_seen = time.time()
+
+
+class InferenceServer:
+    """
+    Landmark-in, prediction-out server for many concurrent sessions.
+
+    Requests from all connections are queued and handled in micro-batches:
+    the batch loop takes whatever is pending (waiting at most max_wait_ms
+    for more after the first request, up to max_batch), featurizes all hands
+    with one FeatureExtractor call and classifies them with one
+    SignClassifier.predict_batch call, then updates each session's
+    GameEngine in arrival order and answers every request. Under load,
+    batches grow on their own, so per-request cost falls as traffic rises.
+    Sessions idle for session_timeout seconds are dropped.
+    """
+
+    def __init__(self, classifier, extractor=None, max_batch=64, max_wait_ms=2.0, session_timeout=300.0):
+        self.classifier = classifier
+        self.extractor = extractor if extractor is not None else classifier.feature_extractor()
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.session_timeout = session_timeout
+        self.sessions = {}
+        self.pending = None # asyncio.Queue, created on the serving loop
+        self.last_sweep = time.time()
+        self.requests = 0
+        self.batches = 0
+        self.max_batch_seen = 0
+
+    async def predict(self, session_id, landmarks, start=False, handedness=HANDEDNESS_UNKNOWN):
+        """Queue one frame for the next batch and wait for its result"""
+        future = asyncio.get_running_loop().create_future()
+        await self.pending.put((session_id, landmarks, handedness, start, future))
+        return await future
+
+    async def _batch_loop(self):
+        while True:
+            batch = [await self.pending.get()]
+            self._drain(batch)
+            if len(batch) < self.max_batch and self.max_wait > 0:
+                # Give requests arriving right behind this one a chance to join
+                await asyncio.sleep(self.max_wait)
+                self._drain(batch)
+            try:
+                self._run_batch(batch)
+            except Exception as e:
+                for *_, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _drain(self, batch):
+        while len(batch) < self.max_batch and not self.pending.empty():
+            batch.append(self.pending.get_nowait())
+
+    def _run_batch(self, batch):
+        hands = [i for i, item in enumerate(batch) if item[1] is not None]
+        labels = [None] * len(batch)
+        confidences = [0.0] * len(batch)
+        if hands and self.classifier.model is not None:
+            # One featurize and one classify call for the whole batch
+            features = self.extractor.extract_features_batch(np.stack([batch[i][1] for i in hands]),
+                                                             [batch[i][2] for i in hands])
+            predicted, confidence = self.classifier.predict_batch(features)
+            for j, i in enumerate(hands):
+                labels[i] = None if predicted[j] is None else str(predicted[j])
+                confidences[i] = float(confidence[j])
+
+        now = time.time()
+        for (session_id, _, _, start, future), label, confidence in zip(batch, labels, confidences):
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = Session()
+            session.last_seen = now
+            if start:
+                session.game.start_game()
+            session.game.update(label, confidence, now)
+            if not future.done():
+                future.set_result({"session": session_id, "sign": label, "confidence": confidence,
+                                   "ui": session.game.get_ui_data()})
+
+        self.requests += len(batch)
+        self.batches += 1
+        self.max_batch_seen = max(self.max_batch_seen, len(batch))
+        if now - self.last_sweep > self.session_timeout / 4:
+            self.last_sweep = now
+            for session_id in [s for s, session in self.sessions.items()
+                               if now - session.last_seen > self.session_timeout]:
+                del self.sessions[session_id]
+
+    def stats(self):
+        return {"sessions": len(self.sessions), "requests": self.requests, "batches": self.batches,
+                "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+                "max_batch_size": self.max_batch_seen}
+
+    @staticmethod
+    def parse_landmarks(request):
+        """(21, 3) float64 pixel landmarks from a request (z = 0 if not sent), or None for no hand"""
+        landmarks = request.get("landmarks")
+        if landmarks is None:
+            return None
+        landmarks = np.asarray(landmarks, dtype=np.float64)
+        if landmarks.ndim != 2 or landmarks.shape[0] != 21 or landmarks.shape[1] not in (2, 3):
+            raise ValueError(f"expected 21 landmarks of 2 or 3 coordinates, got shape {landmarks.shape}")
+        if landmarks.shape[1] == 2:
+            landmarks = np.pad(landmarks, ((0, 0), (0, 1)))
+        if "image_size" in request:
+            width, height = request["image_size"]
+            # MediaPipe's z is on the same scale as x
+            landmarks *= [width, height, width]
+        return landmarks
+
+    async def handle(self, method, path, body):
+        """Route one request. Returns (status, payload)"""
+        if method == "GET" and path == "/stats":
+            return "200 OK", self.stats()
+        if method != "POST" or path != "/predict":
+            return "404 Not Found", {"error": f"no route for {method} {path}"}
+        try:
+            request = json.loads(body)
+            if not isinstance(request, dict):
+                raise ValueError("expected a JSON object")
+            landmarks = self.parse_landmarks(request)
+            handedness = HANDEDNESS_CODES.get(request.get("handedness"), HANDEDNESS_UNKNOWN)
+        except (ValueError, TypeError, AttributeError, KeyError) as e:
+            return "400 Bad Request", {"error": str(e)}
+        session_id = str(request.get("session") or uuid.uuid4().hex)
+        try:
+            return "200 OK", await self.predict(session_id, landmarks, bool(request.get("start")), handedness)
+        except Exception as e:
+            return "500 Internal Server Error", {"error": str(e)}
+
+    async def _serve_connection(self, reader, writer):
+        # HTTP/1.1 keep-alive: one connection carries a session's whole frame stream
+        try:
+            while True:
+                message = await read_message(reader)
+                if message is None:
+                    break
+                start_line, headers, body = message
+                method, path = start_line.split(" ")[:2]
+                if method == "OPTIONS":
+                    # CORS preflight from browser front ends
+                    writer.write(b"HTTP/1.1 204 No Content\r\nAccess-Control-Allow-Origin: *\r\n"
+                                 b"Access-Control-Allow-Methods: GET, POST\r\n"
+                                 b"Access-Control-Allow-Headers: Content-Type\r\nContent-Length: 0\r\n\r\n")
+                else:
+                    status, payload = await self.handle(method, path, body)
+                    self.write_response(writer, status, payload)
+                await writer.drain()
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except PayloadTooLarge as e:
+            # The unread body is still on the connection, so answer and close it
+            try:
+                self.write_response(writer, "413 Payload Too Large", {"error": str(e)}, close=True)
+                await writer.drain()
+            except ConnectionError:
+                pass
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def write_response(writer, status, payload, close=False):
+        """Write a JSON response; close adds "Connection: close" for a connection about to be closed"""
+        data = json.dumps(payload).encode()
+        connection = "Connection: close\r\n" if close else ""
+        writer.write(f"HTTP/1.1 {status}\r\nContent-Type: application/json\r\n"
+                     f"Access-Control-Allow-Origin: *\r\n{connection}Content-Length: {len(data)}\r\n\r\n"
+                     .encode("latin-1") + data)
+
+    async def serve(self, host="127.0.0.1", port=8765, ready=None):
+        """Serve until cancelled. ready: optional callback run once listening"""
+        self.pending = asyncio.Queue()
+        batcher = asyncio.create_task(self._batch_loop())
+        server = await asyncio.start_server(self._serve_connection, host, port)
+        print(f"Serving on http://{host}:{port} (max batch {self.max_batch}, max wait {self.max_wait * 1000:g} ms)")
+        if ready is not None:
+            ready()
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            batcher.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve sign recognition to remote front ends over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--model", default="../data/model.pkl")
+    parser.add_argument("--max-batch", type=int, default=64, help="Most requests classified in one call")
+    parser.add_argument("--max-wait-ms", type=float, default=2.0,
+                        help="How long a batch waits for more requests after the first")
+    parser.add_argument("--demo-model", action="store_true",
+                        help="Without a trained model, fit a throwaway one on synthetic hands (for load tests)")
+    args = parser.parse_args()
+
+    if args.demo_model:
+        from benchmark import load_classifier, synthetic_landmarks
+
+        classifier = load_classifier(args.model, synthetic_landmarks(500))
+    else:
+        from classifier import SignClassifier
+
+        classifier = SignClassifier(args.model)
+    server = InferenceServer(classifier, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
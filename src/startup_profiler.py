@@ -0,0 +1,92 @@
+import argparse
+import json
+import sys
+import time
+from contextlib import contextmanager
+
+
+class StartupProfiler:
+    """
+    Records how long each startup step (imports, MediaPipe graph build,
+    model load, camera open) takes, and the time until the first frame is shown.
+    Create it before the heavy imports so they are covered.
+    """
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.stages = []
+        self.first_frame = None
+
+    @contextmanager
+    def stage(self, name):
+        t0 = time.perf_counter()
+        yield
+        self.stages.append((name, time.perf_counter() - t0))
+
+    def mark_first_frame(self):
+        """Call when the first frame has been processed and shown; later calls are ignored"""
+        if self.first_frame is None:
+            self.first_frame = time.perf_counter() - self.start
+
+    def summary(self):
+        return {
+            "stages_ms": {name: duration * 1000 for name, duration in self.stages},
+            "time_to_first_frame_ms": self.first_frame * 1000 if self.first_frame is not None else None,
+        }
+
+    def report(self):
+        print("Startup profile:")
+        for name, duration in self.stages:
+            print(f"  {name:<28} {duration * 1000:8.1f} ms")
+        accounted = sum(duration for _, duration in self.stages)
+        print(f"  {'total of stages':<28} {accounted * 1000:8.1f} ms")
+        if self.first_frame is not None:
+            print(f"  {'time to first frame':<28} {self.first_frame * 1000:8.1f} ms")
+
+
+def probe(model_path="../data/model.pkl"):
+    """
+    Cold-start probe, meant to run in a fresh interpreter: imports the
+    recognition modules, loads the model and pushes one frame through
+    featurize -> classify -> game update. MediaPipe stages are included when
+    it is installed. Returns StartupProfiler.summary().
+    """
+    profiler = StartupProfiler()
+    with profiler.stage("import numpy"):
+        import numpy as np
+    with profiler.stage("import app modules"):
+        from classifier import SignClassifier
+        from game_engine import GameEngine
+    try:
+        with profiler.stage("import cv2 + mediapipe"):
+            import cv2
+            import mediapipe
+        with profiler.stage("build MediaPipe graph"):
+            from hand_detector import HandDetector
+            HandDetector(detection_con=0.8)
+    except (ImportError, AttributeError):
+        pass
+    with profiler.stage("load model"):
+        classifier = SignClassifier(model_path)
+
+    extractor = classifier.feature_extractor()
+    game = GameEngine()
+    landmarks = np.random.default_rng(0).random((1, 21, 2)) * 500
+    with profiler.stage("first frame"):
+        features = extractor.extract_features_batch(landmarks)[0]
+        predicted_sign, confidence = classifier.predict(features) if classifier.model is not None else (None, 0.0)
+        game.update(predicted_sign, confidence)
+    profiler.mark_first_frame()
+    return profiler.summary()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cold-start probe: prints a JSON startup profile")
+    parser.add_argument("--model", default="../data/model.pkl")
+    args = parser.parse_args()
+    # Keep stdout clean for the JSON line (model loading may print warnings)
+    stdout = sys.stdout
+    sys.stdout = sys.stderr
+    summary = probe(args.model)
+    sys.stdout = stdout
+    print(json.dumps(summary))
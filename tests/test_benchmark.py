@@ -0,0 +1,46 @@
+import numpy as np
+from benchmark import LatencyRecorder, load_landmarks, replay, synthetic_landmarks
+from feature_extractor import FeatureExtractor
+from game_engine import GameEngine
+
+
+class RecordingClassifier:
+    """Stands in for SignClassifier and keeps every feature vector it is asked about"""
+
+    def __init__(self):
+        self.features = []
+
+    def predict(self, features):
+        self.features.append(np.array(features))
+        return None, 0.0
+
+
+def test_recording_round_trip(tmp_path):
+    landmarks = synthetic_landmarks(10)
+    handedness = np.array([0, 1] * 5, dtype=np.int8)
+    np.savez(tmp_path / "clip.npz", landmarks=landmarks, handedness=handedness)
+    loaded, loaded_handedness = load_landmarks(tmp_path / "clip.npz")
+    np.testing.assert_array_equal(loaded, landmarks)
+    np.testing.assert_array_equal(loaded_handedness, handedness)
+
+    np.save(tmp_path / "clip.npy", landmarks[:, :, :2])
+    loaded, loaded_handedness = load_landmarks(tmp_path / "clip.npy")
+    assert loaded.shape == (10, 21, 2) and loaded_handedness is None
+
+
+def test_replay_featurizes_float_landmarks_with_handedness():
+    landmarks = synthetic_landmarks(20)
+    # Sub-pixel coordinates and depth must reach the extractor untouched
+    assert np.any(landmarks != np.rint(landmarks)) and np.any(landmarks[:, :, 2] != 0)
+    handedness = np.array([0, 1] * 10, dtype=np.int8)
+    extractor = FeatureExtractor(2)
+    classifier = RecordingClassifier()
+    recorder = LatencyRecorder()
+
+    replay(landmarks, handedness, extractor, classifier, GameEngine(), recorder)
+
+    expected = extractor.extract_features_batch(landmarks, handedness)
+    np.testing.assert_allclose(np.array(classifier.features), expected, rtol=0, atol=1e-6)
+    summary = recorder.summary()
+    assert set(summary) == {"featurize", "classify", "game_update", "total"}
+    assert all(stage["count"] == 20 for stage in summary.values())
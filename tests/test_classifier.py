@@ -0,0 +1,144 @@
+import csv
+import numpy as np
+import pytest
+import classifier as classifier_module
+from classifier import SignClassifier
+from dataset_store import DatasetStore, import_csv
+from feature_benchmark import synthetic_hands
+from feature_extractor import FeatureExtractor
+from model_artifact import ModelArtifact
+
+
+@pytest.fixture(scope="module")
+def hands():
+    return synthetic_hands(num_signs=4, samples_per_sign=50)
+
+
+def write_csv(path, landmarks, labels):
+    features = FeatureExtractor(1).extract_features_batch(landmarks)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["label"] + [f"f{i}" for i in range(features.shape[1])])
+        for label, row in zip(labels, features):
+            writer.writerow([label] + list(row))
+
+
+def test_store_migrated_from_csv_trains_v1(tmp_path, hands):
+    landmarks, _, labels = hands
+    write_csv(tmp_path / "dataset.csv", landmarks, labels)
+    store_path = str(tmp_path / "dataset")
+    import_csv(str(tmp_path / "dataset.csv"), store_path)
+
+    classifier = SignClassifier(str(tmp_path / "model.pkl"))
+    classifier.train_model(store_path)
+    assert classifier.feature_version == 1
+    assert classifier.engine.num_features == 11
+
+    reloaded = SignClassifier(str(tmp_path / "model.pkl"))
+    assert reloaded.feature_version == 1
+    features = reloaded.feature_extractor().extract_features_batch(landmarks[:1])[0]
+    assert reloaded.predict(features)[0] == labels[0]
+
+
+def test_store_migrated_from_csv_rejects_v2(tmp_path, hands):
+    landmarks, _, labels = hands
+    write_csv(tmp_path / "dataset.csv", landmarks, labels)
+    import_csv(str(tmp_path / "dataset.csv"), str(tmp_path / "dataset"))
+    with pytest.raises(ValueError, match="feature_version=1"):
+        SignClassifier(str(tmp_path / "model.pkl")).train_model(str(tmp_path / "dataset"), feature_version=2)
+
+
+def test_mixed_store_keeps_every_sample_by_default(tmp_path, hands, capsys):
+    landmarks, handedness, labels = hands
+    store = DatasetStore(str(tmp_path / "dataset"))
+    store.append_chunk(list(labels[:100]), features=FeatureExtractor(1).extract_features_batch(landmarks[:100]),
+                       feature_version=1)
+    store.append_chunk(list(labels[100:]), landmarks=landmarks[100:], handedness=handedness[100:])
+
+    assert SignClassifier.dataset_feature_version(store.path) == 1
+    assert "100 of 200 samples" in capsys.readouterr().out
+    # Asking for v2 explicitly trains on the samples that have landmarks
+    X, _ = SignClassifier.load_dataset(store.path, SignClassifier.dataset_feature_version(store.path, 2))
+    assert X.shape == (100, 44)
+
+
+def test_store_with_landmarks_trains_current_version(tmp_path, hands):
+    landmarks, handedness, labels = hands
+    store = DatasetStore(str(tmp_path / "dataset"))
+    store.append_chunk(list(labels), landmarks=landmarks, handedness=handedness)
+    classifier = SignClassifier(str(tmp_path / "model.pkl"))
+    classifier.train_model(store.path)
+    assert classifier.feature_version == FeatureExtractor.FEATURE_VERSION
+    assert SignClassifier(str(tmp_path / "model.pkl")).feature_extractor().num_features == 44
+
+
+def train_v1(tmp_path, landmarks, labels):
+    write_csv(tmp_path / "dataset.csv", landmarks, labels)
+    classifier = SignClassifier(str(tmp_path / "model.pkl"))
+    classifier.train_model(str(tmp_path / "dataset.csv"))
+    return classifier
+
+
+def test_learned_v1_model_reloads_as_v1_from_pickle(tmp_path, hands):
+    landmarks, _, labels = hands
+    classifier = train_v1(tmp_path, landmarks[:150], labels[:150])
+    features = FeatureExtractor(1).extract_features_batch(landmarks[150:])
+    assert classifier.learn(features, labels[150:], persist=False) == 50
+    classifier.save_model()
+    # Without the artifact, the pickle alone has to tell the feature set
+    ModelArtifact.remove(classifier.artifact_path)
+
+    reloaded = SignClassifier(str(tmp_path / "model.pkl"))
+    assert reloaded.feature_version == 1
+    assert len(reloaded.engine.reference) == len(classifier.engine.reference)
+    assert reloaded.predict(features[0])[0] == labels[150]
+
+
+def test_learn_into_empty_model_takes_the_feature_set_of_its_samples(tmp_path, hands):
+    landmarks, _, labels = hands
+    classifier = SignClassifier(str(tmp_path / "model.pkl"))
+    assert classifier.model is None
+    classifier.learn(FeatureExtractor(1).extract_features_batch(landmarks), labels, persist=False)
+    assert classifier.feature_version == 1
+    assert classifier.feature_extractor().num_features == 11
+
+
+def test_learn_adds_a_new_sign_to_the_shared_model(tmp_path, hands):
+    landmarks, _, labels = hands
+    classifier = train_v1(tmp_path, landmarks[:150], labels[:150])
+    features = FeatureExtractor(1).extract_features_batch(landmarks[150:])
+    assert classifier.predict(features[0])[0] != "wave"
+    classifier.learn(features, ["wave"] * len(features), persist=False)
+    assert classifier.predict(features[0])[0] == "wave"
+
+
+def test_user_layer_only_answers_for_its_user(tmp_path, monkeypatch, hands):
+    monkeypatch.setattr(classifier_module, "USER_STORE_ROOT", str(tmp_path / "users"))
+    landmarks, handedness, labels = hands
+    classifier = train_v1(tmp_path, landmarks[:150], labels[:150])
+    features = FeatureExtractor(1).extract_features_batch(landmarks[150:])
+    classifier.learn(features, ["wave"] * len(features), user="alice", landmarks=landmarks[150:],
+                     handedness=handedness[150:])
+
+    assert classifier.predict(features[0])[0] != "wave"
+    classifier.load_user("alice")
+    assert classifier.predict(features[0])[0] == "wave"
+    # The shared model is unchanged
+    assert len(classifier.engine.reference) == 120
+
+    # A fresh process picks the samples up from alice's store
+    reloaded = SignClassifier(str(tmp_path / "model.pkl"))
+    reloaded.load_user("alice")
+    assert len(reloaded.user_layers["alice"].reference) == 50
+    assert reloaded.predict(features[0])[0] == "wave"
+    reloaded.load_user("bob")
+    assert reloaded.predict(features[0])[0] != "wave"
+
+
+def test_max_per_class_keeps_the_newest_samples(tmp_path, hands):
+    landmarks, _, labels = hands
+    classifier = SignClassifier(str(tmp_path / "model.pkl"), max_per_class=10)
+    features = FeatureExtractor(1).extract_features_batch(landmarks[:50])
+    classifier.learn(features, ["wave"] * 50, persist=False)
+    assert len(classifier.engine.reference) == 10
+    np.testing.assert_array_equal(np.sort(classifier.engine.reference, axis=0), np.sort(features[40:], axis=0))
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from sklearn.model_selection import train_test_split
+from sklearn.neighbors import KNeighborsClassifier
+from condense import condense_model
+from feature_benchmark import synthetic_hands
+from feature_extractor import FeatureExtractor
+
+
+@pytest.fixture(scope="module")
+def split():
+    landmarks, handedness, labels = synthetic_hands(num_signs=6, samples_per_sign=80)
+    features = FeatureExtractor(2).extract_features_batch(landmarks, handedness)
+    return train_test_split(features, labels, test_size=0.25, random_state=0, stratify=labels)
+
+
+def test_fixed_prototype_count(split):
+    X_train, X_test, y_train, y_test = split
+    model, report = condense_model(KNeighborsClassifier(n_neighbors=5), X_train, y_train, X_test, y_test,
+                                   per_class=10)
+    assert report["condensed"]["references"] == 60 == len(model._fit_X)
+    assert report["per_class"] == 10
+    assert "validation" not in report
+
+
+def test_tolerance_is_chosen_without_the_test_set(split):
+    X_train, X_test, y_train, y_test = split
+    model = KNeighborsClassifier(n_neighbors=5)
+    _, report = condense_model(model, X_train, y_train, X_test, y_test, max_accuracy_loss=0.02)
+    # Scrambled test labels change the reported accuracy but not the choice
+    scrambled = np.random.default_rng(0).permutation(y_test)
+    _, scrambled_report = condense_model(model, X_train, y_train, X_test, scrambled, max_accuracy_loss=0.02)
+
+    assert report["per_class"] == scrambled_report["per_class"] is not None
+    assert report["validation"] == scrambled_report["validation"]
+    assert report["condensed"]["accuracy"] != scrambled_report["condensed"]["accuracy"]
+    validation = report["validation"]
+    assert validation["full_accuracy"] - validation["condensed_accuracy"] <= 0.02
+
+
+def test_full_model_is_kept_when_nothing_is_within_tolerance(split):
+    X_train, X_test, y_train, y_test = split
+    for method in ("kmeans", "cnn"):
+        model, report = condense_model(KNeighborsClassifier(n_neighbors=5), X_train, y_train, X_test, y_test,
+                                       method=method, max_accuracy_loss=-1.0)
+        assert len(model._fit_X) == len(X_train)
+        assert report["condensed"] == report["full"]
+        assert report["per_class"] is None
@@ -0,0 +1,56 @@
+import json
+import os
+import numpy as np
+from dataset_store import DatasetStore
+
+
+def append_rows(store, label, chunks, rows=4):
+    for _ in range(chunks):
+        landmarks = np.random.default_rng(len(store.chunks)).random((rows, 21, 3)).astype(np.float32)
+        store.append_chunk([label] * rows, features=np.ones((rows, 11)), landmarks=landmarks, feature_version=1)
+
+
+def test_append_after_compact_keeps_compacted_rows(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    append_rows(store, "A", 3)
+    store.compact()
+    append_rows(store, "B", 3)
+
+    names = [chunk["name"] for chunk in store.chunks]
+    assert len(names) == len(set(names)) == 4
+    _, labels = DatasetStore(str(tmp_path)).load(feature_version=1)
+    assert sorted(labels) == ["A"] * 12 + ["B"] * 12
+
+
+def test_compact_twice_with_appends_between(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    append_rows(store, "A", 2)
+    store.compact()
+    append_rows(store, "B", 2)
+    store.compact()
+    append_rows(store, "C", 1)
+
+    reopened = DatasetStore(str(tmp_path))
+    _, labels = reopened.load(feature_version=1)
+    assert sorted(labels) == ["A"] * 8 + ["B"] * 8 + ["C"] * 4
+    landmarks, _, _ = reopened.load_landmarks()
+    assert len(landmarks) == 20
+
+
+def test_store_without_chunk_counter_continues_after_highest_chunk(tmp_path):
+    store = DatasetStore(str(tmp_path))
+    append_rows(store, "A", 3)
+    store.compact()
+    # A manifest written before next_chunk was recorded
+    manifest_path = os.path.join(str(tmp_path), DatasetStore.MANIFEST)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    del manifest["next_chunk"]
+    with open(manifest_path, "w") as f:
+        json.dump(manifest, f)
+
+    store = DatasetStore(str(tmp_path))
+    append_rows(store, "B", 2)
+    store.compact()
+    _, labels = store.load(feature_version=1)
+    assert sorted(labels) == ["A"] * 12 + ["B"] * 8
@@ -0,0 +1,64 @@
+import pytest
+from decision_engine import DecisionEngine, acceptance_time, synthetic_stream
+
+FRAME_RATES = (15, 30, 60)
+
+
+def run(stream, **params):
+    """Accepted label after every frame"""
+    engine = DecisionEngine(**params)
+    return [(now, engine.update(label, confidence, now)) for now, label, confidence in stream]
+
+
+@pytest.mark.parametrize("noise", [0.0, 0.2])
+def test_time_to_accept_is_frame_rate_independent(noise):
+    segments = [(0.0, None, 0.0), (0.5, "B", 0.8)]
+    times = [acceptance_time(synthetic_stream(fps, 3.0, segments, noise), "B") for fps in FRAME_RATES]
+    assert all(t is not None for t in times)
+    # About a quarter of a second at every rate, within one 15 FPS frame of each other
+    assert all(0.6 < t < 0.9 for t in times)
+    assert max(times) - min(times) <= 1 / 15 + 1e-9
+
+
+@pytest.mark.parametrize("fps", FRAME_RATES)
+def test_majority_vote_confidence_is_accepted(fps):
+    # 3 of 5 neighbors: the smallest confidence a steady k=5 majority gives
+    segments = [(0.0, "C", 0.6)]
+    assert acceptance_time(synthetic_stream(fps, 2.0, segments), "C") is not None
+
+
+@pytest.mark.parametrize("fps", FRAME_RATES)
+def test_single_frame_flicker_is_rejected(fps):
+    flicker = [(0.0, None, 0.0), (0.5, "A", 1.0), (0.5 + 0.5 / fps, None, 0.0)]
+    assert acceptance_time(synthetic_stream(fps, 1.5, flicker), "A") is None
+
+
+@pytest.mark.parametrize("fps", FRAME_RATES)
+def test_short_flicker_is_rejected(fps):
+    flicker = [(0.0, "A", 0.9), (0.08, None, 0.0)]
+    assert acceptance_time(synthetic_stream(fps, 1.0, flicker), "A") is None
+
+
+@pytest.mark.parametrize("fps", FRAME_RATES)
+def test_flicker_does_not_interrupt_an_accepted_sign(fps):
+    segments = [(0.0, "B", 0.8), (1.0, "A", 0.9), (1.0 + 0.5 / fps, "B", 0.8)]
+    accepted = run(synthetic_stream(fps, 2.0, segments))
+    assert all(label == "B" for now, label in accepted if now >= 0.5)
+
+
+@pytest.mark.parametrize("fps", FRAME_RATES)
+def test_hysteresis_holds_between_thresholds_and_releases_below(fps):
+    # Accepted at 0.8; a drop to 0.45 (between release and accept) keeps it;
+    # losing the hand releases it shortly after
+    segments = [(0.0, "B", 0.8), (1.0, "B", 0.45), (2.0, None, 0.0)]
+    accepted = dict(run(synthetic_stream(fps, 3.0, segments)))
+    assert all(label == "B" for now, label in accepted.items() if 0.5 <= now < 2.0)
+    released = min(now for now, label in accepted.items() if now >= 2.0 and label is None)
+    assert released <= 2.0 + 0.1 + 1 / fps
+    assert all(label is None for now, label in accepted.items() if now >= released)
+
+
+@pytest.mark.parametrize("fps", FRAME_RATES)
+def test_confidence_between_thresholds_is_not_accepted(fps):
+    segments = [(0.0, "B", 0.45)]
+    assert acceptance_time(synthetic_stream(fps, 2.0, segments), "B") is None
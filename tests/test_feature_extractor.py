@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+from feature_extractor import FeatureExtractor
+from feature_benchmark import _rotation, synthetic_hands
+
+
+def reference_features(points):
+    """The original per-frame v1 extractor, one (21, 2) hand at a time"""
+    def angle(a, b, c):
+        ba, bc = a - b, c - b
+        cosine = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc) + 1e-6)
+        return np.degrees(np.arccos(np.clip(cosine, -1.0, 1.0)))
+
+    points = points - points[0]
+    hand_size = np.linalg.norm(points[9])
+    if hand_size > 0:
+        points = points / hand_size
+    triples = [(2, 3, 4), (0, 2, 4), (0, 5, 8), (5, 6, 7), (0, 9, 12), (9, 10, 11),
+               (0, 13, 16), (13, 14, 15), (0, 17, 20), (17, 18, 19)]
+    return [angle(points[a], points[b], points[c]) for a, b, c in triples] + [np.linalg.norm(points[4] - points[8])]
+
+
+def degenerate_hands():
+    """Hands that stress the normalization: collapsed, zero palm length, collinear, repeated joints"""
+    rng = np.random.default_rng(1)
+    collapsed = np.full((21, 3), 200.0)
+    zero_palm = rng.random((21, 3)) * 100
+    zero_palm[9] = zero_palm[0]
+    collinear = np.zeros((21, 3))
+    collinear[:, 1] = np.arange(21) * 10.0
+    repeated = rng.random((21, 3)) * 100
+    repeated[6] = repeated[7] = repeated[5]
+    return np.stack([collapsed, zero_palm, collinear, repeated])
+
+
+@pytest.fixture(scope="module")
+def hands():
+    landmarks, handedness, _ = synthetic_hands(num_signs=4, samples_per_sign=25)
+    return landmarks, handedness
+
+
+def test_v1_batch_matches_original_extractor(hands):
+    landmarks, _ = hands
+    batch = FeatureExtractor(1).extract_features_batch(landmarks)
+    expected = np.array([reference_features(frame[:, :2]) for frame in landmarks])
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-9)
+
+
+def test_v1_degenerate_hands_match_original_extractor():
+    landmarks = degenerate_hands()
+    batch = FeatureExtractor(1).extract_features_batch(landmarks)
+    expected = np.array([reference_features(frame[:, :2]) for frame in landmarks])
+    np.testing.assert_allclose(batch, expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_batch_matches_per_frame(hands, version):
+    landmarks, handedness = hands
+    extractor = FeatureExtractor(version)
+    batch = extractor.extract_features_batch(landmarks, handedness)
+    for i in range(0, len(landmarks), 7):
+        single = extractor.extract_features_batch(landmarks[i:i + 1], handedness[i:i + 1])[0]
+        np.testing.assert_allclose(single, batch[i], rtol=0, atol=1e-6)
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_extract_features_matches_batch_on_2d_lists(hands, version):
+    landmarks, _ = hands
+    extractor = FeatureExtractor(version)
+    frame = landmarks[0, :, :2]
+    lm_list = [[i, x, y] for i, (x, y) in enumerate(frame)]
+    np.testing.assert_allclose(extractor.extract_features(lm_list),
+                               extractor.extract_features_batch(frame[np.newaxis])[0], rtol=0, atol=1e-6)
+    assert extractor.extract_features([]) == []
+    assert extractor.extract_features(lm_list[:20]) == []
+
+
+@pytest.mark.parametrize("version", [1, 2])
+def test_degenerate_hands_are_finite(version):
+    extractor = FeatureExtractor(version)
+    features = extractor.extract_features_batch(degenerate_hands())
+    assert features.shape == (4, extractor.num_features)
+    assert np.isfinite(features).all()
+
+
+def test_v2_is_invariant_to_rotation_scale_and_translation(hands):
+    landmarks, handedness = hands
+    extractor = FeatureExtractor(2)
+    moved = (landmarks - landmarks[:, :1]) @ _rotation(0.7, 0.5, -0.6).T * 1.7 + [30.0, -12.0, 4.0]
+    np.testing.assert_allclose(extractor.extract_features_batch(moved, handedness),
+                               extractor.extract_features_batch(landmarks, handedness), rtol=0, atol=1e-4)
+
+
+def test_v2_mirrors_left_hands(hands):
+    landmarks, _ = hands
+    extractor = FeatureExtractor(2)
+    right = np.zeros(len(landmarks), dtype=np.int8)
+    mirrored = landmarks.copy()
+    mirrored[:, :, 0] *= -1
+    np.testing.assert_allclose(extractor.extract_features_batch(mirrored, right + 1),
+                               extractor.extract_features_batch(landmarks, right), rtol=0, atol=1e-6)
+
+
+def test_v2_output_buffer_is_reused(hands):
+    landmarks, handedness = hands
+    extractor = FeatureExtractor(2)
+    out = np.empty((len(landmarks), extractor.num_features), dtype=np.float32)
+    assert extractor.extract_features_batch(landmarks, handedness, out=out) is out
+    assert out.flags.c_contiguous
+
+
+def test_version_lookup():
+    assert FeatureExtractor.version_for(11) == 1
+    assert FeatureExtractor.version_for(44) == 2
+    assert FeatureExtractor.version_for(7) is None
+    with pytest.raises(ValueError):
+        FeatureExtractor(99)
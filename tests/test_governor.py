@@ -0,0 +1,62 @@
+from governor import Governor, SimulatedDetector, simulate
+
+TARGET_FPS = 24
+
+
+def check_backoff(governor):
+    """Every move back up to a level waits out the doubling delay since that level was last left for being slow"""
+    left = {} # level -> times it was left as too slow
+    for adjustment in governor.adjustments:
+        if adjustment["reason"] == "too slow":
+            left.setdefault(adjustment["from"], []).append(adjustment["time"])
+        else:
+            times = left[adjustment["to"]]
+            delay = governor.backoff * 2 ** (len(times) - 1)
+            assert adjustment["time"] >= times[-1] + delay
+
+
+def test_slow_detector_converges_to_target_fps():
+    governor, report = simulate(base_ms=60.0, source_fps=30, target_fps=TARGET_FPS, duration=5.0,
+                                window=0.5, settle=0.25, backoff=1.0, log=None)
+    assert governor.adjustments[0]["reason"] == "too slow"
+    assert governor.level > 0
+    # The level it settles on detects within the frame budget, and the pipeline keeps up
+    assert governor.detector.cost_ms() < 1000 / TARGET_FPS
+    assert report["inference"]["fps"] >= 0.9 * TARGET_FPS
+    check_backoff(governor)
+
+
+def test_fast_detector_keeps_full_quality():
+    governor, report = simulate(base_ms=5.0, source_fps=30, target_fps=TARGET_FPS, duration=2.0,
+                                window=0.5, settle=0.25, log=None)
+    assert governor.adjustments == []
+    assert governor.process_scale == 1.0 and governor.model_complexity == 1
+    assert report["dropped"]["capture->inference"] == 0
+
+
+def test_oscillating_level_backs_off_exponentially():
+    detector = SimulatedDetector()
+    governor = Governor(detector, TARGET_FPS, window=1.0, settle=0.0, backoff=2.0, log=None)
+    budget = governor.budget
+    now = 0.0
+
+    def frame(latency):
+        nonlocal now
+        now += budget
+        governor.update(latency, now)
+
+    # Level 0 is too slow and level 1 always has headroom, so it keeps retrying level 0
+    retries = []
+    for _ in range(4):
+        while governor.level == 0:
+            frame(2 * budget)
+        left = now
+        while governor.level == 1:
+            frame(0.1 * budget)
+        assert governor.level == 0
+        retries.append(now - left)
+    check_backoff(governor)
+    assert detector.process_scale == 1.0
+    # Waits of about 2, 4, 8, 16 seconds
+    for shorter, longer in zip(retries, retries[1:]):
+        assert 1.8 < longer / shorter < 2.2
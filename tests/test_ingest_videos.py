@@ -0,0 +1,7 @@
+from ingest_videos import _process_video
+
+
+def test_unreadable_video_is_reported_not_raised(tmp_path):
+    result = _process_video(str(tmp_path / "missing.mp4"))
+    assert result["path"].endswith("missing.mp4")
+    assert "FileNotFoundError" in result["error"]
@@ -0,0 +1,43 @@
+import numpy as np
+import pytest
+from sklearn.neighbors import KNeighborsClassifier
+from knn_engine import KNNEngine
+
+
+def tie_free_data(seed=0):
+    """Continuous vectors, so no query has two references at the same distance"""
+    rng = np.random.default_rng(seed)
+    X = rng.normal(size=(400, 11))
+    y = np.array(["A", "B", "C", "D"])[rng.integers(0, 4, len(X))]
+    return X, y, rng.normal(size=(160, 11))
+
+
+@pytest.mark.parametrize("metric", ["euclidean", "manhattan", "chebyshev", "minkowski"])
+@pytest.mark.parametrize("weights", ["uniform", "distance"])
+def test_matches_sklearn_without_ties(metric, weights):
+    X, y, queries = tie_free_data()
+    model = KNeighborsClassifier(n_neighbors=5, weights=weights, metric=metric, p=3).fit(X, y)
+    engine = KNNEngine.from_sklearn(model)
+
+    np.testing.assert_allclose(engine.predict_proba(queries), model.predict_proba(queries), rtol=0, atol=1e-12)
+    labels, _ = engine.predict_batch(queries)
+    np.testing.assert_array_equal(labels, model.predict(queries))
+    assert [engine.predict(q)[0] for q in queries] == list(model.predict(queries))
+
+
+def test_exact_matches_take_all_distance_weight():
+    X, y, _ = tie_free_data()
+    model = KNeighborsClassifier(n_neighbors=5, weights="distance").fit(X, y)
+    engine = KNNEngine.from_sklearn(model)
+    np.testing.assert_allclose(engine.predict_proba(X[:20]), model.predict_proba(X[:20]), rtol=0, atol=1e-12)
+
+
+def test_tied_vote_goes_to_first_class():
+    # Two neighbors of each class at distinct distances: a 2-2 vote
+    X = np.array([[1.0], [2.0], [3.0], [4.0], [50.0]])
+    y = np.array(["B", "A", "B", "A", "C"])
+    model = KNeighborsClassifier(n_neighbors=4).fit(X, y)
+    engine = KNNEngine.from_sklearn(model)
+    query = np.array([0.0])
+    assert model.predict([query])[0] == "A"
+    assert engine.predict(query) == ("A", 0.5)
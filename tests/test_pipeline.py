@@ -0,0 +1,77 @@
+import threading
+import time
+from feature_extractor import FeatureExtractor
+from game_engine import GameEngine
+from governor import SimulatedDetector
+from pipeline import DropOldestQueue, RecognitionPipeline, SyntheticSource
+
+
+def make_pipeline(num_frames, detect_ms, source_fps=None, queue_size=2):
+    # Frames are just their own index, so results can be traced back to the source order
+    source = SyntheticSource(range(num_frames), fps=source_fps)
+    detector = SimulatedDetector(base_ms=detect_ms, fixed_ms=0.0)
+    return RecognitionPipeline(source, detector, FeatureExtractor(), None, GameEngine(), queue_size=queue_size)
+
+
+def test_drop_oldest_queue_keeps_newest_items():
+    queue = DropOldestQueue(maxsize=2)
+    for item in range(5):
+        queue.put(item)
+    assert queue.dropped == 3
+    assert [queue.get(), queue.get()] == [3, 4]
+    assert queue.get(timeout=0.01) is None
+
+
+def test_drop_oldest_queue_close_wakes_consumer():
+    queue = DropOldestQueue()
+    got = []
+    consumer = threading.Thread(target=lambda: got.append(queue.get()))
+    consumer.start()
+    time.sleep(0.05)
+    queue.close()
+    consumer.join(timeout=1)
+    assert not consumer.is_alive()
+    assert got == [None]
+
+
+def test_results_keep_source_order_without_backpressure():
+    pipeline = make_pipeline(30, detect_ms=0.0, source_fps=200, queue_size=64)
+    results = []
+    report = pipeline.run(results.append)
+    assert [r.frame_id for r in results] == list(range(30))
+    assert all(r.img == r.frame_id for r in results)
+    assert all(r.predicted_sign is None for r in results)
+    assert report["dropped"] == {"capture->inference": 0, "inference->render": 0}
+
+
+def test_slow_detector_drops_oldest_frames_in_order():
+    num_frames = 200
+    pipeline = make_pipeline(num_frames, detect_ms=5.0)
+    results = []
+    report = pipeline.run(results.append)
+
+    frame_ids = [r.frame_id for r in results]
+    assert frame_ids == sorted(set(frame_ids))
+    assert all(r.img == r.frame_id for r in results)
+    dropped = report["dropped"]["capture->inference"]
+    assert dropped > num_frames // 2
+    assert report["inference"]["frames"] + dropped + len(pipeline.frame_queue) == num_frames
+    # The freshest frame always survives the drops
+    assert frame_ids[-1] == num_frames - 1
+
+
+def test_stopping_early_shuts_down_cleanly():
+    pipeline = make_pipeline(10 ** 6, detect_ms=1.0, source_fps=500)
+    results = []
+
+    def render(result):
+        results.append(result)
+        return len(results) < 10
+
+    before = threading.active_count()
+    pipeline.run(render)
+    assert len(results) == 10
+    assert pipeline.threads == []
+    assert pipeline.frame_queue.closed and pipeline.result_queue.closed
+    assert threading.active_count() == before
+    assert not any(t.name in ("capture", "inference") for t in threading.enumerate())
@@ -0,0 +1,124 @@
+import numpy as np
+from sklearn.neighbors import KNeighborsClassifier
+from classifier import SignClassifier
+from feature_extractor import FeatureExtractor
+from prediction_cache import PredictionCache, hold_stream, synthetic_poses, validate
+
+
+class Model:
+    """Counts calls; the answer can be changed to simulate a stale cache entry"""
+
+    def __init__(self, label="A"):
+        self.label = label
+        self.calls = 0
+
+    def __call__(self, features):
+        self.calls += 1
+        return self.label, 0.8
+
+
+def test_same_cell_hits_and_other_cells_miss():
+    cache = PredictionCache(step=1.0, verify_every=0)
+    model = Model()
+    cache.predict(np.array([0.1, 0.2]), model)
+    cache.predict(np.array([0.3, -0.2]), model)
+    cache.predict(np.array([1.1, 0.2]), model)
+    assert (cache.hits, cache.misses, model.calls) == (1, 2, 2)
+
+
+def test_context_separates_entries():
+    cache = PredictionCache(step=1.0, verify_every=0)
+    model = Model()
+    cache.predict(np.zeros(2), model, context="alice")
+    cache.predict(np.zeros(2), model, context="bob")
+    assert cache.misses == 2
+
+
+def test_entries_are_bounded():
+    cache = PredictionCache(step=1.0, max_entries=3, verify_every=0)
+    for i in range(10):
+        cache.predict(np.array([float(i)]), Model())
+    assert len(cache.entries) == 3
+
+
+def test_disagreeing_verification_replaces_the_stale_entry():
+    cache = PredictionCache(step=1.0, verify_every=1, min_checks=1000)
+    model = Model("A")
+    features = np.zeros(3)
+    cache.predict(features, model)
+    model.label = "B"
+    assert cache.predict(features, model)[0] == "B" # verified hit
+    model.calls = 0
+    cache.verify_every = 0
+    assert cache.predict(features, model)[0] == "B" # served from the cache
+    assert model.calls == 0
+
+
+def test_low_agreement_halves_the_step():
+    cache = PredictionCache(step=np.array([1.0, 2.0]), verify_every=1, min_checks=2, min_agreement=0.9)
+    model = Model("A")
+    for label in "BCD":
+        cache.predict(np.zeros(2), model)
+        model.label = label
+        cache.predict(np.zeros(2), model)
+    assert cache.refinements >= 1
+    np.testing.assert_allclose(cache.step, np.array([1.0, 2.0]) / 2 ** cache.refinements)
+
+
+def test_key_uses_the_principal_components_of_the_reference_set():
+    rng = np.random.default_rng(0)
+    # Two directions carry the spread; the other 42 features are small noise
+    reference = np.zeros((500, 44))
+    reference[:, :2] = rng.normal(size=(500, 2)) * [5.0, 2.0]
+    reference += rng.normal(size=reference.shape) * 0.01
+    cache = PredictionCache.from_reference(reference, granularity=0.5, variance=0.9)
+    assert cache.basis.shape == (44, 2)
+    projected = (reference - reference.mean(axis=0)) @ cache.basis
+    np.testing.assert_allclose(cache.step, projected.std(axis=0) * 0.5)
+
+    # Noise in the dropped directions does not change the key; a move along a kept one does
+    features = reference[0]
+    noisy = features + np.r_[0.0, 0.0, rng.normal(size=42) * 0.05]
+    assert cache.key(noisy) == cache.key(features)
+    assert cache.key(features + 3 * cache.step[0] * cache.basis[:, 0]) != cache.key(features)
+
+
+def test_key_without_a_basis_quantizes_each_feature():
+    cache = PredictionCache(step=np.array([1.0, 0.5]), center=np.array([0.0, 10.0]))
+    assert cache.key([0.4, 10.2]) == cache.key([-0.4, 9.8])
+    assert cache.key([0.6, 10.0]) != cache.key([0.4, 10.0])
+
+
+def test_enable_cache_keys_knn_models_on_principal_components():
+    rng = np.random.default_rng(0)
+    features = rng.normal(size=(200, 44)) * np.linspace(0.1, 5.0, 44)
+    labels = rng.integers(0, 3, 200).astype(str)
+    classifier = SignClassifier.from_model(KNeighborsClassifier(n_neighbors=5).fit(features, labels))
+    classifier.enable_cache()
+    assert classifier.cache.basis is not None and classifier.cache.basis.shape[1] < 44
+
+
+def held_pose_report(version):
+    poses = synthetic_poses(20)
+    extractor = FeatureExtractor(version)
+    samples = hold_stream(poses, 50, jitter=3.0, seed=1)
+    labels = np.repeat([f"pose{i}" for i in range(len(poses))], 50)
+    classifier = SignClassifier.from_model(
+        KNeighborsClassifier(n_neighbors=5).fit(extractor.extract_features_batch(samples), labels))
+    classifier.enable_cache()
+    return validate(classifier, extractor.extract_features_batch(hold_stream(poses)))
+
+
+def test_cached_labels_agree_with_the_model():
+    report = held_pose_report(FeatureExtractor.FEATURE_VERSION)
+    assert report["passed"]
+    assert report["cache"]["refinements"] == 0
+
+
+def test_held_v2_poses_mostly_hit():
+    report = held_pose_report(2)
+    # 20 poses held for 60 frames each: most frames after the first few of a pose are served from the cache
+    assert report["cache"]["hit_rate"] >= 0.8
+    assert report["agreement"] == 1.0
+    # Hits cost a few microseconds against a full KNN query
+    assert report["cached_cpu_s"] < 0.6 * report["uncached_cpu_s"]
@@ -0,0 +1,46 @@
+import time
+import numpy as np
+from sequence_recognizer import synthetic_recognizer, synthetic_stream
+
+FPS = 30
+
+
+def run(recognizer, stream):
+    labels, timings = [], []
+    for i, landmarks in enumerate(stream):
+        start = time.perf_counter()
+        labels.append(recognizer.update(landmarks, i / FPS)[0])
+        timings.append(time.perf_counter() - start)
+    return labels, np.array(timings)
+
+
+def spotted(labels):
+    """The sequence of recognized signs, with repeats collapsed"""
+    return "".join(label for i, label in enumerate(labels) if label is not None and (i == 0 or labels[i - 1] != label))
+
+
+def test_recognizes_synthetic_signs():
+    labels, _ = run(synthetic_recognizer(10), synthetic_stream("ZJO" * 3, FPS))
+    assert spotted(labels) == "ZJO" * 3
+
+
+def test_whole_update_stays_within_budget_on_average():
+    # A budget well below one classification, so the rate limit has to skip frames
+    recognizer = synthetic_recognizer(10, budget_ms=0.5)
+    stream = synthetic_stream("ZJO" * 4, FPS)
+    labels, timings = run(recognizer, stream)
+
+    assert recognizer.classify_time > recognizer.budget
+    assert 0 < recognizer.classifications < len(stream)
+    assert timings.mean() <= 1.1 * recognizer.budget
+    # Skipped frames repeat the last result, so signs are still recognized
+    assert set(spotted(labels)) == set("ZJO")
+
+
+def test_still_hand_costs_little_and_reports_nothing():
+    recognizer = synthetic_recognizer(10)
+    still = np.repeat(synthetic_stream("Z", FPS)[:1], 3 * FPS, axis=0)
+    labels, timings = run(recognizer, still)
+    assert set(labels) == {None}
+    assert recognizer.classifications == 0
+    assert timings.mean() < recognizer.budget
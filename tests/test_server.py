@@ -0,0 +1,79 @@
+import asyncio
+import json
+import pytest
+from classifier import SignClassifier
+from server import MAX_BODY, InferenceServer
+
+HAND = [[100.0 + i, 200.0 + 2 * i] for i in range(21)]
+
+
+@pytest.fixture
+def server(tmp_path):
+    # No trained model: every frame predicts no sign, but sessions and games still run
+    return InferenceServer(SignClassifier(str(tmp_path / "model.pkl")), max_wait_ms=0)
+
+
+def post(server, body):
+    async def run():
+        server.pending = asyncio.Queue()
+        batcher = asyncio.create_task(server._batch_loop())
+        try:
+            return await server.handle("POST", "/predict", body)
+        finally:
+            batcher.cancel()
+    return asyncio.run(run())
+
+
+@pytest.mark.parametrize("body", [
+    "[1, 2]", '"x"', "3", "null", "not json",
+    json.dumps({"landmarks": [[1, 2]]}),
+    json.dumps({"landmarks": HAND, "image_size": [640]}),
+    json.dumps({"landmarks": HAND, "image_size": {"w": 640, "h": 480}}),
+    json.dumps({"landmarks": HAND, "handedness": ["Left"]}),
+])
+def test_malformed_requests_get_400(server, body):
+    status, payload = post(server, body)
+    assert status == "400 Bad Request"
+    assert payload["error"]
+
+
+def test_valid_request_starts_a_session(server):
+    status, payload = post(server, json.dumps({"landmarks": HAND, "handedness": "Right", "start": True}))
+    assert status == "200 OK"
+    assert payload["session"] and payload["sign"] is None
+    assert payload["ui"]["state"] == "PLAYING"
+
+
+def exchange(server, request):
+    """Send raw bytes to a live connection and return everything the server sends back"""
+    async def run():
+        server.pending = asyncio.Queue()
+        batcher = asyncio.create_task(server._batch_loop())
+        listener = await asyncio.start_server(server._serve_connection, "127.0.0.1", 0)
+        try:
+            reader, writer = await asyncio.open_connection(*listener.sockets[0].getsockname()[:2])
+            writer.write(request)
+            await writer.drain()
+            response = await asyncio.wait_for(reader.read(), timeout=5)
+            writer.close()
+            return response
+        finally:
+            listener.close()
+            batcher.cancel()
+    return asyncio.run(run())
+
+
+def test_oversized_body_gets_413_and_closes(server):
+    body = json.dumps({"landmarks": HAND, "padding": "x" * MAX_BODY}).encode()
+    response = exchange(server, b"POST /predict HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body)
+    head, _, payload = response.partition(b"\r\n\r\n")
+    assert head.startswith(b"HTTP/1.1 413 Payload Too Large\r\n")
+    assert b"Connection: close" in head
+    assert "byte limit" in json.loads(payload)["error"]
+
+
+def test_keep_alive_connection_answers_every_request(server):
+    body = json.dumps({"session": "s", "landmarks": HAND, "start": True}).encode()
+    request = b"POST /predict HTTP/1.1\r\nContent-Length: %d\r\n\r\n" % len(body) + body
+    response = exchange(server, request * 2 + b"GET /stats HTTP/1.1\r\nConnection: close\r\n\r\n")
+    assert response.count(b"HTTP/1.1 200 OK") == 3